@@ -0,0 +1,224 @@
+'''
+无界面的批量DPS计算入口，不依赖PyQt，可以在没有图形环境的服务器上运行
+
+用法：python -m core.cli [输入文件] [-o 输出文件]
+      python -m core.cli --validate
+      python -m core.cli --sqlite [数据库路径] ...
+
+输入为JSONL格式，每行一套配卡，除weapon外的字段均可省略：
+{"id": "任意标识", "weapon": "武器名称", "cards": ["执行卡名称", ...],
+ "target": {"material": "Void", "armor": 3430, "headShotRate": 0.3, "elementDebuffs": {"Virus": 2}, "skillDebuffs": {"Qianyinfeidan": 1}},
+ "character": {"SkillStrength": 100}, "moveState": {"isMoving": false, "isInAir": false}, "cardSets": {"Ghost": 2}}
+其中材质、元素异常、技能异常、角色属性和套装均使用对应枚举的成员名
+元素异常为靶标身上常驻的层数，只有冰冻、辐射、病毒等计层数的元素异常会影响伤害
+
+输出同样为JSONL格式，每行对应一套输入配卡，包含DPSRequest的所有计算结果，
+指定--fight-duration时另外按时间模拟一场战斗，输出sustainedDps和combat字段；
+指定--monte-carlo时另外以随机判定模拟多个弹匣，输出monteCarlo字段，包含弹匣伤害的均值、标准差和分位数，
+同时指定--target-health时还包含击杀时间的分布；
+无法解析或计算失败的配卡输出error字段，不影响其余配卡
+'''
+from .ivtcard import WeaponCardBase
+from .ivtdps import DPSRequest, DPSResultCache, DPS_RESULT_FIELDS
+from .ivtenum import WeaponPropertyType, EnemyMaterial, DamageType, SkillDebuff, CharacterPropertyType, CardSet
+from .ivtweapon import Weapon
+from . import loader
+import contextlib
+import argparse
+import json
+import math
+import sys
+import os
+
+# 项目根目录，loader使用相对于该目录的数据文件路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 一个卡槽配置最多装备的执行卡数量
+MAX_CARD_COUNT = 9
+
+class BuildParser:
+    '''
+    将输入的配卡描述解析为DPS请求，武器和执行卡按名称查找，重名时使用先载入的一个
+    '''
+    def __init__(self, cards: list[WeaponCardBase], weapons: list[Weapon]):
+        self.cards = {}
+        for card in cards:
+            self.cards.setdefault(card.name, card)
+        self.weapons = {}
+        for weapon in weapons:
+            self.weapons.setdefault(weapon.name, weapon)
+
+    def parse(self, build: dict) -> DPSRequest:
+        '''
+        解析一套配卡描述，描述不合法时抛出ValueError
+        '''
+        weaponName = build.get('weapon')
+        if weaponName not in self.weapons:
+            raise ValueError(f"未知武器: {weaponName}")
+        cardNames = build.get('cards', [])
+        if len(cardNames) > MAX_CARD_COUNT:
+            raise ValueError(f"执行卡数量超过{MAX_CARD_COUNT}张: {len(cardNames)}")
+        cards = []
+        for i, cardName in enumerate(cardNames):
+            if cardName is None:
+                cards.append(None)
+            elif cardName in cardNames[:i]:
+                raise ValueError(f"执行卡重复装备: {cardName}")
+            elif cardName in self.cards:
+                cards.append(self.cards[cardName])
+            else:
+                raise ValueError(f"未知执行卡: {cardName}")
+        request = DPSRequest(self.weapons[weaponName], cards + [None] * (MAX_CARD_COUNT - len(cards)))
+        # 行动状态
+        moveState = build.get('moveState', {})
+        request.moveState.isMoving = bool(moveState.get('isMoving', False))
+        request.moveState.isInAir = bool(moveState.get('isInAir', False))
+        # 执行卡套装
+        for cardSet, count in build.get('cardSets', {}).items():
+            request.cardSetInfo.setCardSetCount(self._getEnum(CardSet, cardSet), int(count))
+        # 角色属性
+        for propertyType, value in build.get('character', {}).items():
+            request.characterInfo.setCharacterProperty(self._getEnum(CharacterPropertyType, propertyType), float(value))
+        # 靶标信息
+        target = build.get('target', {})
+        request.targetInfo.material = self._getEnum(EnemyMaterial, target.get('material', EnemyMaterial.Void.name))
+        request.targetInfo.armor = float(target.get('armor', request.targetInfo.armor))
+        request.targetInfo.headShotRate = float(target.get('headShotRate', 0.0))
+        for damageType, count in target.get('elementDebuffs', {}).items():
+            request.targetInfo.addConstantElementDebuff(self._getEnum(DamageType, damageType), int(count))
+        for skillDebuff, value in target.get('skillDebuffs', {}).items():
+            request.targetInfo.addSkillDebuff(self._getEnum(SkillDebuff, skillDebuff), int(value))
+        return request
+
+    @staticmethod
+    def _getEnum(enumType, name: str):
+        if name not in enumType.__members__:
+            raise ValueError(f"未知{enumType.__name__}: {name}")
+        return enumType[name]
+
+def createResult(build: dict, request: DPSRequest, combat: 'CombatResult' = None, monteCarlo: dict = None) -> dict:
+    '''
+    将计算完成的DPS请求转换为可以写入JSON的结果，最终属性只保留非零项
+    '''
+    result = {'id': build.get('id'), 'weapon': request.weapon.name,
+              'cards': [card.name if card is not None else None for card in request.cards]}
+    for field in DPS_RESULT_FIELDS:
+        if field != 'finalSnapshot':
+            result[field] = float(getattr(request, field))
+    properties = {}
+    for propertyType in WeaponPropertyType:
+        value = float(request.finalSnapshot.getPropertyValue(propertyType))
+        if value != 0:
+            properties[propertyType.name] = value
+    result['finalProperties'] = properties
+    if combat is not None:
+        result['sustainedDps'] = combat.sustainedDps
+        result['combat'] = {'fightDuration': combat.fightDuration, 'directDamage': combat.directDamage, 'dotDamage': combat.dotDamage,
+                            'attacks': combat.attacks, 'hits': combat.hits, 'triggers': combat.triggers, 'reloads': combat.reloads}
+    if monteCarlo is not None:
+        result['monteCarlo'] = monteCarlo
+    return result
+
+def evaluateBuilds(lines, output, parser: BuildParser, cache: DPSResultCache = None, analytic: bool = True,
+                   fightDuration: float = None, trialCount: int = None, targetHealth: float = None) -> tuple[int, int]:
+    '''
+    逐行计算输入的配卡并写出结果
+    :param fightDuration: 按时间模拟的战斗时长，为None时不模拟
+    :param trialCount: 蒙特卡洛模拟的弹匣数量，为None时不模拟
+    :param targetHealth: 蒙特卡洛模拟中计算击杀时间的敌人生命值，为None时不计算
+    :return: 成功和失败的配卡数量
+    '''
+    succeeded, failed = 0, 0
+    for lineNumber, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        build = {}
+        try:
+            build = json.loads(line)
+            request = parser.parse(build)
+            if cache is None:
+                request.calculate(analytic)
+            else:
+                request.calculateWithCache(cache, analytic)
+            combat = request.simulateCombat(fightDuration) if fightDuration is not None else None
+            monteCarlo = request.simulateMonteCarlo(trialCount).getSummary(targetHealth) if trialCount is not None else None
+            result = createResult(build, request, combat, monteCarlo)
+            succeeded += 1
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            result = {'id': build.get('id') if isinstance(build, dict) else None, 'line': lineNumber, 'error': str(e)}
+            failed += 1
+        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+    return succeeded, failed
+
+def validateWeapons(weapons: list[Weapon]) -> int:
+    '''
+    检查所有武器的基础属性，并对每把武器执行一次不装备执行卡的完整DPS计算，问题输出到标准错误
+    :return: 有问题的武器数量
+    '''
+    invalidCount = 0
+    for weapon in weapons:
+        problems = weapon.validate()
+        try:
+            request = DPSRequest(weapon, [None] * MAX_CARD_COUNT)
+            request.calculate()
+            for field in DPS_RESULT_FIELDS:
+                if field != 'finalSnapshot' and not math.isfinite(getattr(request, field)):
+                    problems.append(f"计算结果{field}不是有限值")
+        except (ArithmeticError, ValueError, KeyError, IndexError) as e:
+            problems.append(f"计算失败: {e!r}")
+        if problems:
+            invalidCount += 1
+            print(f"武器 '{weapon.name}' 的数据有误: {'，'.join(problems)}", file=sys.stderr)
+    print(f"共检查 {len(weapons)} 把武器，{invalidCount} 把有误", file=sys.stderr)
+    return invalidCount
+
+def main(argv: list[str] = None) -> int:
+    argParser = argparse.ArgumentParser(prog='python -m core.cli', description="从JSONL文件批量计算配卡的DPS，结果以JSONL格式输出")
+    argParser.add_argument('input', nargs='?', default='-', help="输入文件，默认为标准输入")
+    argParser.add_argument('-o', '--output', default='-', help="输出文件，默认为标准输出")
+    argParser.add_argument('--root', default=PROJECT_ROOT, help="数据文件所在的项目根目录")
+    argParser.add_argument('--simulate', action='store_true', help="逐发模拟整个弹匣，而不是以解析方式计算")
+    argParser.add_argument('--fight-duration', type=float, metavar='SECONDS',
+                           help="另外按时间模拟一场指定时长的战斗，输出计入换弹和元素异常到期的持续DPS")
+    argParser.add_argument('--monte-carlo', type=int, metavar='TRIALS',
+                           help="另外以随机判定模拟指定数量的弹匣，输出弹匣伤害的分布")
+    argParser.add_argument('--target-health', type=float, metavar='HP',
+                           help="蒙特卡洛模拟中另外输出击杀该生命值敌人所需时间的分布")
+    argParser.add_argument('--no-cache', action='store_true', help="不缓存相同配卡的计算结果")
+    argParser.add_argument('--validate', action='store_true', help="只检查所有武器数据能否正常计算，不读取输入")
+    argParser.add_argument('--sqlite', nargs='?', const='', metavar='PATH',
+                           help="从SQLite数据库读取数据，数据库为空时从JSON数据文件导入，默认路径为" + loader.SQLITE_LIBRARY_PATH)
+    args = argParser.parse_args(argv)
+    if args.target_health is not None and args.monte_carlo is None:
+        argParser.error("--target-health需要与--monte-carlo一起使用")
+    if args.monte_carlo is not None and args.monte_carlo <= 0:
+        argParser.error(f"--monte-carlo的试验次数必须大于0: {args.monte_carlo}")
+    if args.fight_duration is not None and args.fight_duration <= 0:
+        argParser.error(f"--fight-duration的战斗时长必须大于0: {args.fight_duration}")
+
+    inputPath = None if args.input == '-' else os.path.abspath(args.input)
+    outputPath = None if args.output == '-' else os.path.abspath(args.output)
+    # 未指定路径时使用项目根目录下的默认数据库，指定的路径相对于当前目录
+    sqlitePath = None
+    if args.sqlite is not None:
+        sqlitePath = os.path.abspath(args.sqlite) if args.sqlite else loader.SQLITE_LIBRARY_PATH
+    os.chdir(args.root)
+    # 载入数据时的警告信息输出到标准错误，避免混入标准输出中的结果
+    with contextlib.redirect_stdout(sys.stderr):
+        if sqlitePath is not None:
+            loader.use_sqlite_backend(sqlitePath)
+        parser = BuildParser(loader.load_cards(), loader.load_weapons())
+    if args.validate:
+        return 0 if validateWeapons(loader.load_weapons()) == 0 else 1
+    cache = None if args.no_cache else DPSResultCache()
+
+    with contextlib.ExitStack() as stack:
+        lines = sys.stdin if inputPath is None else stack.enter_context(open(inputPath, 'r', encoding='utf-8'))
+        output = sys.stdout if outputPath is None else stack.enter_context(open(outputPath, 'w', encoding='utf-8'))
+        succeeded, failed = evaluateBuilds(lines, output, parser, cache, not args.simulate, args.fight_duration,
+                                           args.monte_carlo, args.target_health)
+    print(f"共计算 {succeeded + failed} 套配卡，{failed} 套失败", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from .ivtenum import *
-from .ivtproperty import WeaponProperty
+from .ivtproperty import WeaponProperty, packProperties, unpackProperties
+import numpy as np
 import copy
 
 class WeaponCardBase:
@@ -30,6 +31,27 @@ class WeaponCardWithProperty(WeaponCardBase):
     def __init__(self):
         pass
 
+    @property
+    def properties(self) -> list[WeaponProperty]:
+        '''
+        执行卡的属性条目，由打包属性创建的执行卡在第一次访问时才创建属性条目
+        '''
+        if self._properties is None:
+            self._properties = unpackProperties(self._packedProperties)
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties: list[WeaponProperty]):
+        self._properties = properties
+        self._packedProperties = None
+
+    def setPackedProperties(self, packed: np.ndarray):
+        '''
+        直接使用打包好的属性作为执行卡的属性，属性条目在需要时才创建，见packProperties
+        '''
+        self._properties = None
+        self._packedProperties = packed
+
     def getPropertiesRef(self) -> list[WeaponProperty]:
         '''
         返回这张执行卡的属性
@@ -42,6 +64,17 @@ class WeaponCardWithProperty(WeaponCardBase):
         '''
         return copy.deepcopy(self.properties)
 
+    def getPackedProperties(self) -> np.ndarray:
+        '''
+        返回这张执行卡打包后的属性，见packProperties
+        结果会被缓存，调用者不能修改
+        '''
+        packed = self._packedProperties
+        if packed is None:
+            packed = packProperties(self.properties)
+            self._packedProperties = packed
+        return packed
+
 class WeaponCardCommon(WeaponCardWithProperty):
     '''
     最常见的武器执行卡类型，普通武器执行卡
@@ -91,4 +124,18 @@ def calculateRivenPropertyRange(propertyType: WeaponPropertyType, weaponType: We
     if baseValue < 0:
         return baseValue, 0
     else:
-        return 0, baseValue
\ No newline at end of file
+        return 0, baseValue
+
+
+def isCardCompatibleWithWeapon(card: WeaponCardBase, weapon) -> bool:
+    '''
+    判断带属性条目的执行卡能否装备在武器的普通卡槽上
+    普通执行卡需要武器类型和子类型匹配，混淆执行卡需要武器名称匹配
+    '''
+    if isinstance(card, WeaponCardCommon):
+        if card.weaponType == WeaponType.All:
+            return True
+        return card.weaponType == weapon.weaponType and card.subWeaponType in (weapon.subWeaponType, SubWeaponType.All)
+    if isinstance(card, WeaponCardRiven):
+        return card.weaponName == weapon.basename
+    return False
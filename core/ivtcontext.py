@@ -1,123 +1,329 @@
-from PyQt5.QtCore import QObject, pyqtSignal
-from pynput import keyboard
-from .loader import load_cards, load_weapons, delete_riven_card, save_riven_card, load_config, save_config
+from .loader import load_cards, load_weapons, delete_riven_card, save_riven_card, load_config, save_config, use_sqlite_backend
+from .loader import is_sqlite_backend, load_compatible_cards, load_special_cards
 
-from .ivtdps import DPSRequest
+from .ivtdps import DPSRequest, DPSResultCache
 from .ivtweapon import Weapon
-from .ivtcard import WeaponCardRiven, WeaponCardBase
-from .ivtenum import SubWeaponType, SubWeaponTypeToMagazine
+from .ivtcard import WeaponCardRiven, WeaponCardBase, WeaponCardCommon, WeaponCardSpecial, isCardCompatibleWithWeapon
+from .ivtenum import WeaponType, SubWeaponType, SubWeaponTypeToMagazine
+import contextlib
+import threading
+import time
 
-class UISignals(QObject):
+# 合并DPS计算请求的时间窗口，单位为秒，窗口内提交的请求只计算最后一个
+RECALCULATION_DELAY = 0.05
+
+class StartupTimer:
     '''
-    全局UI使用的信号类
+    记录启动过程中各阶段的耗时，阶段可以嵌套，嵌套的阶段不计入合计
     '''
-    weaponChanged = pyqtSignal(Weapon)
-    rivenCardChanged = pyqtSignal(WeaponCardRiven)
-    addRivenCard = pyqtSignal(WeaponCardRiven)
-    miniCardSelected = pyqtSignal(WeaponCardBase)
-    cardSlotSelected = pyqtSignal(int)
-    weaponBuildRequestChanged = pyqtSignal()
-    dpsResultCompleted = pyqtSignal(DPSRequest)
-    dpsMethodChanged = pyqtSignal(int)
-
-class HotkeyListener(QObject):
+    def __init__(self):
+        self.phases: list[tuple[str, int, float]] = []     # 阶段名称，嵌套深度，耗时
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        '''
+        记录with语句块的耗时
+        '''
+        index = len(self.phases)
+        self.phases.append((name, self._depth, 0.0))
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.phases[index] = (name, self._depth, time.perf_counter() - start)
+
+    def report(self) -> str:
+        '''
+        生成各阶段耗时的报告
+        '''
+        lines = ["启动耗时:"]
+        for name, depth, elapsed in self.phases:
+            lines.append(f"{'  ' * (depth + 1)}{name}: {elapsed * 1000:.1f}ms")
+        total = sum(elapsed for _, depth, elapsed in self.phases if depth == 0)
+        lines.append(f"  合计: {total * 1000:.1f}ms")
+        return "\n".join(lines)
+
+class DpsCalculationScheduler:
     '''
-    全局热键监听类
+    在后台线程中合并计算DPS请求
+    第一次提交请求后等待delay秒，窗口内新提交的请求替换旧请求，被替换的请求不会计算；
+    同一时间最多只有一个请求在计算，计算期间提交的请求在计算完成后开始新的窗口，
+    计算完成时如果已经有更新的请求，本次结果作废，不会通知
     '''
-    homePressed = pyqtSignal()
-    endPressed = pyqtSignal()
-
-    def __init__(self):
-        super().__init__()
-        self.listener = keyboard.Listener(on_press=self.on_press)
+    def __init__(self, calculate, completed, delay: float = RECALCULATION_DELAY):
+        '''
+        :param calculate: 在后台线程中计算请求的函数
+        :param completed: 计算完成且没有被替换时调用的函数，在后台线程中调用
+        :param delay: 合并请求的时间窗口，为0时不等待
+        '''
+        self.calculate = calculate
+        self.completed = completed
+        self.delay = delay
+        self._pending: DPSRequest | None = None
+        self._timer: threading.Timer | None = None
+        self._running = False
+        self._lock = threading.Lock()
 
-    def on_press(self, key):
-        if key == keyboard.Key.home:
-            self.homePressed.emit()
-        elif key == keyboard.Key.end:
-            self.endPressed.emit()
+    def submit(self, request: DPSRequest):
+        '''
+        提交计算请求，替换还没有开始计算的请求
+        '''
+        with self._lock:
+            self._pending = request
+            # 已经在等待或计算时，新请求由之后的计算处理
+            if self._timer is None and not self._running:
+                self._startTimer()
 
-    def start(self):
-        self.listener.start()
+    def _startTimer(self):
+        self._timer = threading.Timer(self.delay, self._onTimer)
+        self._timer.daemon = True
+        self._timer.start()
 
-    def stop(self):
-        self.listener.stop()
+    def _onTimer(self):
+        with self._lock:
+            self._timer = None
+            request, self._pending = self._pending, None
+            if request is None:
+                return
+            self._running = True
+        try:
+            self.calculate(request)
+            with self._lock:
+                superseded = self._pending is not None
+            if not superseded:
+                self.completed(request)
+        finally:
+            with self._lock:
+                self._running = False
+                if self._pending is not None:
+                    self._startTimer()
 
 class IVTContext:
     '''
     全局上下文类，保存全局状态和信号
+    上下文本身不依赖Qt，配置和数据在第一次使用时才载入，
+    UI信号和热键监听在第一次访问时才创建，没有界面的进程中不会导入PyQt和pynput
     '''
     def __init__(self):
-        self.uiSignals = UISignals()
-        self.hotkeyListener = HotkeyListener()
-        self.config = load_config()
-        
-        self._allCards = load_cards()
-        self._allWeapons = load_weapons()
-
-        # 检查所有武器数据是否正确
-        for weapon in self._allWeapons:
-            print(f"初始化武器: {weapon.name}")
-            dpsReq = DPSRequest(weapon, [], context=self)
-            dpsReq.calculate()
+        self._config = None
+        self._allCards: list[WeaponCardBase] | None = None
+        self._allWeapons: list[Weapon] | None = None
+        # 数据载入后建立的索引，混淆执行卡增删时同步更新
+        self._weaponsByName: dict[str, Weapon] = {}
+        self._cardsByName: dict[str, WeaponCardBase] = {}
+        self._commonCardsByWeaponType: dict[tuple[WeaponType, SubWeaponType], list[WeaponCardCommon]] = {}
+        self._rivenCardsByWeaponName: dict[str, list[WeaponCardRiven]] = {}
+        self._specialCardsByWeaponName: dict[str, list[WeaponCardSpecial]] = {}
+        self._uiSignals = None
+        self._hotkeyListener = None
 
         self._lastDPSRequest: DPSRequest | None = None
+        self._dpsResultCache = DPSResultCache()
+        self._dpsScheduler = DpsCalculationScheduler(self._calculateDpsRequest, self._completeDpsRequest)
+        self.startupTimer = StartupTimer()
+
+    @property
+    def uiSignals(self) -> 'UISignals':
+        '''
+        全局UI信号，第一次访问时创建
+        '''
+        if self._uiSignals is None:
+            from .ivtsignals import UISignals
+            self._uiSignals = UISignals()
+        return self._uiSignals
+
+    @property
+    def hotkeyListener(self) -> 'HotkeyListener':
+        '''
+        全局热键监听，第一次访问时创建
+        '''
+        if self._hotkeyListener is None:
+            from .ivtsignals import HotkeyListener
+            self._hotkeyListener = HotkeyListener()
+        return self._hotkeyListener
+
+    @property
+    def config(self):
+        '''
+        应用配置，第一次访问时载入
+        '''
+        if self._config is None:
+            with self.startupTimer.phase("配置"):
+                self._config = load_config()
+        return self._config
+
+    def _loadData(self):
+        '''
+        载入执行卡和武器数据
+        '''
+        if self._allWeapons is not None:
+            return
+        if self.config.dataBackend == 'sqlite':
+            with self.startupTimer.phase("数据库"):
+                use_sqlite_backend()
+        with self.startupTimer.phase("执行卡"):
+            self._allCards = load_cards()
+        with self.startupTimer.phase("武器"):
+            self._allWeapons = load_weapons()
+            # 只检查武器基础属性的数值，完整的DPS计算检查见 python -m core.cli --validate
+            for weapon in self._allWeapons:
+                problems = weapon.validate()
+                if problems:
+                    print(f"警告: 武器 '{weapon.name}' 的数据有误: {'，'.join(problems)}")
+        self._buildIndexes()
+
+    def _buildIndexes(self):
+        '''
+        建立武器和执行卡的索引，同名时与按顺序查找一致，使用靠前的一个
+        普通执行卡按武器的(武器类型, 子武器类型)预先筛选，索引中的执行卡保持在执行卡表中的顺序
+        '''
+        self._weaponsByName = {}
+        for weapon in self._allWeapons:
+            self._weaponsByName.setdefault(weapon.name, weapon)
+        self._cardsByName = {}
+        self._rivenCardsByWeaponName = {}
+        self._specialCardsByWeaponName = {}
+        for card in self._allCards:
+            self._cardsByName.setdefault(card.name, card)
+            if isinstance(card, WeaponCardRiven):
+                self._rivenCardsByWeaponName.setdefault(card.weaponName, []).append(card)
+            elif isinstance(card, WeaponCardSpecial):
+                self._specialCardsByWeaponName.setdefault(card.weaponName, []).append(card)
+        commonCards = [card for card in self._allCards if isinstance(card, WeaponCardCommon)]
+        self._commonCardsByWeaponType = {}
+        for weapon in self._allWeapons:
+            key = (weapon.weaponType, weapon.subWeaponType)
+            if key not in self._commonCardsByWeaponType:
+                self._commonCardsByWeaponType[key] = [card for card in commonCards if isCardCompatibleWithWeapon(card, weapon)]
 
 #region 执行卡相关
     def getAllCards(self) -> list[WeaponCardBase]:
         '''
         获取所有执行卡
         '''
+        self._loadData()
         return self._allCards
     
     def getAllWeapons(self) -> list[Weapon]:
         '''
         获取所有武器
         '''
+        self._loadData()
         return self._allWeapons
     
     def getWeaponByName(self, name: str) -> Weapon | None:
         '''
         根据名称获取武器
         '''
-        for weapon in self._allWeapons:
-            if weapon.name == name:
-                return weapon
-        return None
+        self._loadData()
+        return self._weaponsByName.get(name)
     
     def getCardByName(self, name: str) -> WeaponCardBase | None:
         '''
         根据名称获取执行卡
         '''
-        for card in self.getAllCards():
-            if card.name == name:
-                return card
-        return None
+        self._loadData()
+        return self._cardsByName.get(name)
+
+    def getCompatibleCards(self, weapon: Weapon) -> list[WeaponCardBase]:
+        '''
+        获取能够装备在武器普通卡槽上的执行卡，即满足isCardCompatibleWithWeapon的普通执行卡和混淆执行卡，顺序与执行卡表一致
+        使用数据库时由数据库按索引查询
+        '''
+        self._loadData()
+        if is_sqlite_backend():
+            return load_compatible_cards(weapon)
+        key = (weapon.weaponType, weapon.subWeaponType)
+        commonCards = self._commonCardsByWeaponType.get(key)
+        if commonCards is None:
+            # 不在武器表中的武器类型，第一次查询时补充索引
+            commonCards = [card for card in self._allCards if isinstance(card, WeaponCardCommon) and isCardCompatibleWithWeapon(card, weapon)]
+            self._commonCardsByWeaponType[key] = commonCards
+        return commonCards + self._rivenCardsByWeaponName.get(weapon.basename, [])
+
+    def getSpecialCards(self, weapon: Weapon) -> list[WeaponCardSpecial]:
+        '''
+        获取武器的专属执行卡
+        '''
+        self._loadData()
+        if is_sqlite_backend():
+            return load_special_cards(weapon)
+        return list(self._specialCardsByWeaponName.get(weapon.basename, []))
+
+    def getRivenCards(self) -> list[WeaponCardRiven]:
+        '''
+        获取所有混淆执行卡，顺序与执行卡表一致
+        '''
+        return [card for card in self.getAllCards() if isinstance(card, WeaponCardRiven)]
     
     def saveRivenCard(self, card: WeaponCardRiven):
         '''
         保存混淆执行卡
+        执行卡表就是loader中缓存的执行卡表，由loader加入新的执行卡，这里只更新索引
         '''
+        self._loadData()
         if save_riven_card(card):
-            if card not in self._allCards:
-                self._allCards.append(card)
+            rivenCards = self._rivenCardsByWeaponName.setdefault(card.weaponName, [])
+            if card not in rivenCards:
+                rivenCards.append(card)
+                self._cardsByName.setdefault(card.name, card)
+            self._dpsResultCache.clear()
             return True
     
     def deleteRivenCard(self, card: WeaponCardRiven):
         '''
         删除混淆执行卡
+        执行卡表就是loader中缓存的执行卡表，由loader删除执行卡，这里只更新索引
         '''
+        self._loadData()
         delete_riven_card(card)
-        if card in self._allCards:
-            self._allCards.remove(card)
+        remainingCards = set(map(id, self._allCards))
+        rivenCards = [otherCard for otherCard in self._rivenCardsByWeaponName.get(card.weaponName, []) if id(otherCard) in remainingCards]
+        if rivenCards:
+            self._rivenCardsByWeaponName[card.weaponName] = rivenCards
+        else:
+            self._rivenCardsByWeaponName.pop(card.weaponName, None)
+        if id(self._cardsByName.get(card.name)) not in remainingCards:
+            # 可能还有同名的执行卡，与按顺序查找一致，使用剩余的第一个
+            del self._cardsByName[card.name]
+            for otherCard in self._allCards:
+                if otherCard.name == card.name:
+                    self._cardsByName[card.name] = otherCard
+                    break
+        self._dpsResultCache.clear()
             
-    def triggerDpsCalculation(self, request: DPSRequest):
+    def createBuildSearchPool(self, maxWorkers: int = None) -> 'BuildSearchPool':
+        '''
+        使用当前的执行卡和武器表创建多进程配卡计算池，调用者负责关闭
+        '''
+        # 多进程模块导入较慢，只在需要时导入
+        from .ivtworker import BuildSearchPool
+        return BuildSearchPool(self.getAllCards(), self.getAllWeapons(), maxWorkers)
+
+    def scheduleDpsCalculation(self, request: DPSRequest):
         '''
-        触发DPS计算
+        在后台合并计算DPS，短时间内连续提交的请求只计算最后一个，见DpsCalculationScheduler
+        计算完成后通过dpsResultCompleted通知，信号在后台线程中发出，界面中的监听者会在主线程中收到
         '''
+        self._dpsScheduler.submit(request)
+
+    def _calculateDpsRequest(self, request: DPSRequest):
+        request.calculateWithCache(self._dpsResultCache)
+
+    def _completeDpsRequest(self, request: DPSRequest):
         self._lastDPSRequest = request
-        request.calculate()
-        self.uiSignals.dpsResultCompleted.emit(request)
+        # 没有创建过UI信号时不会有监听者，无需通知
+        if self._uiSignals is not None:
+            self._uiSignals.dpsResultCompleted.emit(request)
+
+    def getDpsResultCache(self) -> DPSResultCache:
+        '''
+        获取DPS计算结果缓存
+        '''
+        return self._dpsResultCache
 #endregion
 
 #region 配置相关
@@ -146,6 +352,22 @@ class IVTContext:
         '''
         self.config.subWeaponTypeMagazine[subWeaponType] = magazine
         save_config(self.config)
+        self._dpsResultCache.clear()
 #endregion
 
-CONTEXT = IVTContext()
\ No newline at end of file
+_CONTEXT: IVTContext | None = None
+
+def getContext() -> IVTContext:
+    '''
+    获取全局上下文，第一次调用时创建
+    '''
+    global _CONTEXT
+    if _CONTEXT is None:
+        _CONTEXT = IVTContext()
+    return _CONTEXT
+
+def __getattr__(name: str):
+    # 兼容通过 from core.ivtcontext import CONTEXT 使用全局上下文的代码，直到第一次访问时才创建
+    if name == 'CONTEXT':
+        return getContext()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,218 @@
+from .ivtcard import WeaponCardBase, WeaponCardCommon, WeaponCardRiven, WeaponCardSpecial
+from .ivtenum import CardSet, WeaponType, SubWeaponType
+from .ivtweapon import Weapon
+import threading
+import sqlite3
+import json
+
+# 执行卡种类，执行卡表按该顺序排列，与JSON数据中普通、混淆、专属执行卡的载入顺序一致
+CARD_KIND_COMMON = 0
+CARD_KIND_RIVEN = 1
+CARD_KIND_SPECIAL = 2
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS weapons (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    basename TEXT NOT NULL,
+    weaponType TEXT NOT NULL,
+    subWeaponType TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS weaponsByBasename ON weapons (basename);
+CREATE INDEX IF NOT EXISTS weaponsByType ON weapons (weaponType, subWeaponType);
+
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    weaponName TEXT,
+    weaponType TEXT,
+    subWeaponType TEXT,
+    cardSet TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cardsByWeaponName ON cards (kind, weaponName);
+CREATE INDEX IF NOT EXISTS cardsByWeaponType ON cards (kind, weaponType, subWeaponType);
+CREATE INDEX IF NOT EXISTS cardsByCardSet ON cards (cardSet);
+CREATE INDEX IF NOT EXISTS cardsByName ON cards (name);
+
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    weaponName TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buildsByWeaponName ON builds (weaponName);
+'''
+
+class SqliteLibrary:
+    '''
+    保存武器、执行卡和配卡的SQLite数据库
+    每行保存与JSON数据文件格式相同的数据，另外以武器名、武器类型、套装等列建立索引，
+    按条件查询时只读取符合条件的行。数据库只负责存取数据，由loader将数据转换为对象
+    '''
+    def __init__(self, path: str):
+        '''
+        :param path: 数据库文件路径，不存在时创建
+        '''
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        '''
+        关闭数据库
+        '''
+        with self._lock:
+            self._connection.close()
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def isEmpty(self) -> bool:
+        '''
+        数据库中是否还没有武器和执行卡
+        '''
+        return not self._query('SELECT 1 FROM weapons LIMIT 1') and not self._query('SELECT 1 FROM cards LIMIT 1')
+
+#region 武器
+    def addWeapons(self, weapons: list[tuple[Weapon, dict]]) -> list[int]:
+        '''
+        在一个事务中添加多把武器
+        :param weapons: 武器对象和对应的数据，对象只用于生成索引列
+        :return: 每把武器的行号
+        '''
+        rowIds = []
+        with self._lock, self._connection:
+            for weapon, weaponData in weapons:
+                cursor = self._connection.execute(
+                    'INSERT INTO weapons (name, basename, weaponType, subWeaponType, data) VALUES (?, ?, ?, ?, ?)',
+                    (weapon.name, weapon.basename, weapon.weaponType.name, weapon.subWeaponType.name, json.dumps(weaponData, ensure_ascii=False)))
+                rowIds.append(cursor.lastrowid)
+        return rowIds
+
+    def getWeapons(self) -> list[tuple[int, dict]]:
+        '''
+        获取所有武器的行号和数据
+        '''
+        return [(rowId, json.loads(data)) for rowId, data in self._query('SELECT id, data FROM weapons ORDER BY id')]
+
+    def queryWeapons(self, basename: str = None, weaponType: WeaponType = None, subWeaponType: SubWeaponType = None) -> list[tuple[int, dict]]:
+        '''
+        按基础武器名称和武器类型查询武器，为None的条件不参与筛选
+        '''
+        conditions, parameters = [], []
+        if basename is not None:
+            conditions.append('basename = ?')
+            parameters.append(basename)
+        if weaponType is not None:
+            conditions.append('weaponType = ?')
+            parameters.append(weaponType.name)
+        if subWeaponType is not None:
+            conditions.append('subWeaponType = ?')
+            parameters.append(subWeaponType.name)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return [(rowId, json.loads(data)) for rowId, data in self._query(f'SELECT id, data FROM weapons {where} ORDER BY id', tuple(parameters))]
+#endregion
+
+#region 执行卡
+    def addCards(self, cards: list[tuple[WeaponCardBase, dict]]) -> list[int]:
+        '''
+        在一个事务中添加多张执行卡
+        :param cards: 执行卡对象和对应的数据，对象只用于生成索引列
+        :return: 每张执行卡的行号
+        '''
+        rowIds = []
+        with self._lock, self._connection:
+            for card, cardData in cards:
+                if isinstance(card, WeaponCardCommon):
+                    row = (CARD_KIND_COMMON, card.name, None, card.weaponType.name, card.subWeaponType.name, card.cardSet.name)
+                elif isinstance(card, WeaponCardRiven):
+                    row = (CARD_KIND_RIVEN, card.name, card.weaponName, None, None, None)
+                elif isinstance(card, WeaponCardSpecial):
+                    row = (CARD_KIND_SPECIAL, card.name, card.weaponName, None, None, None)
+                else:
+                    raise ValueError(f"未知执行卡类型: {type(card).__name__}")
+                cursor = self._connection.execute(
+                    'INSERT INTO cards (kind, name, weaponName, weaponType, subWeaponType, cardSet, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    row + (json.dumps(cardData, ensure_ascii=False),))
+                rowIds.append(cursor.lastrowid)
+        return rowIds
+
+    def getCards(self) -> list[tuple[int, int, dict]]:
+        '''
+        获取所有执行卡的行号、种类和数据，按种类和添加顺序排列
+        '''
+        return self._toCards(self._query('SELECT id, kind, data FROM cards ORDER BY kind, id'))
+
+    def queryCompatibleCards(self, weaponType: WeaponType, subWeaponType: SubWeaponType, basename: str) -> list[tuple[int, int, dict]]:
+        '''
+        查询能够装备在武器普通卡槽上的执行卡，与isCardCompatibleWithWeapon一致，按种类和添加顺序排列
+        '''
+        return self._toCards(self._query(
+            'SELECT id, kind, data FROM cards WHERE kind = ? AND (weaponType = ? OR (weaponType = ? AND subWeaponType IN (?, ?))) '
+            'UNION ALL SELECT id, kind, data FROM cards WHERE kind = ? AND weaponName = ? ORDER BY kind, id',
+            (CARD_KIND_COMMON, WeaponType.All.name, weaponType.name, subWeaponType.name, SubWeaponType.All.name, CARD_KIND_RIVEN, basename)))
+
+    def querySpecialCards(self, basename: str) -> list[tuple[int, int, dict]]:
+        '''
+        查询武器的专属执行卡
+        '''
+        return self._toCards(self._query('SELECT id, kind, data FROM cards WHERE kind = ? AND weaponName = ? ORDER BY id', (CARD_KIND_SPECIAL, basename)))
+
+    def queryCardsByCardSet(self, cardSet: CardSet) -> list[tuple[int, int, dict]]:
+        '''
+        查询属于某个套装的普通执行卡
+        '''
+        return self._toCards(self._query('SELECT id, kind, data FROM cards WHERE cardSet = ? ORDER BY kind, id', (cardSet.name,)))
+
+    def deleteRivenCards(self, name: str, weaponName: str) -> list[int]:
+        '''
+        删除名称和武器都相同的混淆执行卡
+        :return: 删除的行号
+        '''
+        with self._lock, self._connection:
+            rowIds = [rowId for rowId, in self._connection.execute(
+                'SELECT id FROM cards WHERE kind = ? AND weaponName = ? AND name = ?', (CARD_KIND_RIVEN, weaponName, name))]
+            self._connection.execute('DELETE FROM cards WHERE kind = ? AND weaponName = ? AND name = ?', (CARD_KIND_RIVEN, weaponName, name))
+        return rowIds
+
+    @staticmethod
+    def _toCards(rows: list[tuple]) -> list[tuple[int, int, dict]]:
+        return [(rowId, kind, json.loads(data)) for rowId, kind, data in rows]
+#endregion
+
+#region 配卡
+    def saveBuild(self, buildData: dict):
+        '''
+        保存配卡，同名的配卡会被覆盖
+        :param buildData: 配卡数据，包含name和weaponName
+        '''
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO builds (name, weaponName, data) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET weaponName = excluded.weaponName, data = excluded.data',
+                (buildData['name'], buildData['weaponName'], json.dumps(buildData, ensure_ascii=False)))
+
+    def getBuilds(self, weaponName: str = None) -> list[dict]:
+        '''
+        获取保存的配卡，weaponName不为None时只获取该武器的配卡
+        '''
+        if weaponName is None:
+            rows = self._query('SELECT data FROM builds ORDER BY id')
+        else:
+            rows = self._query('SELECT data FROM builds WHERE weaponName = ? ORDER BY id', (weaponName,))
+        return [json.loads(data) for data, in rows]
+
+    def deleteBuild(self, name: str) -> bool:
+        '''
+        删除配卡
+        :return: 是否存在该配卡
+        '''
+        with self._lock, self._connection:
+            return self._connection.execute('DELETE FROM builds WHERE name = ?', (name,)).rowcount > 0
+#endregion
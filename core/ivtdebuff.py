@@ -1,87 +1,82 @@
 from .ivtenum import DamageType, WeaponPropertyType
+import numpy as np
 
-class ElementDebuff:
-    '''
-    元素异常状态
-    '''
-    def __init__(self, duration):
-        self.duration = duration
-        self.time = 0
+# 每种伤害类型的元素异常层数上限，-1表示无限制，0表示不造成元素异常
+# 动能伤害不造成异常，冰冻最高9层，辐射、磁暴、以太、病毒最高10层
+ELEMENT_DEBUFF_MAX_COUNTS = (0, 9, -1, -1, -1, -1, 10, -1, 10, 10, 10)
+# 环形缓冲区的初始容量，足够容纳有上限的元素异常，无限制的元素异常超出时扩容
+ELEMENT_DEBUFF_CAPACITY = 10
 
-class ElementDebuffQueue:
+class ElementDebuffState:
     '''
-    单个元素异常的队列
-    每次新增元素异常，若超过上限，则移除最早的一个
+    敌人身上所有元素异常状态的集合
+    每种元素异常的到期时刻按触发顺序保存在一个环形缓冲区中，所有伤害类型的缓冲区合并为一个二维数组，
+    新增和移除最早的元素异常都只需要移动缓冲区的起点和长度；
+    常驻数量和层数上限单独保存，不会被移除。
+    time为当前时刻，新增的元素异常在当前时刻加上持续时间后到期
     '''
-    def __init__(self, maxCount=-1, constantCount=0):
+    def __init__(self):
+        self.time = 0.0
+        self.maxCounts = np.array(ELEMENT_DEBUFF_MAX_COUNTS, dtype=np.int64)
+        self.constantCounts = np.zeros(len(ELEMENT_DEBUFF_MAX_COUNTS), dtype=np.int64)
+        self.expireTimes = np.zeros((len(ELEMENT_DEBUFF_MAX_COUNTS), ELEMENT_DEBUFF_CAPACITY))
+        self.heads = np.zeros(len(ELEMENT_DEBUFF_MAX_COUNTS), dtype=np.int64)
+        self.lengths = np.zeros(len(ELEMENT_DEBUFF_MAX_COUNTS), dtype=np.int64)
+
+    def copy(self) -> 'ElementDebuffState':
         '''
-        maxCount: 最大数量，-1表示无限制
-        constantCount: 常驻数量，不会被移除
+        复制当前状态，与原状态互不影响
         '''
-        self.queue = []
-        self.maxCount = maxCount
-        self.constantCount = constantCount
+        state = ElementDebuffState.__new__(ElementDebuffState)
+        state.maxCounts = self.maxCounts
+        state.restore(self.snapshot())
+        return state
 
-    def getCount(self):
+    def snapshot(self) -> tuple:
         '''
-        获取当前元素异常的数量，为常驻数量加上队列中数量
+        保存当前状态，之后可以用restore恢复
         '''
-        return min(len(self.queue) + self.constantCount, max(self.maxCount, 0))
+        return self.time, self.constantCounts.copy(), self.expireTimes.copy(), self.heads.copy(), self.lengths.copy()
 
-    def addDebuff(self, debuff: ElementDebuff):
+    def restore(self, snapshot: tuple):
         '''
-        触发一次元素异常
+        恢复到snapshot保存的状态，同一份快照可以多次恢复
         '''
-        if self.maxCount < 0 or self.getCount() < self.maxCount:
-            self.queue.append(debuff)
-        else:
-            self.queue.pop(0)
-            self.queue.append(debuff)
+        time, constantCounts, expireTimes, heads, lengths = snapshot
+        self.time = time
+        self.constantCounts = constantCounts.copy()
+        self.expireTimes = expireTimes.copy()
+        self.heads = heads.copy()
+        self.lengths = lengths.copy()
 
-    def tick(self, deltaTime):
+    def _getCapacity(self, index: int) -> int:
         '''
-        时间流逝
+        缓冲区中最多保存的元素异常数量，层数达到上限后再触发会替换最早的一个
         '''
-        removeList = []
-        for debuff in self.queue:
-            debuff.time += deltaTime
-            if debuff.time >= debuff.duration:
-                removeList.append(debuff)
-        for debuff in removeList:
-            self.queue.remove(debuff)
+        maxCount = self.maxCounts[index]
+        if maxCount < 0:
+            return -1
+        return max(int(maxCount - self.constantCounts[index]), int(self.lengths[index]))
 
-    def setConstantCount(self, count):
+    def _grow(self, capacity: int):
         '''
-        设置常驻数量
+        扩大环形缓冲区，所有缓冲区的起点移到0
         '''
-        self.constantCount = count if self.maxCount < 0 else min(count, self.maxCount)
-
-class ElementDebuffState:
-    '''
-    敌人身上所有元素异常状态的集合
-    '''
-    def __init__(self):
-        self.elementDebuff = [
-            None, # 动能伤害不造成异常
-            ElementDebuffQueue(9), # 冰冻异常最高9层
-            ElementDebuffQueue(), # 赛能
-            ElementDebuffQueue(), # 热波
-            ElementDebuffQueue(), # 创生
-            ElementDebuffQueue(), # 裂化
-            ElementDebuffQueue(10), # 辐射
-            ElementDebuffQueue(), # 毒气
-            ElementDebuffQueue(10), # 磁暴
-            ElementDebuffQueue(10), # 以太
-            ElementDebuffQueue(10), # 病毒
-        ]
+        width = self.expireTimes.shape[1]
+        order = (self.heads[:, np.newaxis] + np.arange(width)) % width
+        expireTimes = np.zeros((len(self.expireTimes), max(capacity, width * 2)))
+        expireTimes[:, :width] = np.take_along_axis(self.expireTimes, order, axis=1)
+        self.expireTimes = expireTimes
+        self.heads[:] = 0
 
     def setConstantDebuffByDamageType(self, damageType: DamageType, count):
         '''
         设置常驻元素异常数量
         '''
-        if damageType == DamageType.Physical:
+        if damageType == DamageType.Physics:
             return
-        self.elementDebuff[damageType.value].setConstantCount(count)
+        maxCount = self.maxCounts[damageType.value]
+        self.constantCounts[damageType.value] = count if maxCount < 0 else min(count, maxCount)
 
     def setConstantDebuffByPropertyType(self, propertyType: WeaponPropertyType, count):
         '''
@@ -94,44 +89,116 @@ class ElementDebuffState:
         '''
         清除所有元素异常
         '''
-        for debuffQueue in self.elementDebuff:
-            if debuffQueue is not None:
-                debuffQueue.queue.clear()
+        self.lengths[:] = 0
+        self.heads[:] = 0
 
     def clearAllDebuff(self):
         '''
         清除所有元素异常，包括常驻数量
         '''
-        for debuffQueue in self.elementDebuff:
-            if debuffQueue is not None:
-                debuffQueue.queue.clear()
-                debuffQueue.constantCount = 0
+        self.clearDebuff()
+        self.constantCounts[:] = 0
 
-    def addDebuffByDamageType(self, damageType: DamageType, duration):
+    def addDebuffByDamageType(self, damageType: DamageType, duration, count: int = 1):
         '''
-        触发一次元素异常
+        触发count次元素异常，每次触发都在当前时刻加上持续时间后到期
+        层数已达上限时，每次触发替换最早的一个元素异常
         '''
-        if damageType == DamageType.Physics:
+        if damageType == DamageType.Physics or count <= 0:
             return
-        debuff = ElementDebuff(duration)
-        self.elementDebuff[damageType.value].addDebuff(debuff)
+        index = damageType.value
+        capacity = self._getCapacity(index)
+        length = int(self.lengths[index])
+        if capacity < 0:
+            # 无层数上限，全部保存
+            keep = length + count
+            if keep > self.expireTimes.shape[1]:
+                self._grow(keep)
+        else:
+            # 层数上限内全部保存，超出上限的触发依次替换最早的元素异常
+            keep = min(length + count, capacity)
+        width = self.expireTimes.shape[1]
+        # 先移除被替换的旧元素异常，再写入新的元素异常
+        removed = min(length + count - keep, length)
+        head = (int(self.heads[index]) + removed) % width
+        length -= removed
+        added = keep - length
+        expireTime = self.time + duration
+        if added == 1:
+            self.expireTimes[index, (head + length) % width] = expireTime
+        elif added > 0:
+            self.expireTimes[index, (head + length + np.arange(added)) % width] = expireTime
+        self.heads[index] = head
+        self.lengths[index] = keep
 
-    def addDebuffByPropertyType(self, propertyType: WeaponPropertyType, duration):
+    def addDebuffByPropertyType(self, propertyType: WeaponPropertyType, duration, count: int = 1):
         '''
-        触发一次元素异常
+        触发count次元素异常
         '''
         damageType = propertyType.toDamageType()
-        self.addDebuffByDamageType(damageType, duration)
+        self.addDebuffByDamageType(damageType, duration, count)
+
+    def tick(self, deltaTime):
+        '''
+        时间流逝，移除所有到期的元素异常
+        '''
+        self.time += deltaTime
+        width = self.expireTimes.shape[1]
+        order = (self.heads[:, np.newaxis] + np.arange(width)) % width
+        expireTimes = np.take_along_axis(self.expireTimes, order, axis=1)
+        alive = (np.arange(width) < self.lengths[:, np.newaxis]) & (expireTimes > self.time)
+        # 保持触发顺序，把未到期的元素异常移到缓冲区开头
+        self.expireTimes = np.take_along_axis(expireTimes, np.argsort(~alive, axis=1, kind='stable'), axis=1)
+        self.heads[:] = 0
+        self.lengths = alive.sum(axis=1)
+
+    def expireDebuffByDamageType(self, damageType: DamageType):
+        '''
+        移除一种元素异常中在当前时刻之前到期的元素异常
+        只检查缓冲区开头，适用于同种元素异常的持续时间都相同、按触发顺序到期的情况，
+        不满足时使用tick
+        '''
+        index = damageType.value
+        width = self.expireTimes.shape[1]
+        head = int(self.heads[index])
+        length = int(self.lengths[index])
+        while length > 0 and self.expireTimes[index, head] <= self.time:
+            head = (head + 1) % width
+            length -= 1
+        self.heads[index] = head
+        self.lengths[index] = length
+
+    def getConstantDebuffByDamageType(self, damageType: DamageType) -> int:
+        '''
+        获取指定伤害类型的常驻元素异常数量
+        '''
+        return int(self.constantCounts[damageType.value])
+
+    def getCountLimits(self) -> tuple[list[int], list[int]]:
+        '''
+        获取每种伤害类型的常驻数量和层数上限，用于批量计算
+        层数上限为0表示该元素异常不计层数
+        '''
+        return self.constantCounts.tolist(), np.maximum(self.maxCounts, 0).tolist()
 
     def getDebuffByPropertyType(self, propertyType: WeaponPropertyType) -> int:
         '''
-        获取指定属性类型的元素异常队列
+        获取指定属性类型的元素异常层数
         '''
         damageType = propertyType.toDamageType()
-        return self.elementDebuff[damageType.value].getCount()
-    
-    def getDebuffByDamageType(self, damageType: DamageType):
+        return self.getDebuffByDamageType(damageType)
+
+    def canGrowByDamageType(self, damageType: DamageType) -> bool:
+        '''
+        再触发一次指定伤害类型的元素异常是否会使其层数增加
+        '''
+        if damageType == DamageType.Physics:
+            return False
+        return self.getDebuffByDamageType(damageType) < max(int(self.maxCounts[damageType.value]), 0)
+
+    def getDebuffByDamageType(self, damageType: DamageType) -> int:
         '''
-        获取指定伤害类型的元素异常队列
+        获取指定伤害类型的元素异常层数，为常驻数量加上缓冲区中的数量，不计层数的元素异常为0
         '''
-        return self.elementDebuff[damageType.value].getCount()
\ No newline at end of file
+        index = damageType.value
+        return int(min(self.lengths[index] + self.constantCounts[index], max(self.maxCounts[index], 0)))
@@ -4,13 +4,23 @@ from .ivtproperty import *
 from .ivtweapon import *
 from .ivtdebuff import ElementDebuffState
 import numpy as np
+import bisect
 import math
 import random
 import copy
+import hashlib
+import threading
+from collections import OrderedDict
 
-CRITICAL_RNG = 0.0
-TRIGGER_RNG = 0.0
-HEADSHOT_RNG = 0.0
+# 确定性累加器的判定容差，避免浮点累加误差导致判定延后一发
+ACCUMULATOR_EPSILON = 1e-9
+# DPS计算结果缓存的默认容量
+DPS_RESULT_CACHE_SIZE = 4096
+# 影响元素复合顺序的属性类型，带有这些属性的执行卡在指纹中保留卡槽顺序
+ORDER_SENSITIVE_PROPERTY_TYPES = {WeaponPropertyType.Cold.value, WeaponPropertyType.Electric.value,
+                                  WeaponPropertyType.Fire.value, WeaponPropertyType.Poison.value,
+                                  WeaponPropertyType.ColdInAir.value, WeaponPropertyType.ElectricInAir.value,
+                                  WeaponPropertyType.FireInAir.value, WeaponPropertyType.PoisonInAir.value}
 
 class MoveState:
     '''
@@ -65,14 +75,23 @@ class TargetInfo:
     
     def addConstantElementDebuff(self, element, value: int):
         '''
-        添加不会清空的元素异常状态
+        添加不会清空的元素异常状态，计入常驻数量，计算前清除元素异常时保留
         '''
-        if isinstance(element, DamageType):
-            for _ in range(value):
-                self.elementDebuffState.addDebuffByDamageType(element, 6)
-        else:
-            for _ in range(value):
-                self.elementDebuffState.addDebuffByPropertyType(element, 6)
+        damageType = element if isinstance(element, DamageType) else element.toDamageType()
+        count = self.elementDebuffState.getConstantDebuffByDamageType(damageType) + value
+        self.elementDebuffState.setConstantDebuffByDamageType(damageType, count)
+
+    def copy(self) -> 'TargetInfo':
+        '''
+        复制靶标信息，元素异常状态使用快照复制，与原靶标互不影响
+        '''
+        targetInfo = TargetInfo.__new__(TargetInfo)
+        targetInfo.elementDebuffState = self.elementDebuffState.copy()
+        targetInfo.material = self.material
+        targetInfo.armor = self.armor
+        targetInfo.skillDebuff = dict(self.skillDebuff)
+        targetInfo.headShotRate = self.headShotRate
+        return targetInfo
 
     def addSkillDebuff(self, skillDebuff: SkillDebuff, value: int):
         '''
@@ -124,7 +143,16 @@ def ArmorDamageReduction(armor: float) -> float:
     """
     return 1 - (armor / (800 + armor))
 
-# 
+def _isArray(*values) -> bool:
+    '''
+    判断参数中是否有numpy数组
+    以下计算函数在参数均为标量时逐个计算，有数组参数时按广播规则批量计算
+    '''
+    for value in values:
+        if isinstance(value, np.ndarray):
+            return True
+    return False
+
 def WeakArmor(armor: float, radiationCount: int = 0, fireCount: int = 0, useNianSkill = False, NianSkillStrength: float = 100) -> float:
     """
     使用辐射和热波伤害削弱护甲
@@ -135,6 +163,11 @@ def WeakArmor(armor: float, radiationCount: int = 0, fireCount: int = 0, useNian
     :param NianSkillStrength: 年春秋技能强度
     :return: 削弱后的护甲值
     """
+    if _isArray(armor, radiationCount, fireCount, useNianSkill, NianSkillStrength):
+        skillWeak = np.where(useNianSkill, np.round(NianSkillStrength / 100.0 * 0.6 * 100) / 100.0, 0)
+        fireWeak = np.where(np.asarray(fireCount) > 0, 0.5, 0)
+        radiationWeak = np.where(np.asarray(radiationCount) > 0, np.minimum(0.16 + (np.asarray(radiationCount) - 1) * 0.06, 0.7), 0)
+        return np.maximum(armor * (1 - skillWeak) * (1 - fireWeak) * (1 - radiationWeak), 0)
     skillWeak = 0
     if useNianSkill:
         skillWeak = NianSkillStrength / 100.0 * 0.6     # 年春秋技能削弱护甲60%, 取决于技能强度
@@ -155,6 +188,15 @@ def GetCriticalMultiplier(criticalChance: float, criticalDamage: float, coldDebu
     :param coldDebuff: 冰冻异常状态层数
     :return: (未暴击伤害倍率，暴击伤害倍率）
     '''
+    if _isArray(criticalChance, criticalDamage, coldDebuff):
+        coldDebuff = np.asarray(coldDebuff)
+        coldCriticalDamage = np.where(coldDebuff > 0, 0.1 + (coldDebuff - 1) * 0.05, 0)
+        levelDamage = criticalDamage + coldCriticalDamage
+        lowerCriticalLevel = np.floor(criticalChance)
+        uncriticalMultiplier = np.where(criticalChance <= 1.0, 1.0, lowerCriticalLevel * levelDamage)
+        criticalMultiplier = np.where(criticalChance <= 1.0, levelDamage, (lowerCriticalLevel + 1) * levelDamage)
+        criticalMultiplier = np.where(criticalChance <= 0, 1.0, criticalMultiplier)
+        return uncriticalMultiplier, criticalMultiplier
     coldCriticalDamage = 0
     if coldDebuff > 0:
         coldCriticalDamage = 0.1 + (coldDebuff - 1) * 0.05  # 冰冻debuff增加敌人受到的暴击伤害10%，每层叠加冰冻敌人受到的暴击伤害额外增加5%
@@ -184,13 +226,86 @@ def VulnerableVirusMultiplier(virusDebuff: int) -> float:
     :param ctx: 当前环境上下文
     :return: 易伤病毒倍率
     """
+    if _isArray(virusDebuff):
+        return np.where(virusDebuff > 0, 1.75 + 0.25 * virusDebuff, 1.0)
     if virusDebuff > 0:
         return 1.75 + 0.25 * virusDebuff  # 易伤病毒倍率为2，每层叠加病毒额外增加0.25
     return 1.0
 
-def TriggerElementDebuff(damage : np.ndarray) -> DamageType:
+def GetDoTMultiplier(damageType: DamageType) -> float:
+    '''
+    获取元素异常的持续伤害倍率
+    :param damageType: 元素异常的伤害类型
+    :return: 持续伤害总量相对于面板伤害的倍率
+    '''
+    if damageType == DamageType.Fire or damageType == DamageType.Electric or damageType == DamageType.Gas:
+        # 热波、赛能、毒气元素异常的持续伤害倍率为 0.5，持续6秒
+        return 0.5
+    elif damageType == DamageType.Cracking:
+        # 裂化的伤害倍率为 0.35，持续6秒
+        return 0.35
+    return 0.0
+
+def DeterministicHits(rate, count: int) -> np.ndarray:
+    '''
+    计算确定性累加器在连续count次判定中的命中情况
+    每次判定累加rate，累计值达到1时命中并扣除，与逐发计算中的累加器规则一致
+    :param rate: 每次判定的几率，可以是形状为(N,)的数组
+    :param count: 判定次数
+    :return: 形状为rate.shape + (count,)的数组，命中为1，否则为0
+    '''
+    accumulated = np.floor(np.multiply.outer(np.asarray(rate, dtype=np.float64), np.arange(max(count, 0) + 1)) + ACCUMULATOR_EPSILON)
+    return np.clip(np.diff(accumulated, axis=-1), 0, 1).astype(np.int64)
+
+class DamageRollState:
+    '''
+    一次DPS计算中逐发判定使用的状态
+    包括暴击、触发和弱点命中的确定性累加器，以及抽取元素异常的随机数生成器。
+    每次计算创建新的状态并沿计算过程传递，不使用模块全局变量和random模块的全局随机数，
+    因此多个计算可以在不同线程中同时进行，相同种子的结果总是相同
+    '''
+    def __init__(self, seed: int = 0):
+        self.criticalAccumulator = 0.0
+        self.triggerAccumulator = 0.0
+        self.headShotAccumulator = 0.0
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def _accumulate(accumulator: float, rate: float) -> tuple[float, bool]:
+        '''
+        累加一次判定几率，累计值达到1时命中并扣除整数部分
+        :return: (新的累计值, 是否命中)
+        '''
+        accumulator += rate
+        if accumulator >= 1.0 - ACCUMULATOR_EPSILON:
+            return accumulator - math.floor(accumulator + ACCUMULATOR_EPSILON), True
+        return accumulator, False
+
+    def rollCritical(self, criticalChance: float) -> bool:
+        '''
+        判定一次暴击
+        '''
+        self.criticalAccumulator, hit = self._accumulate(self.criticalAccumulator, criticalChance)
+        return hit
+
+    def rollTrigger(self, triggerChance: float) -> bool:
+        '''
+        判定一次触发
+        '''
+        self.triggerAccumulator, hit = self._accumulate(self.triggerAccumulator, triggerChance)
+        return hit
+
+    def rollHeadShot(self, headShotRate: float) -> bool:
+        '''
+        判定一次弱点命中
+        '''
+        self.headShotAccumulator, hit = self._accumulate(self.headShotAccumulator, headShotRate)
+        return hit
+
+def TriggerElementDebuff(damage : np.ndarray, rng: random.Random) -> DamageType:
     '''
     根据元素在伤害中的占比触发元素异常
+    :param rng: 抽取元素异常使用的随机数生成器
     '''
     dmg = damage.copy()
     # 动能伤害不参与异常触发
@@ -209,7 +324,7 @@ def TriggerElementDebuff(damage : np.ndarray) -> DamageType:
     cumulative_probs = np.cumsum(probabilities)
     
     # 生成随机数并使用searchsorted快速查找
-    currentRandom = random.random()
+    currentRandom = rng.random()
     index = np.searchsorted(cumulative_probs, currentRandom, side='right')
     
     # 转换回DamageType
@@ -248,50 +363,55 @@ class DPSRequest:
         newRequest.moveState = other.moveState
         newRequest.cardSetInfo = other.cardSetInfo
         newRequest.characterInfo = other.characterInfo
-        newRequest.targetInfo = copy.deepcopy(other.targetInfo)
+        newRequest.targetInfo = other.targetInfo.copy()
         return newRequest
 
-    def calculate(self):
+    def createFinalSnapshot(self) -> WeaponPropertySnapshot:
         '''
-        执行DPS计算
+        根据武器、执行卡和角色状态创建最终属性快照
         '''
-        # 先获取执行卡的所有属性加成
-        allPropertiesFromCards = []
-        for card in self.cards:
-            if card is not None and isinstance(card, WeaponCardWithProperty):
-                allPropertiesFromCards.extend(card.getProperties())
-        # 将空中才生效的属性视情况合并或剔除
-        if not self.moveState.isInAir:
-            allPropertiesFromCards = [prop for prop in allPropertiesFromCards if not prop.propertyType.isAirProperty()]
-        else:
-            for prop in allPropertiesFromCards:
-                prop.convertToNotAirProperty()
-        # 再获取武器的所有基础属性
-        allPropertiesFromWeapon = []
-        baseSnapshot = self.weapon.getBaseSnapshot()
-        for weaponProperty in WeaponPropertyType:
-            propValue = baseSnapshot.getPropertyValue(weaponProperty)
-            if propValue != 0:
-                allPropertiesFromWeapon.append(WeaponProperty.createBaseProperty(weaponProperty, propValue))
-        # 创建最终属性快照
-        finalSnapshot = WeaponPropertySnapshot(weaponProperties=allPropertiesFromWeapon,
-                                               cardProperties=allPropertiesFromCards)
+        finalSnapshot = WeaponPropertySnapshot.fromPackedProperties(self.weapon.getBasePropertyArray(), self.getPackedCardProperties())
         # 需要判断是否应该进行鬼卡的动能转换
+        ghostCardCount = self.getGhostCardCount()
+        if ghostCardCount > 0:
+            finalSnapshot.applyGhostCardConversion(ghostCardCount)
+        return finalSnapshot
+
+    def getPackedCardProperties(self) -> np.ndarray:
+        '''
+        获取所有执行卡打包后的属性，空中才生效的属性已视情况合并或剔除
+        '''
+        packedProperties = [card.getPackedProperties() for card in self.cards if card is not None and isinstance(card, WeaponCardWithProperty)]
+        packedProperties = np.concatenate(packedProperties) if packedProperties else np.zeros((0, 3))
+        return convertPackedAirProperties(packedProperties, self.moveState.isInAir)
+
+    def getGhostCardCount(self) -> int:
+        '''
+        获取参与动能转换的鬼卡数量，包括套装设置和装备的魈鬼系列执行卡
+        '''
         ghostCardCount = self.cardSetInfo.getCardSetCount(CardSet.Ghost)
         for card in self.cards:
             if isinstance(card, WeaponCardCommon) and card.cardSet == CardSet.Ghost:
                 ghostCardCount += 1
-        if ghostCardCount > 0:
-            finalSnapshot.applyGhostCardConversion(ghostCardCount)
+        return ghostCardCount
+
+    def getEquivalentMagazine(self) -> int:
+        '''
+        获取无弹药限制武器在计算时的等效弹匣容量
+        '''
+        if self.context is not None:
+            return self.context.getSubWeaponTypeMagazine(self.weapon.subWeaponType)
+        return SubWeaponTypeToMagazine.get(self.weapon.subWeaponType, 30)
+
+    def calculate(self, analytic: bool = True):
+        '''
+        执行DPS计算
+        :param analytic: 是否以解析方式计算弹匣伤害，为False时逐发模拟整个弹匣
+        '''
+        finalSnapshot = self.createFinalSnapshot()
         # 获取面板伤害
         weaponDamage = finalSnapshot.getTotalDamageArray()
         self.damageOnGui = weaponDamage.sum()
-        # 初始化随机数
-        global CRITICAL_RNG, TRIGGER_RNG, HEADSHOT_RNG
-        CRITICAL_RNG = 0.0
-        TRIGGER_RNG = 0.0
-        HEADSHOT_RNG = 0.0
-        random.seed(0)
         # 清除元素异常
         self.targetInfo.elementDebuffState.clearDebuff()
         # 初始化造成的伤害
@@ -305,7 +425,7 @@ class DPSRequest:
         # 机枪等效为100
         # 其他等效为30
         if magazine < 0:
-            magazine = self.context.getSubWeaponTypeMagazine(self.weapon.subWeaponType)
+            magazine = self.getEquivalentMagazine()
         multiStrike = finalSnapshot.getPropertyValue(WeaponPropertyType.MultiStrike)
         # 兼容近战，至少造成一次伤害
         if multiStrike <= 0:
@@ -324,18 +444,34 @@ class DPSRequest:
         triggerChance = finalSnapshot.getPropertyValue(WeaponPropertyType.TriggerChance) / 100.0
         # 计算爆头伤害加成
         headShot = finalSnapshot.getPropertyValue(WeaponPropertyType.Headshot) / 100.0
-        for _ in range(totalShots):
-            damageTaken += self._calculateDmageOnce(weaponDamage,
-                                                    externalDamageMultiplier=externalDamageMultiplier,
-                                                    criticalChance=criticalChance,
-                                                    criticalDamage=criticalDamage,
-                                                    triggerChance=triggerChance,
-                                                    headShot=headShot,
-                                                    criticalFlag=0,
-                                                    triggerFlag=0,
-                                                    headShotFlag=0)
-        
-        random.seed(0)
+        if analytic:
+            damageTaken = self._calculateMagazineAnalytic(weaponDamage,
+                                                          totalShots=totalShots,
+                                                          externalDamageMultiplier=externalDamageMultiplier,
+                                                          criticalChance=criticalChance,
+                                                          criticalDamage=criticalDamage,
+                                                          triggerChance=triggerChance,
+                                                          headShot=headShot)
+        else:
+            # 弹匣内材质减伤后的伤害不变，单发倍率只在敌人状态变化时重新计算
+            materialDamage = DamageTakenByMaterial(weaponDamage, self.targetInfo.material).sum()
+            modifierCache = {}
+            # 初始化判定状态
+            rollState = DamageRollState()
+            for _ in range(totalShots):
+                damageTaken += self._calculateDmageOnce(weaponDamage,
+                                                        externalDamageMultiplier=externalDamageMultiplier,
+                                                        criticalChance=criticalChance,
+                                                        criticalDamage=criticalDamage,
+                                                        triggerChance=triggerChance,
+                                                        headShot=headShot,
+                                                        criticalFlag=0,
+                                                        triggerFlag=0,
+                                                        headShotFlag=0,
+                                                        rollState=rollState,
+                                                        modifierCache=modifierCache,
+                                                        materialDamage=materialDamage)
+
         self.targetInfo.elementDebuffState.clearDebuff()
         # 计算首发暴击伤害和非暴击伤害
         self.firstCriticalDamage = self._calculateDmageOnce(weaponDamage,
@@ -347,7 +483,6 @@ class DPSRequest:
                                                             criticalFlag=1,
                                                             triggerFlag=-1,
                                                             headShotFlag=-1)
-        random.seed(0)
         self.targetInfo.elementDebuffState.clearDebuff()
         self.firstUncriticalDamage = self._calculateDmageOnce(weaponDamage,
                                                             externalDamageMultiplier=externalDamageMultiplier,
@@ -357,7 +492,6 @@ class DPSRequest:
                                                             criticalFlag=-1,
                                                             triggerFlag=-1,
                                                             headShotFlag=-1)
-        random.seed(0)
         self.targetInfo.elementDebuffState.clearDebuff()
         self.firstCriticalDamageHeadshot = self._calculateDmageOnce(weaponDamage,
                                                             externalDamageMultiplier=externalDamageMultiplier,
@@ -368,7 +502,6 @@ class DPSRequest:
                                                             criticalFlag=1,
                                                             triggerFlag=-1,
                                                             headShotFlag=1)
-        random.seed(0)
         self.targetInfo.elementDebuffState.clearDebuff()
         self.firstUncriticalDamageHeadshot = self._calculateDmageOnce(weaponDamage,
                                                             externalDamageMultiplier=externalDamageMultiplier,
@@ -388,33 +521,210 @@ class DPSRequest:
         self.averageDps = self.magazineDamage / (magazine / attackSpeed + reloadTime)
         self.finalSnapshot = finalSnapshot
 
-    def _calculateDmageOnce(self, weaponDamage: np.ndarray, externalDamageMultiplier: float = 1.0, 
-                            criticalChance: float = 0.0, criticalDamage: float = 0.0, triggerChance: float = 0.0,
-                            headShot : float = 0.0, criticalFlag: int = 0, triggerFlag: int = 0, headShotFlag: int = 0) -> float:
+    def simulateCombat(self, fightDuration: float = None) -> 'CombatResult':
         '''
-        计算单次伤害
+        按时间推进模拟一场持续多个弹匣的战斗，见CombatSimulator
+        与averageDps不同，结果计入元素异常的到期和持续伤害的逐跳结算
+        :param fightDuration: 战斗时长，单位为秒，为None时使用默认时长
+        '''
+        from .ivtsimulation import CombatSimulator, DEFAULT_FIGHT_DURATION
+        return CombatSimulator(self, DEFAULT_FIGHT_DURATION if fightDuration is None else fightDuration).run()
+
+    def simulateMonteCarlo(self, trialCount: int = None, seed: int = 0) -> 'MonteCarloResult':
+        '''
+        以随机判定模拟大量独立的弹匣，得到弹匣伤害和击杀时间的分布，见MonteCarloSimulator
+        :param trialCount: 模拟的弹匣数量，为None时使用默认次数
+        :param seed: 随机数种子
+        '''
+        from .ivtsimulation import MonteCarloSimulator, DEFAULT_TRIAL_COUNT
+        return MonteCarloSimulator(self, DEFAULT_TRIAL_COUNT if trialCount is None else trialCount, seed).run()
+
+    def getMetricValue(self, metric: DPSMetric) -> float:
+        '''
+        获取计算结果中指定评价指标的值，需要先执行calculate
+        单发期望伤害按暴击率对首发暴击和非暴击伤害加权
+        '''
+        if metric == DPSMetric.FirstShotExpectation:
+            criticalChance = self.finalSnapshot.getPropertyValue(WeaponPropertyType.CriticalChance) / 100.0
+            return self.firstCriticalDamage * criticalChance + self.firstUncriticalDamage * (1 - criticalChance)
+        elif metric == DPSMetric.MagazineDamage:
+            return self.magazineDamage
+        elif metric == DPSMetric.MagazineDps:
+            return self.magazineDps
+        else:
+            return self.averageDps
+
+    def getFingerprint(self, analytic: bool = True) -> str:
+        '''
+        获取由计算输入内容生成的指纹，输入相同的请求指纹相同
+        执行卡以名称、套装和属性内容标识，会影响元素复合的执行卡保留卡槽顺序，其余执行卡不计顺序
+        '''
+        orderedCards, unorderedCards = [], []
+        for card in self.cards:
+            if card is None or not isinstance(card, WeaponCardWithProperty):
+                continue
+            packed = card.getPackedProperties()
+            cardSet = card.cardSet.value if isinstance(card, WeaponCardCommon) else -1
+            cardKey = (card.name, cardSet, packed.tobytes())
+            if not ORDER_SENSITIVE_PROPERTY_TYPES.isdisjoint(packed[:, PACKED_TYPE].tolist()):
+                orderedCards.append(cardKey)
+            else:
+                unorderedCards.append(cardKey)
+        targetInfo = self.targetInfo
+        constantCounts, _ = targetInfo.elementDebuffState.getCountLimits()
+        content = (
+            self.weapon.name, self.weapon.getBasePropertyArray().tobytes(),
+            tuple(orderedCards), tuple(sorted(unorderedCards)),
+            self.moveState.isMoving, self.moveState.isInAir,
+            tuple(self.cardSetInfo.cardSetCount), tuple(self.characterInfo.characterProperties),
+            targetInfo.material.value, targetInfo.armor, targetInfo.headShotRate,
+            tuple(sorted((skillDebuff.value, count) for skillDebuff, count in targetInfo.skillDebuff.items())),
+            tuple(constantCounts), self.getEquivalentMagazine(), analytic,
+        )
+        return hashlib.sha1(repr(content).encode('utf-8')).hexdigest()
+
+    def getResult(self) -> dict:
+        '''
+        获取计算结果，需要先执行calculate
+        '''
+        return {field: getattr(self, field) for field in DPS_RESULT_FIELDS}
+
+    def setResult(self, result: dict):
+        '''
+        直接设置计算结果，结果中的最终属性快照可能与其他请求共用，不能修改
+        '''
+        for field in DPS_RESULT_FIELDS:
+            setattr(self, field, result[field])
+
+    def calculateWithCache(self, cache: 'DPSResultCache', analytic: bool = True):
+        '''
+        执行DPS计算，指纹相同的请求已经计算过时直接使用缓存的结果
+        '''
+        fingerprint = self.getFingerprint(analytic)
+        result = cache.get(fingerprint)
+        if result is None:
+            self.calculate(analytic)
+            cache.put(fingerprint, self.getResult())
+        else:
+            self.setResult(result)
+
+    def _calculateMagazineAnalytic(self, weaponDamage: np.ndarray, totalShots: int, externalDamageMultiplier: float = 1.0,
+                                   criticalChance: float = 0.0, criticalDamage: float = 0.0, triggerChance: float = 0.0,
+                                   headShot: float = 0.0) -> float:
+        '''
+        以解析方式计算一个弹匣造成的总伤害，结果与逐发计算一致
+        暴击、触发和弱点命中都是确定性累加器，每一发的判定结果可以直接求出；
+        敌人状态只在触发元素异常时改变，且层数有上限，
+        因此只需按敌人状态将弹匣分段求和，状态饱和后剩余的触发只累加持续伤害
         :param weaponDamage: 武器伤害数组
+        :param totalShots: 弹匣内实际造成伤害的次数
         :param externalDamageMultiplier: 外部伤害加成倍率
         :param criticalChance: 暴击几率
         :param criticalDamage: 暴击伤害
         :param triggerChance: 触发几率
         :param headShot: 爆头伤害加成
-        :param criticalFlag: 暴击标志，-1表示强行不暴击，1表示强行暴击，0表示随机判定
-        :param triggerFlag: 触发标志，-1表示强行不触发，1表示强行触发，0表示随机判定
-        :param headShotFlag: 爆头标志，-1表示强行不爆头，1表示强行爆头，0表示随机判定
-        :return: 计算后的伤害值
+        :return: 弹匣总伤害
+        '''
+        elementDebuffState = self.targetInfo.elementDebuffState
+        elementDebuffState.clearDebuff()
+        # 求出每一发的暴击、弱点命中判定，以及触发元素异常的发数
+        criticalFlags = DeterministicHits(criticalChance, totalShots)
+        headShotFlags = DeterministicHits(self.targetInfo.headShotRate, totalShots)
+        triggerShots = np.flatnonzero(DeterministicHits(triggerChance, totalShots))
+        # 前缀和，用于快速求出任意区间内的判定次数
+        criticalPrefix = np.concatenate(([0], np.cumsum(criticalFlags)))
+        headShotPrefix = np.concatenate(([0], np.cumsum(headShotFlags)))
+        bothPrefix = np.concatenate(([0], np.cumsum(criticalFlags & headShotFlags)))
+        # 与敌人状态无关的部分
+        materialDamage = DamageTakenByMaterial(weaponDamage, self.targetInfo.material).sum()
+        dotBaseDamage = weaponDamage.sum() * externalDamageMultiplier
+
+        def _segmentDamage(start: int, end: int, modifiers: tuple) -> float:
+            uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier = modifiers
+            shots = end - start
+            criticalCount = criticalPrefix[end] - criticalPrefix[start]
+            headShotCount = headShotPrefix[end] - headShotPrefix[start]
+            bothCount = bothPrefix[end] - bothPrefix[start]
+            multiplier = uncriticalMultiplier * (shots - criticalCount) + criticalMultiplier * criticalCount
+            multiplier += headShot * (uncriticalMultiplier * (headShotCount - bothCount) + criticalMultiplier * bothCount)
+            return materialDamage * armorReduction * vulnerableVirusMultiplier * multiplier * externalDamageMultiplier
+
+        # 元素异常的抽取规则与TriggerElementDebuff一致，并使用相同的随机数序列
+        dmg = weaponDamage.copy()
+        dmg[WeaponPropertyType.Physics.value] = 0.0
+        totalElementDamage = dmg.sum()
+        elementDamage = dmg[WeaponPropertyType.Cold.value:WeaponPropertyType.Virus.value + 1]
+        elementTypes = []
+        cumulativeProbs = []
+        if totalElementDamage != 0:
+            elementTypes = [DamageType(i + WeaponPropertyType.Cold.value) for i in range(len(elementDamage)) if elementDamage[i] > 0]
+            cumulativeProbs = np.cumsum(elementDamage / totalElementDamage).tolist()
+        rng = random.Random(0)
+
+        def _drawElement() -> DamageType:
+            index = bisect.bisect_right(cumulativeProbs, rng.random())
+            return DamageType(min(index, len(cumulativeProbs) - 1) + WeaponPropertyType.Cold.value)
+
+        damageTaken = 0.0
+        modifierCache = {}
+        modifiers = self._getShotModifiers(criticalChance=criticalChance, criticalDamage=criticalDamage, cache=modifierCache)
+        segmentStart = 0
+        triggerIndex = 0
+        triggerCount = len(triggerShots) if elementTypes else 0
+        # 逐个处理触发，直到所有可能触发的元素异常都无法再叠加
+        while triggerIndex < triggerCount and any(elementDebuffState.canGrowByDamageType(t) for t in elementTypes):
+            shot = int(triggerShots[triggerIndex])
+            debuffProperty = _drawElement()
+            damageTaken += dotBaseDamage * GetDoTMultiplier(debuffProperty) * modifiers[2] * modifiers[3]
+            elementDebuffState.addDebuffByDamageType(debuffProperty, 6)
+            newModifiers = self._getShotModifiers(criticalChance=criticalChance, criticalDamage=criticalDamage, cache=modifierCache)
+            if newModifiers != modifiers:
+                damageTaken += _segmentDamage(segmentStart, shot + 1, modifiers)
+                segmentStart = shot + 1
+                modifiers = newModifiers
+            triggerIndex += 1
+        # 敌人状态已经饱和，剩余的触发只造成持续伤害
+        remainingTriggers = triggerCount - triggerIndex
+        if remainingTriggers > 0:
+            if len(elementTypes) == 1:
+                dotMultiplier = remainingTriggers * GetDoTMultiplier(elementTypes[0])
+            else:
+                dotMultiplier = sum(GetDoTMultiplier(_drawElement()) for _ in range(remainingTriggers))
+            damageTaken += dotBaseDamage * dotMultiplier * modifiers[2] * modifiers[3]
+        damageTaken += _segmentDamage(segmentStart, totalShots, modifiers)
+        return damageTaken
+
+    def _getShotModifiers(self, criticalChance: float = 0.0, criticalDamage: float = 0.0,
+                          elementDebuffState: ElementDebuffState = None, cache: dict = None) -> tuple:
+        '''
+        根据敌人当前的异常状态计算单发伤害的各项倍率
+        :param criticalChance: 暴击几率
+        :param criticalDamage: 暴击伤害
+        :param elementDebuffState: 敌人的元素异常状态，为None时使用靶标信息中的状态
+        :param cache: 按冰冻、热波、辐射和病毒层数缓存倍率的字典，只能在暴击几率和暴击伤害不变的同一次计算中共用
+        :return: (未暴击伤害倍率, 暴击伤害倍率, 护甲减伤倍率, 易伤病毒倍率)
         '''
+        if elementDebuffState is None:
+            elementDebuffState = self.targetInfo.elementDebuffState
+        coldDebuff = elementDebuffState.getDebuffByDamageType(DamageType.Cold)
+        fireDebuff = elementDebuffState.getDebuffByDamageType(DamageType.Fire)
+        radiationDebuff = elementDebuffState.getDebuffByDamageType(DamageType.Radiation)
+        virusDebuff = elementDebuffState.getDebuffByDamageType(DamageType.Virus)
+        if cache is not None:
+            key = (coldDebuff, fireDebuff, radiationDebuff, virusDebuff)
+            modifiers = cache.get(key)
+            if modifiers is None:
+                modifiers = self._getShotModifiers(criticalChance=criticalChance, criticalDamage=criticalDamage,
+                                                   elementDebuffState=elementDebuffState)
+                cache[key] = modifiers
+            return modifiers
         # 计算暴击倍率
         uncriticalMultiplier, criticalMultiplier = GetCriticalMultiplier(
             criticalChance=criticalChance,
             criticalDamage=criticalDamage,
-            coldDebuff=self.targetInfo.elementDebuffState.getDebuffByDamageType(DamageType.Cold)
+            coldDebuff=coldDebuff
         )
-        # 计算减伤
-        damageAfterReduction = DamageTakenByMaterial(weaponDamage, self.targetInfo.material).sum()
         # 计算护甲减伤
-        fireDebuff = self.targetInfo.elementDebuffState.getDebuffByDamageType(DamageType.Fire)
-        radiationDebuff = self.targetInfo.elementDebuffState.getDebuffByDamageType(DamageType.Radiation)
         useNianSkill = self.targetInfo.getSkillDebuff(SkillDebuff.Qianyinfeidan) > 0
         realArmor = WeakArmor(
             armor=self.targetInfo.armor,
@@ -424,65 +734,383 @@ class DPSRequest:
             NianSkillStrength=self.characterInfo.getCharacterProperty(CharacterPropertyType.SkillStrength)
         )
         armorReduction = ArmorDamageReduction(realArmor)
-        damageAfterReduction *= armorReduction
         # 计算易伤病毒倍率
         vulnerableVirusMultiplier = VulnerableVirusMultiplier(
-            virusDebuff=self.targetInfo.elementDebuffState.getDebuffByDamageType(DamageType.Virus)
+            virusDebuff=virusDebuff
         )
+        return uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier
+
+    def _calculateDmageOnce(self, weaponDamage: np.ndarray, externalDamageMultiplier: float = 1.0, 
+                            criticalChance: float = 0.0, criticalDamage: float = 0.0, triggerChance: float = 0.0,
+                            headShot : float = 0.0, criticalFlag: int = 0, triggerFlag: int = 0, headShotFlag: int = 0,
+                            rollState: DamageRollState = None, modifierCache: dict = None, materialDamage: float = None) -> float:
+        '''
+        计算单次伤害
+        :param weaponDamage: 武器伤害数组
+        :param externalDamageMultiplier: 外部伤害加成倍率
+        :param criticalChance: 暴击几率
+        :param criticalDamage: 暴击伤害
+        :param triggerChance: 触发几率
+        :param headShot: 爆头伤害加成
+        :param criticalFlag: 暴击标志，-1表示强行不暴击，1表示强行暴击，0表示随机判定
+        :param triggerFlag: 触发标志，-1表示强行不触发，1表示强行触发，0表示随机判定
+        :param headShotFlag: 爆头标志，-1表示强行不爆头，1表示强行爆头，0表示随机判定
+        :param rollState: 判定状态，为None时使用新的状态
+        :param modifierCache: 按敌人状态缓存单发倍率的字典，见_getShotModifiers
+        :param materialDamage: 预先计算的材质减伤后伤害，为None时根据武器伤害计算
+        :return: 计算后的伤害值
+        '''
+        if rollState is None:
+            rollState = DamageRollState()
+        # 根据敌人当前状态计算暴击倍率、护甲减伤和易伤病毒倍率
+        uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier = self._getShotModifiers(
+            criticalChance=criticalChance,
+            criticalDamage=criticalDamage,
+            cache=modifierCache
+        )
+        # 计算减伤
+        if materialDamage is None:
+            materialDamage = DamageTakenByMaterial(weaponDamage, self.targetInfo.material).sum()
+        damageAfterReduction = materialDamage
+        # 计算护甲减伤
+        damageAfterReduction *= armorReduction
+        # 计算易伤病毒倍率
         damageAfterReduction *= vulnerableVirusMultiplier
         # 计算是否暴击
-        global CRITICAL_RNG
         if criticalFlag == 1:
             damageAfterReduction *= criticalMultiplier
         elif criticalFlag == -1:
             damageAfterReduction *= uncriticalMultiplier
+        elif rollState.rollCritical(criticalChance):
+            damageAfterReduction *= criticalMultiplier
         else:
-            CRITICAL_RNG += criticalChance
-            if CRITICAL_RNG >= 1.0:
-                damageAfterReduction *= criticalMultiplier
-                CRITICAL_RNG = math.fmod(CRITICAL_RNG, 1.0)
-            else:
-                damageAfterReduction *= uncriticalMultiplier
+            damageAfterReduction *= uncriticalMultiplier
         # 计算是否爆头
-        global HEADSHOT_RNG
         if headShotFlag == 1:
             damageAfterReduction *= (1 + headShot)
-        elif headShotFlag == -1:
-            pass
-        else:
-            HEADSHOT_RNG += self.targetInfo.headShotRate
-            if HEADSHOT_RNG >= 1.0:
-                damageAfterReduction *= (1 + headShot)
-                HEADSHOT_RNG = math.fmod(HEADSHOT_RNG, 1.0)        
+        elif headShotFlag == 0 and rollState.rollHeadShot(self.targetInfo.headShotRate):
+            damageAfterReduction *= (1 + headShot)
         # 计算外部伤害加成
         damageAfterReduction *= externalDamageMultiplier
         # 计算触发和持续伤害
         dotDamageTaken = 0.0
-        global TRIGGER_RNG
         isTrigger = False
         if triggerFlag == 1:
             isTrigger = True
         elif triggerFlag == -1:
             isTrigger = False
         else:
-            TRIGGER_RNG += triggerChance
-            if TRIGGER_RNG >= 1.0:
-                isTrigger = True
-                TRIGGER_RNG = math.fmod(TRIGGER_RNG, 1.0)
+            isTrigger = rollState.rollTrigger(triggerChance)
         if isTrigger:
-            debuffProperty = TriggerElementDebuff(weaponDamage)
+            debuffProperty = TriggerElementDebuff(weaponDamage, rollState.random)
             if debuffProperty is not None and debuffProperty != DamageType.Physics:
                 self.targetInfo.elementDebuffState.addDebuffByDamageType(debuffProperty, 6)
                 # 如果是伤害类的Debuff，则其持续伤害总量计入到damageTaken中
-                DoTMultiplier = 0.0
-                if debuffProperty == DamageType.Fire or debuffProperty == DamageType.Electric or debuffProperty == DamageType.Gas:
-                    # 热波、赛能、毒气元素异常的持续伤害倍率为 0.5，持续6秒
-                    DoTMultiplier = 0.5
-                elif debuffProperty == DamageType.Cracking:
-                    # 裂化的伤害倍率为 0.35，持续6秒
-                    DoTMultiplier = 0.35
+                DoTMultiplier = GetDoTMultiplier(debuffProperty)
                 if DoTMultiplier > 0:
                     DoTDamage = weaponDamage.sum() * externalDamageMultiplier * DoTMultiplier
                     dotDamageTaken += DoTDamage * armorReduction * vulnerableVirusMultiplier
         # 返回总伤害
-        return damageAfterReduction + dotDamageTaken
\ No newline at end of file
+        return damageAfterReduction + dotDamageTaken
+
+# DPSRequest.calculate的计算结果字段
+DPS_RESULT_FIELDS = (
+    'damageOnGui',
+    'firstCriticalDamage',
+    'firstUncriticalDamage',
+    'firstCriticalDamageHeadshot',
+    'firstUncriticalDamageHeadshot',
+    'magazineDps',
+    'magazineDamage',
+    'averageDps',
+    'finalSnapshot',
+)
+
+class DPSResultCache:
+    '''
+    以请求指纹为键的DPS计算结果缓存，超过容量时淘汰最久未使用的结果
+    可以在多个线程中同时使用
+    '''
+    def __init__(self, maxSize: int = DPS_RESULT_CACHE_SIZE):
+        self.maxSize = maxSize
+        self.hits = 0       # 命中次数
+        self.misses = 0     # 未命中次数
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str) -> dict | None:
+        '''
+        获取缓存的计算结果，不存在时返回None
+        '''
+        with self._lock:
+            result = self._results.get(fingerprint)
+            if result is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(fingerprint)
+            self.hits += 1
+            return result
+
+    def put(self, fingerprint: str, result: dict):
+        '''
+        缓存计算结果
+        '''
+        with self._lock:
+            self._results[fingerprint] = result
+            self._results.move_to_end(fingerprint)
+            while len(self._results) > self.maxSize:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        '''
+        清空缓存的计算结果，命中统计保留
+        '''
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+class DPSBatch:
+    '''
+    批量DPS计算请求
+    输入为N套配卡的最终属性张量，计算规则与DPSRequest一致，一次向量化计算出所有配卡的结果
+    所有配卡共用同一份靶标、角色、套装和行动状态设置
+    '''
+    def __init__(self, properties: np.ndarray, targetInfo: TargetInfo = None, characterInfo: CharacterInfo = None,
+                 cardSetInfo: CardSetInfo = None, moveState: MoveState = None, equivalentMagazine=30):
+        '''
+        :param properties: 形状为(N, len(WeaponPropertyType), 2)的属性张量，即每套配卡最终属性快照的基础值和加成值
+        :param targetInfo: 靶标信息
+        :param characterInfo: 角色信息
+        :param cardSetInfo: 套装卡牌信息
+        :param moveState: 角色的行动状态
+        :param equivalentMagazine: 无弹药限制武器的等效弹匣容量，可以是标量或形状为(N,)的数组
+        '''
+        self.properties = np.asarray(properties, dtype=np.float64)
+        self.targetInfo = targetInfo if targetInfo is not None else TargetInfo()
+        self.characterInfo = characterInfo if characterInfo is not None else CharacterInfo()
+        self.cardSetInfo = cardSetInfo if cardSetInfo is not None else CardSetInfo()
+        self.moveState = moveState if moveState is not None else MoveState()
+        self.equivalentMagazine = equivalentMagazine
+        self.finalProperties = None
+        self.damageOnGui = None
+        self.firstCriticalDamage = None
+        self.firstUncriticalDamage = None
+        self.firstCriticalDamageHeadshot = None
+        self.firstUncriticalDamageHeadshot = None
+        self.magazineDamage = None
+        self.magazineDps = None
+        self.averageDps = None
+
+    @classmethod
+    def fromRequests(cls, requests: list[DPSRequest]) -> 'DPSBatch':
+        '''
+        由一组DPSRequest创建批量请求
+        靶标、角色、套装和行动状态设置取自第一个请求
+        '''
+        properties = cls.createPropertyTensor(requests)
+        equivalentMagazine = np.array([request.getEquivalentMagazine() for request in requests])
+        first = requests[0]
+        return cls(properties, targetInfo=first.targetInfo, characterInfo=first.characterInfo,
+                   cardSetInfo=first.cardSetInfo, moveState=first.moveState, equivalentMagazine=equivalentMagazine)
+
+    @staticmethod
+    def createPropertyTensor(requests: list[DPSRequest]) -> np.ndarray:
+        '''
+        批量计算一组DPSRequest的最终属性，结果与逐个调用createFinalSnapshot一致
+        :return: 形状为(N, len(WeaponPropertyType), 2)的属性张量
+        '''
+        baseDatas = np.stack([request.weapon.getBasePropertyArray() for request in requests])
+        properties = createFinalPropertyArrays(baseDatas, [request.getPackedCardProperties() for request in requests])
+        applyGhostCardConversion(properties, np.array([request.getGhostCardCount() for request in requests]))
+        return properties
+
+    def calculate(self):
+        '''
+        执行批量DPS计算
+        '''
+        finalProperties = self.properties[:, :, 0] * (1 + self.properties[:, :, 1] / 100)
+        buildCount = finalProperties.shape[0]
+        weaponDamage = finalProperties[:, :WeaponPropertyType.Virus.value + 1]
+        self.finalProperties = finalProperties
+        self.damageOnGui = weaponDamage.sum(axis=1)
+        # 计算实际发射的子弹数
+        magazine = np.floor(finalProperties[:, WeaponPropertyType.MagazineSize.value])
+        magazine = np.where(magazine < 0, self.equivalentMagazine, magazine)
+        multiStrike = finalProperties[:, WeaponPropertyType.MultiStrike.value]
+        multiStrike = np.where(multiStrike <= 0, 1.0, multiStrike)
+        totalShots = np.maximum(np.floor(magazine * multiStrike), 0).astype(np.int64)
+        # 计算外部伤害加成
+        externalDamageMultiplier = GetExternalDamageMultiplier(
+            invasionAuraNum=self.cardSetInfo.getCardSetCount(CardSet.Invasion),
+            reverseSetNum=self.cardSetInfo.getCardSetCount(CardSet.Reverse),
+            isMoving=self.moveState.isMoving
+        )
+        criticalChance = finalProperties[:, WeaponPropertyType.CriticalChance.value] / 100.0
+        criticalDamage = finalProperties[:, WeaponPropertyType.CriticalDamage.value] / 100.0
+        triggerChance = finalProperties[:, WeaponPropertyType.TriggerChance.value] / 100.0
+        headShot = finalProperties[:, WeaponPropertyType.Headshot.value] / 100.0
+
+        # 每一发的暴击、弱点命中和触发判定，形状为(N, 最大发数)
+        maxShots = int(totalShots.max()) if buildCount > 0 else 0
+        validShots = np.arange(maxShots)[None, :] < totalShots[:, None]
+        criticalFlags = DeterministicHits(criticalChance, maxShots).astype(bool)
+        headShotFlags = DeterministicHits(self.targetInfo.headShotRate, maxShots).astype(bool)
+        triggerFlags = DeterministicHits(triggerChance, maxShots) * validShots
+        triggerCount = triggerFlags.sum(axis=1)
+        # 每一发之前已经触发的次数，即该发所处的敌人状态
+        triggersBefore = np.cumsum(triggerFlags, axis=1) - triggerFlags
+
+        # 元素异常的抽取规则与TriggerElementDebuff一致，每套配卡都使用以0为种子的同一随机数序列
+        elementDamage = weaponDamage.copy()
+        elementDamage[:, WeaponPropertyType.Physics.value] = 0.0
+        totalElementDamage = elementDamage.sum(axis=1)
+        hasElement = totalElementDamage != 0
+        maxTriggers = int(triggerCount[hasElement].max()) if hasElement.any() else 0
+        rng = random.Random(0)
+        draws = np.array([rng.random() for _ in range(maxTriggers)])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cumulativeProbs = np.cumsum(elementDamage[:, WeaponPropertyType.Cold.value:] / totalElementDamage[:, None], axis=1)
+        elementIndex = np.minimum((cumulativeProbs[:, None, :] <= draws[None, :, None]).sum(axis=2), cumulativeProbs.shape[1] - 1)
+        elementType = elementIndex + WeaponPropertyType.Cold.value
+        validTriggers = (np.arange(maxTriggers)[None, :] < triggerCount[:, None]) & hasElement[:, None]
+
+        # 每次触发后影响伤害的元素异常层数，形状为(N, 最大触发次数 + 1)
+        constantCounts, maxCounts = self.targetInfo.elementDebuffState.getCountLimits()
+        def _debuffCounts(damageType: DamageType) -> np.ndarray:
+            drawn = np.zeros((buildCount, maxTriggers + 1), dtype=np.int64)
+            drawn[:, 1:] = np.cumsum(validTriggers & (elementType == damageType.value), axis=1)
+            return np.minimum(constantCounts[damageType.value] + drawn, maxCounts[damageType.value])
+
+        # 每种敌人状态下的单发倍率
+        uncriticalMultiplier, criticalMultiplier = GetCriticalMultiplier(
+            criticalChance=criticalChance[:, None],
+            criticalDamage=criticalDamage[:, None],
+            coldDebuff=_debuffCounts(DamageType.Cold)
+        )
+        realArmor = WeakArmor(
+            armor=self.targetInfo.armor,
+            radiationCount=_debuffCounts(DamageType.Radiation),
+            fireCount=_debuffCounts(DamageType.Fire),
+            useNianSkill=self.targetInfo.getSkillDebuff(SkillDebuff.Qianyinfeidan) > 0,
+            NianSkillStrength=self.characterInfo.getCharacterProperty(CharacterPropertyType.SkillStrength)
+        )
+        armorReduction = ArmorDamageReduction(realArmor)
+        vulnerableVirusMultiplier = VulnerableVirusMultiplier(_debuffCounts(DamageType.Virus))
+        materialDamage = DamageTakenByMaterial(weaponDamage, self.targetInfo.material).sum(axis=1)
+        stateDamage = materialDamage[:, None] * armorReduction * vulnerableVirusMultiplier
+
+        # 首发伤害，敌人仅有常驻元素异常
+        firstDamage = stateDamage[:, 0]
+        self.firstCriticalDamage = firstDamage * criticalMultiplier[:, 0] * externalDamageMultiplier
+        self.firstUncriticalDamage = firstDamage * uncriticalMultiplier[:, 0] * externalDamageMultiplier
+        self.firstCriticalDamageHeadshot = firstDamage * criticalMultiplier[:, 0] * (1 + headShot) * externalDamageMultiplier
+        self.firstUncriticalDamageHeadshot = firstDamage * uncriticalMultiplier[:, 0] * (1 + headShot) * externalDamageMultiplier
+
+        # 弹匣内每一发的直接伤害
+        stateIndex = np.minimum(triggersBefore, maxTriggers)
+        shotMultiplier = np.where(criticalFlags,
+                                  np.take_along_axis(criticalMultiplier, stateIndex, axis=1),
+                                  np.take_along_axis(uncriticalMultiplier, stateIndex, axis=1))
+        shotMultiplier = shotMultiplier * np.where(headShotFlags[None, :], 1 + headShot[:, None], 1.0)
+        shotDamage = np.take_along_axis(stateDamage, stateIndex, axis=1) * shotMultiplier * externalDamageMultiplier
+        damageTaken = np.where(validShots, shotDamage, 0.0).sum(axis=1)
+        # 每次触发造成的持续伤害，按触发前的敌人状态计算
+        np_DoTMultiplier = np.array([GetDoTMultiplier(damageType) for damageType in DamageType])
+        dotMultiplier = np.where(validTriggers, np_DoTMultiplier[elementType], 0.0)
+        dotDamage = dotMultiplier * armorReduction[:, :maxTriggers] * vulnerableVirusMultiplier[:, :maxTriggers]
+        damageTaken += self.damageOnGui * externalDamageMultiplier * dotDamage.sum(axis=1)
+
+        # 输出结果
+        attackSpeed = finalProperties[:, WeaponPropertyType.AttackSpeed.value]
+        reloadTime = finalProperties[:, WeaponPropertyType.ReloadTime.value]
+        self.magazineDamage = damageTaken
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.magazineDps = damageTaken * attackSpeed / magazine
+            self.averageDps = damageTaken / (magazine / attackSpeed + reloadTime)
+
+    def getMetricValue(self, metric: DPSMetric) -> np.ndarray:
+        '''
+        获取每套配卡指定评价指标的值，需要先执行calculate，规则与DPSRequest.getMetricValue一致
+        '''
+        if metric == DPSMetric.FirstShotExpectation:
+            criticalChance = self.finalProperties[:, WeaponPropertyType.CriticalChance.value] / 100.0
+            return self.firstCriticalDamage * criticalChance + self.firstUncriticalDamage * (1 - criticalChance)
+        elif metric == DPSMetric.MagazineDamage:
+            return self.magazineDamage
+        elif metric == DPSMetric.MagazineDps:
+            return self.magazineDps
+        else:
+            return self.averageDps
+
+class SlotDeltaEvaluator:
+    '''
+    单个卡槽的增量计算器，用于预览把每张候选执行卡装备到同一卡槽后的结果
+    创建时预先累加其余卡槽的非元素属性，并按卡槽顺序保存该卡槽前后的元素伤害属性，
+    之后每批候选执行卡只需要计入它们自身的属性，再批量完成元素复合和伤害计算
+    '''
+    def __init__(self, request: DPSRequest, slotIndex: int):
+        '''
+        :param request: 提供武器、其余卡槽的执行卡和所有设置的DPS请求，创建后对它的修改不影响计算器
+        :param slotIndex: 需要替换执行卡的卡槽序号
+        '''
+        self.request = DPSRequest.createNewOne(request)
+        self.slotIndex = slotIndex
+        self.request.cards[slotIndex] = None
+        baseArray = self.request.weapon.getBasePropertyArray()
+        self._baseDamage = np.sum(baseArray[:WeaponPropertyType.Virus.value + 1, 0] * (1 + baseArray[:WeaponPropertyType.Virus.value + 1, 1] / 100))
+        # 其余卡槽的非元素属性之和
+        self._partialDatas = baseArray.copy()
+        prefixElements, suffixElements = [], []
+        for i, card in enumerate(self.request.cards):
+            if card is None or not isinstance(card, WeaponCardWithProperty):
+                continue
+            packed = convertPackedAirProperties(card.getPackedProperties(), self.request.moveState.isInAir)
+            isElement = self._isElementDamage(packed)
+            np.add.at(self._partialDatas, packed[~isElement, PACKED_TYPE].astype(np.int64), packed[~isElement, PACKED_VALUE:])
+            (prefixElements if i < slotIndex else suffixElements).append(packed[isElement])
+        self._prefixElements = np.concatenate(prefixElements) if prefixElements else np.zeros((0, 3))
+        self._suffixElements = np.concatenate(suffixElements) if suffixElements else np.zeros((0, 3))
+        self._ghostCardCount = self.request.getGhostCardCount()
+
+    @staticmethod
+    def _isElementDamage(packed: np.ndarray) -> np.ndarray:
+        return (packed[:, PACKED_TYPE] > 0) & (packed[:, PACKED_TYPE] <= WeaponPropertyType.Virus.value)
+
+    def createPropertyTensor(self, cards: list[WeaponCardWithProperty | None]) -> np.ndarray:
+        '''
+        计算每张候选执行卡装备到该卡槽后的最终属性，None表示该卡槽留空
+        :return: 形状为(len(cards), len(WeaponPropertyType), 2)的属性张量
+        '''
+        finalDatas = np.repeat(self._partialDatas[None], len(cards), axis=0)
+        elementRows, ghostCardCounts = [], []
+        for i, card in enumerate(cards):
+            ghostCardCount = self._ghostCardCount
+            candidateElements = np.zeros((0, 3))
+            if card is not None and isinstance(card, WeaponCardWithProperty):
+                packed = convertPackedAirProperties(card.getPackedProperties(), self.request.moveState.isInAir)
+                isElement = self._isElementDamage(packed)
+                np.add.at(finalDatas[i], packed[~isElement, PACKED_TYPE].astype(np.int64), packed[~isElement, PACKED_VALUE:])
+                candidateElements = packed[isElement]
+                if isinstance(card, WeaponCardCommon) and card.cardSet == CardSet.Ghost:
+                    ghostCardCount += 1
+            elementRows.append(np.concatenate([self._prefixElements, candidateElements, self._suffixElements]))
+            ghostCardCounts.append(ghostCardCount)
+        elementBuilds = np.repeat(np.arange(len(cards)), [len(rows) for rows in elementRows])
+        elementRows = np.concatenate(elementRows) if elementRows else np.zeros((0, 3))
+        resolveElementDamages(finalDatas, np.full(len(cards), self._baseDamage), elementBuilds,
+                              elementRows[:, PACKED_TYPE].astype(np.int64), elementRows[:, PACKED_ADDON])
+        applyGhostCardConversion(finalDatas, np.array(ghostCardCounts))
+        return finalDatas
+
+    def evaluate(self, cards: list[WeaponCardWithProperty | None]) -> DPSBatch:
+        '''
+        批量计算每张候选执行卡装备到该卡槽后的结果
+        :return: 计算完成的批量请求，第i个结果对应cards[i]
+        '''
+        batch = DPSBatch(self.createPropertyTensor(cards), targetInfo=self.request.targetInfo,
+                         characterInfo=self.request.characterInfo, cardSetInfo=self.request.cardSetInfo,
+                         moveState=self.request.moveState, equivalentMagazine=self.request.getEquivalentMagazine())
+        batch.calculate()
+        return batch
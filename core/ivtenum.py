@@ -392,6 +392,29 @@ SubWeaponTypeToMagazine = {
 	SubWeaponType.MicroSubmachineGun: 30
 }
 
+@unique
+class DPSMetric(Enum):
+	'''
+	评价配卡优劣的指标，顺序与执行卡提升统计方法的选项一致
+	'''
+	FirstShotExpectation = 0	# 单发期望伤害
+	MagazineDamage = 1			# 单次爆发伤害量
+	MagazineDps = 2				# 单次爆发DPS
+	AverageDps = 3				# 平均DPS
+
+	def __str__(self):
+		if self in DPSMetricToString:
+			return DPSMetricToString[self]
+		else:
+			raise ValueError(f"未知配卡评价指标: {self.value}")
+
+DPSMetricToString = {
+	DPSMetric.FirstShotExpectation: "单发期望伤害",
+	DPSMetric.MagazineDamage: "单次爆发伤害量",
+	DPSMetric.MagazineDps: "单次爆发DPS",
+	DPSMetric.AverageDps: "平均DPS"
+}
+
 @unique
 class Hero(Enum):
 	'''
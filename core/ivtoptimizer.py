@@ -0,0 +1,534 @@
+from .ivtcard import *
+from .ivtenum import *
+from .ivtproperty import *
+from .ivtdps import DPSRequest, DPSBatch
+import numpy as np
+import itertools
+import time
+
+# 私法执行卡名称的前缀，私法执行卡与同名的普通执行卡不能同时装备
+PRIME_CARD_PREFIX = "私法 "
+# 单次批量计算允许的最大元素数量，即配卡数量与单个弹匣发数的乘积，避免中间数组占用过多内存
+BATCH_ELEMENT_LIMIT = 1_000_000
+# 剪枝时允许的相对误差，用于吸收浮点运算顺序不同带来的差异
+BOUND_TOLERANCE = 1e-9
+# 每次批量展开的骨架数量
+ROOT_EXPAND_GROUP_SIZE = 64
+# 计算节点上界时枚举的卡槽分配方式的最大数量，超过时使用较宽松的上界
+ALLOCATION_LIMIT = 256
+
+def getCardFamily(card: WeaponCardWithProperty) -> str:
+    '''
+    获取执行卡的系列名称，同一系列的执行卡只能装备一张
+    '''
+    if isinstance(card, WeaponCardCommon) and card.isPrime and card.name.startswith(PRIME_CARD_PREFIX):
+        return card.name[len(PRIME_CARD_PREFIX):]
+    return card.name
+
+class LoadoutResult:
+    '''
+    配卡求解的结果
+    '''
+    def __init__(self, request: DPSRequest, metric: DPSMetric, value: float, evaluatedCount: int, elapsed: float):
+        self.request = request                  # 装备最优配卡并计算完成的DPS请求
+        self.cards = [card for card in request.cards[:8] if card is not None]
+        self.metric = metric                    # 评价指标
+        self.value = value                      # 最优配卡的指标值
+        self.evaluatedCount = evaluatedCount    # 求解过程中计算过的配卡数量
+        self.elapsed = elapsed                  # 求解耗时，单位为秒
+
+class _ConfigBuild:
+    '''
+    配卡骨架，由会改变伤害类型的执行卡按卡槽顺序组成
+    '''
+    def __init__(self, cards: list[WeaponCardWithProperty], properties: np.ndarray):
+        self.cards = cards
+        self.families = {getCardFamily(card) for card in cards}
+        self.properties = properties    # 只装备骨架执行卡时的最终属性，形状为(len(WeaponPropertyType), 2)
+        self.root = None
+
+class _SearchNode:
+    '''
+    分支定界搜索树上的节点，表示在骨架上追加的一组属性执行卡
+    '''
+    def __init__(self, start: int, chosen: tuple, addons: np.ndarray, value: float = None):
+        self.start = start      # 之后只能从这个序号开始选择属性执行卡，避免重复搜索同一组合
+        self.chosen = chosen    # 已选择的属性执行卡序号
+        self.addons = addons    # 已选择的属性执行卡的加成值之和
+        self.value = value      # 当前配卡的指标值
+        self.bound = None       # 当前节点及其所有后代的指标值上界
+        self.candidates = None  # 可以追加的属性执行卡序号
+        self.childValues = None # 追加每张候选执行卡后的指标值
+        self.childBounds = None # 追加每张候选执行卡后的子节点上界
+
+class LoadoutSolver:
+    '''
+    使用分支定界法为武器的8个普通卡槽搜索指定评价指标下的最优配卡
+    执行卡分为两类：
+    带有伤害类属性或属于魈鬼系列的执行卡会改变伤害类型和元素复合的结果，对指标的影响不单调，
+    这类执行卡的组合与元素复合顺序全部枚举，每种结果作为一个骨架
+    其余执行卡只改变暴击、触发、多重等属性的加成值，在骨架上追加这类执行卡时进行分支定界搜索
+    节点的上界为影响伤害的属性取剩余执行卡能达到的最大加成时的伤害，乘以时间系数在剩余执行卡能达到的属性范围内的最大值：
+    伤害对这些属性单调不减，时间系数对弹匣容量、攻击速度和装填时间分别单调，最大值在属性范围的顶点上取到
+    '''
+    def __init__(self, request: DPSRequest, cards: list[WeaponCardWithProperty], metric: DPSMetric = DPSMetric.AverageDps, slotCount: int = 8):
+        '''
+        :param request: 提供武器、靶标、角色、套装和行动状态设置的DPS请求，其中的执行卡会被忽略
+        :param cards: 候选执行卡，无法装备在该武器上的执行卡会被过滤掉
+        :param metric: 评价指标
+        :param slotCount: 可用的卡槽数量
+        '''
+        self.request = request
+        self.weapon = request.weapon
+        self.metric = metric
+        self.slotCount = slotCount
+        self.cards = [card for card in cards if isCardCompatibleWithWeapon(card, self.weapon)]
+        # 与DPSRequest.calculate一致，计算前清空非常驻的元素异常
+        self.targetInfo = request.targetInfo.copy()
+        self.targetInfo.elementDebuffState.clearDebuff()
+        self.equivalentMagazine = request.getEquivalentMagazine()
+        self.evaluatedCount = 0
+        self._bestValue = -np.inf
+        self._bestBuild = None
+        self._elementDestinations = {}
+        self._cardProperties = {}
+
+    def solve(self) -> LoadoutResult:
+        '''
+        执行搜索，返回最优配卡
+        '''
+        startTime = time.perf_counter()
+        self.evaluatedCount = 0
+        self._bestValue = -np.inf
+        self._bestBuild = None
+        configCards, statCards = self._classifyCards()
+        configs = self._createConfigs(configCards)
+        self._prepareStatCards(statCards)
+        # 先为所有骨架计算上界，再按上界从高到低依次展开和搜索
+        for config in configs:
+            config.root = _SearchNode(0, (), np.zeros(len(WeaponPropertyType)))
+        for begin in range(0, len(configs), ROOT_EXPAND_GROUP_SIZE):
+            self._boundNodes([(config, config.root) for config in configs[begin:begin + ROOT_EXPAND_GROUP_SIZE]])
+        bounds = [config.root.bound for config in configs]
+        for index in np.argsort(bounds)[::-1]:
+            if not self._canImprove(bounds[index]):
+                break
+            self._expandNodes([(configs[index], configs[index].root)])
+            self._search(configs[index], configs[index].root)
+        # 按最优配卡重新计算一次完整的DPS结果
+        config, chosen = self._bestBuild
+        cards = config.cards + [self.statCards[index] for index in chosen]
+        request = self._createRequest(cards)
+        request.calculate()
+        return LoadoutResult(request, self.metric, request.getMetricValue(self.metric),
+                             self.evaluatedCount, time.perf_counter() - startTime)
+
+    def _createRequest(self, cards: list[WeaponCardWithProperty]) -> DPSRequest:
+        '''
+        使用求解器的设置创建一个装备指定执行卡的DPS请求，专属卡槽沿用原请求
+        '''
+        specialCard = self.request.cards[8] if len(self.request.cards) > 8 else None
+        request = DPSRequest(self.weapon, list(cards) + [None] * (8 - len(cards)) + [specialCard], context=self.request.context)
+        request.moveState = self.request.moveState
+        request.cardSetInfo = self.request.cardSetInfo
+        request.characterInfo = self.request.characterInfo
+        request.targetInfo = self.request.targetInfo.copy()
+        return request
+
+    def _createConfigProperties(self, cardsList: list[list[WeaponCardWithProperty]]) -> np.ndarray:
+        '''
+        批量获取只装备指定执行卡时的最终属性，与DPSRequest.createFinalSnapshot的处理一致
+        :return: 形状为(len(cardsList), len(WeaponPropertyType), 2)的属性张量
+        '''
+        packedPropertiesList, ghostCardCounts = [], []
+        for cards in cardsList:
+            packedPropertiesList.append(np.concatenate([self._getCardProperties(card) for card in cards]) if cards else np.zeros((0, 3)))
+            ghostCardCounts.append(self.request.cardSetInfo.getCardSetCount(CardSet.Ghost) +
+                                   sum(1 for card in cards if isinstance(card, WeaponCardCommon) and card.cardSet == CardSet.Ghost))
+        properties = createFinalPropertyArrays(self.weapon.getBasePropertyArray(), packedPropertiesList)
+        applyGhostCardConversion(properties, np.array(ghostCardCounts))
+        return properties
+
+    def _getCardProperties(self, card: WeaponCardWithProperty) -> np.ndarray:
+        '''
+        获取执行卡在当前行动状态下生效的打包属性，与DPSRequest.createFinalSnapshot的处理一致
+        结果会被缓存，调用者不能修改返回的属性
+        '''
+        if id(card) not in self._cardProperties:
+            self._cardProperties[id(card)] = convertPackedAirProperties(card.getPackedProperties(), self.request.moveState.isInAir)
+        return self._cardProperties[id(card)]
+
+    def _classifyCards(self) -> tuple[list, list]:
+        '''
+        将候选执行卡分为会改变伤害类型的骨架执行卡和只改变属性加成的属性执行卡
+        '''
+        configCards, statCards = [], []
+        for card in self.cards:
+            propertyTypes = self._getCardProperties(card)[:, PACKED_TYPE]
+            if (isinstance(card, WeaponCardCommon) and card.cardSet == CardSet.Ghost) or \
+                    np.any(propertyTypes <= WeaponPropertyType.Virus.value):
+                configCards.append(card)
+            else:
+                statCards.append(card)
+        return configCards, statCards
+
+    def _getElementDestinations(self, sequence: tuple) -> tuple:
+        '''
+        获取各基础元素按指定顺序首次出现时，最终分别进入哪一种伤害类型
+        直接用属性快照计算：先让所有基础元素取相同的加成，再逐个增大某一种元素的加成，增加最多的伤害类型就是它的去向
+        '''
+        if sequence not in self._elementDestinations:
+            baseArray = self.weapon.getBasePropertyArray()
+            def _damageArray(bonusElement: WeaponPropertyType) -> np.ndarray:
+                packed = np.array([(element.value, 0.0, 2.0 if element == bonusElement else 1.0) for element in sequence])
+                return WeaponPropertySnapshot.fromPackedProperties(baseArray, packed).getTotalDamageArray()
+            baseDamageArray = _damageArray(None)
+            self._elementDestinations[sequence] = tuple(int(np.argmax(_damageArray(element) - baseDamageArray)) for element in sequence)
+        return self._elementDestinations[sequence]
+
+    def _getElementOrders(self, cards: list[WeaponCardWithProperty]) -> list[list[WeaponCardWithProperty]]:
+        '''
+        获取骨架执行卡所有复合结果不同的元素顺序
+        元素复合的结果只取决于各基础元素在卡槽中首次出现的顺序，因此只需要枚举基础元素的排列，
+        各基础元素最终进入的伤害类型都相同的排列只保留一个
+        '''
+        cardElements = []
+        elementTypes = []
+        for card in cards:
+            elements = [WeaponPropertyType(int(propertyType)) for propertyType in self._getCardProperties(card)[:, PACKED_TYPE]
+                        if WeaponPropertyType(int(propertyType)).isBaseElementDamage()]
+            cardElements.append(elements)
+            for element in elements:
+                if element not in elementTypes:
+                    elementTypes.append(element)
+        if len(elementTypes) <= 1:
+            return [list(cards)]
+        orders = []
+        appearedDestinations = set()
+        for permutation in itertools.permutations(elementTypes):
+            rank = {element: i for i, element in enumerate(permutation)}
+            indices = sorted(range(len(cards)), key=lambda i: min((rank[element] for element in cardElements[i]), default=len(rank)))
+            sequence = []
+            for i in indices:
+                for element in cardElements[i]:
+                    if element not in sequence:
+                        sequence.append(element)
+            destinations = dict(zip(sequence, self._getElementDestinations(tuple(sequence))))
+            key = tuple(destinations[element] for element in elementTypes)
+            if key in appearedDestinations:
+                continue
+            appearedDestinations.add(key)
+            orders.append([cards[i] for i in indices])
+        return orders
+
+    def _createConfigs(self, configCards: list[WeaponCardWithProperty]) -> list[_ConfigBuild]:
+        '''
+        枚举骨架执行卡的所有组合和元素复合顺序，同一组合中复合结果相同的顺序只保留一个
+        '''
+        orderedCardsList, combinationIndices = [], []
+        combinationCount = 0
+        for size in range(min(self.slotCount, len(configCards)) + 1):
+            for combination in itertools.combinations(configCards, size):
+                families = {getCardFamily(card) for card in combination}
+                if len(families) < size:
+                    continue
+                for cards in self._getElementOrders(list(combination)):
+                    orderedCardsList.append(cards)
+                    combinationIndices.append(combinationCount)
+                combinationCount += 1
+        configs = []
+        createdProperties = set()
+        for cards, combinationIndex, properties in zip(orderedCardsList, combinationIndices, self._createConfigProperties(orderedCardsList)):
+            key = (combinationIndex, properties.tobytes())
+            if key in createdProperties:
+                continue
+            createdProperties.add(key)
+            configs.append(_ConfigBuild(cards, properties))
+        return configs
+
+    def _prepareStatCards(self, statCards: list[WeaponCardWithProperty]):
+        '''
+        计算属性执行卡的加成值，剔除对评价指标没有影响的执行卡，并按单卡提升从高到低排序
+        '''
+        # 弹匣伤害类指标拆分为弹匣伤害与时间系数的乘积，两部分分别估计上界
+        # 影响伤害的属性都是越大越有利，时间系数只取决于弹匣容量、攻击速度和装填时间
+        damageProperties = [WeaponPropertyType.AllDamage, WeaponPropertyType.CriticalChance, WeaponPropertyType.CriticalDamage]
+        self.timeProperties = []
+        if self.metric != DPSMetric.FirstShotExpectation:
+            damageProperties += [WeaponPropertyType.TriggerChance, WeaponPropertyType.MultiStrike, WeaponPropertyType.MagazineSize]
+            if self.targetInfo.headShotRate > 0:
+                damageProperties.append(WeaponPropertyType.Headshot)
+        if self.metric in (DPSMetric.MagazineDps, DPSMetric.AverageDps):
+            self.timeProperties += [WeaponPropertyType.MagazineSize, WeaponPropertyType.AttackSpeed]
+        if self.metric == DPSMetric.AverageDps:
+            self.timeProperties.append(WeaponPropertyType.ReloadTime)
+        self.damageMask = np.zeros(len(WeaponPropertyType), dtype=bool)
+        self.damageMask[[propertyType.value for propertyType in damageProperties]] = True
+        relevantMask = self.damageMask.copy()
+        relevantMask[[propertyType.value for propertyType in self.timeProperties]] = True
+
+        cards, addons = [], []
+        for card in statCards:
+            packed = self._getCardProperties(card)
+            cardAddons = np.zeros(len(WeaponPropertyType))
+            np.add.at(cardAddons, packed[:, PACKED_TYPE].astype(np.int64), packed[:, PACKED_ADDON])
+            if np.any(cardAddons[relevantMask] != 0):
+                cards.append(card)
+                addons.append(cardAddons)
+        addons = np.array(addons).reshape(len(cards), len(WeaponPropertyType))
+        # 单卡提升越大的执行卡越早搜索，以尽快得到较好的当前最优值
+        if cards:
+            configProperties = np.repeat(self._createConfigProperties([[]]), len(cards), axis=0)
+            gains = self._evaluate(configProperties, addons) * self._getTimeFactor(configProperties, addons)
+            order = np.argsort(-np.nan_to_num(gains, nan=-np.inf), kind='stable')
+            cards = [cards[i] for i in order]
+            addons = addons[order]
+        self.statCards = cards
+        self.statAddons = addons
+        self.statFamilies = [getCardFamily(card) for card in cards]
+        self.statGroups = self._groupStatCards(addons)
+
+    def _groupStatCards(self, addons: np.ndarray) -> np.ndarray:
+        '''
+        按影响伤害的属性将属性执行卡分组，涉及相同属性的执行卡在同一组，不同组的执行卡不涉及相同的属性
+        :return: 每张执行卡的组号，不影响伤害的执行卡为-1
+        '''
+        touched = (addons != 0) & self.damageMask
+        groups = np.full(len(addons), -1, dtype=np.int64)
+        groupCount = 0
+        for i in range(len(addons)):
+            if groups[i] >= 0 or not touched[i].any():
+                continue
+            # 不断加入涉及组内属性的执行卡，直到组内的属性不再增加
+            properties = touched[i]
+            while True:
+                members = touched[:, properties].any(axis=1)
+                memberProperties = touched[members].any(axis=0)
+                if np.array_equal(memberProperties, properties):
+                    break
+                properties = memberProperties
+            groups[members] = groupCount
+            groupCount += 1
+        return groups
+
+    def _evaluate(self, configProperties: np.ndarray, addons: np.ndarray) -> np.ndarray:
+        '''
+        批量计算在骨架上追加属性执行卡后的伤害，单发期望伤害指标为其本身，其余指标为弹匣伤害
+        :param configProperties: 骨架的最终属性，形状为(N, len(WeaponPropertyType), 2)
+        :param addons: 追加的属性执行卡的加成值之和，形状为(N, len(WeaponPropertyType))
+        :return: 形状为(N,)的伤害
+        '''
+        properties = configProperties.copy()
+        properties[:, :, 1] += addons
+        # 骨架的伤害已经乘过武器伤害加成，追加的武器伤害加成按比例补到伤害上
+        allDamage = configProperties[:, WeaponPropertyType.AllDamage.value, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = (100 + allDamage + addons[:, WeaponPropertyType.AllDamage.value]) / (100 + allDamage)
+        properties[:, :WeaponPropertyType.Virus.value + 1, 0] *= scale[:, None]
+        # 按每套配卡的发数分批计算，避免中间数组过大
+        finalProperties = properties[:, :, 0] * (1 + properties[:, :, 1] / 100)
+        magazine = np.floor(finalProperties[:, WeaponPropertyType.MagazineSize.value])
+        magazine = np.where(magazine < 0, self.equivalentMagazine, magazine)
+        multiStrike = finalProperties[:, WeaponPropertyType.MultiStrike.value]
+        totalShots = np.maximum(magazine * np.where(multiStrike <= 0, 1.0, multiStrike), 1)
+        # 发数相近的配卡放在同一批计算，减少按最大发数补齐带来的浪费
+        order = np.argsort(totalShots, kind='stable')
+        properties = properties[order]
+        totalShots = totalShots[order]
+        values = np.empty(len(properties))
+        begin = 0
+        while begin < len(properties):
+            # 发数已经升序排列，每批的最大发数就是最后一套配卡的发数
+            fits = np.arange(1, len(properties) - begin + 1) * totalShots[begin:] <= BATCH_ELEMENT_LIMIT
+            end = begin + (len(fits) if fits.all() else max(int(np.argmin(fits)), 1))
+            batch = DPSBatch(properties[begin:end], targetInfo=self.targetInfo, characterInfo=self.request.characterInfo,
+                             cardSetInfo=self.request.cardSetInfo, moveState=self.request.moveState,
+                             equivalentMagazine=self.equivalentMagazine)
+            batch.calculate()
+            if self.metric == DPSMetric.FirstShotExpectation:
+                values[order[begin:end]] = batch.getMetricValue(DPSMetric.FirstShotExpectation)
+            else:
+                values[order[begin:end]] = batch.magazineDamage
+            begin = end
+        self.evaluatedCount += len(properties)
+        return values
+
+    def _getTimeFactor(self, configProperties: np.ndarray, addons: np.ndarray) -> np.ndarray:
+        '''
+        批量计算指标相对于伤害的时间系数，与DPSRequest.calculate中弹匣DPS和平均DPS的计算一致
+        :return: 形状为(N,)的时间系数，单发期望伤害和弹匣伤害指标的时间系数为1
+        '''
+        if not self.timeProperties:
+            return np.ones(len(addons))
+        def _final(propertyType: WeaponPropertyType) -> np.ndarray:
+            return configProperties[:, propertyType.value, 0] * (1 + (configProperties[:, propertyType.value, 1] + addons[:, propertyType.value]) / 100)
+        magazine = np.floor(_final(WeaponPropertyType.MagazineSize))
+        magazine = np.where(magazine < 0, self.equivalentMagazine, magazine)
+        attackSpeed = _final(WeaponPropertyType.AttackSpeed)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.metric == DPSMetric.MagazineDps:
+                return attackSpeed / magazine
+            return 1 / (magazine / attackSpeed + _final(WeaponPropertyType.ReloadTime))
+
+    def _getCandidates(self, config: _ConfigBuild, node: _SearchNode) -> np.ndarray:
+        '''
+        获取节点上可以追加的属性执行卡序号，同一系列的执行卡只能装备一张
+        '''
+        if len(config.cards) + len(node.chosen) >= self.slotCount:
+            return np.zeros(0, dtype=np.int64)
+        families = config.families | {self.statFamilies[index] for index in node.chosen}
+        return np.array([index for index in range(node.start, len(self.statCards)) if self.statFamilies[index] not in families], dtype=np.int64)
+
+    def _getReachableAddons(self, candidateAddons: np.ndarray, slotCount: int) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        获取从候选执行卡中最多选择slotCount张时，每项属性能达到的最大加成和最小加成，不考虑系列限制
+        :param candidateAddons: 形状为(..., 候选数量, len(WeaponPropertyType))，不可选的候选加成值为0
+        :return: 最大加成和最小加成，形状都为(..., len(WeaponPropertyType))
+        '''
+        gains = -np.sort(-np.maximum(candidateAddons, 0), axis=-2)[..., :slotCount, :].sum(axis=-2)
+        losses = np.sort(np.minimum(candidateAddons, 0), axis=-2)[..., :slotCount, :].sum(axis=-2)
+        return gains, losses
+
+    def _getAllocatedGains(self, candidates: np.ndarray, slotCount: int) -> np.ndarray:
+        '''
+        枚举剩余卡槽在各组属性执行卡之间的分配方式，获取每种分配下影响伤害的属性能达到的最大加成
+        每张执行卡只属于一组，各组使用的执行卡数量之和不超过slotCount，组内每项属性取该组最大的若干个加成之和，
+        比宽松上界状态更紧；只保留用满卡槽的分配，分配方式超过ALLOCATION_LIMIT时退回宽松上界状态
+        :return: 形状为(分配方式数量, len(WeaponPropertyType))的加成值
+        '''
+        groups = self.statGroups[candidates]
+        candidateGains = np.where(self.damageMask, np.maximum(self.statAddons[candidates], 0), 0)
+        usedSlots = np.zeros(1, dtype=np.int64)
+        allocatedGains = np.zeros((1, len(WeaponPropertyType)))
+        for group in np.unique(groups[groups >= 0]):
+            sortedGains = -np.sort(-candidateGains[groups == group], axis=0)[:slotCount]
+            # 该组使用0到len(sortedGains)张执行卡时的加成
+            groupGains = np.concatenate([np.zeros((1, len(WeaponPropertyType))), np.cumsum(sortedGains, axis=0)])
+            counts = np.arange(len(groupGains))
+            valid = usedSlots[:, None] + counts[None, :] <= slotCount
+            stateIndices, countIndices = np.nonzero(valid)
+            if len(stateIndices) > ALLOCATION_LIMIT:
+                gains, _ = self._getReachableAddons(candidateGains, slotCount)
+                return gains[None]
+            usedSlots = usedSlots[stateIndices] + counts[countIndices]
+            allocatedGains = allocatedGains[stateIndices] + groupGains[countIndices]
+        # 伤害对这些属性单调不减，没有用满卡槽的分配不会超过某个用满卡槽的分配
+        return allocatedGains[usedSlots == usedSlots.max()]
+
+    def _getTimeCorners(self, addons: np.ndarray, gains: np.ndarray, losses: np.ndarray) -> np.ndarray:
+        '''
+        获取时间相关属性范围的各个顶点
+        :param addons: 已选择的加成值，形状为(N, len(WeaponPropertyType))
+        :return: 形状为(N, 顶点数量, len(WeaponPropertyType))的加成值
+        '''
+        corners = []
+        for choices in itertools.product((losses, gains), repeat=len(self.timeProperties)):
+            corner = addons.copy()
+            for propertyType, choice in zip(self.timeProperties, choices):
+                corner[:, propertyType.value] += choice[:, propertyType.value]
+            corners.append(corner)
+        return np.stack(corners, axis=1)
+
+    def _boundNodes(self, items: list[tuple[_ConfigBuild, _SearchNode]]):
+        '''
+        批量计算搜索节点的可追加执行卡和上界
+        伤害的上界按剩余卡槽在各组属性执行卡之间的分配计算，时间系数的上界取剩余执行卡能达到的属性范围的各个顶点中的最大值
+        '''
+        configProperties, addons, layouts = [], [], []
+        cornerProperties, cornerAddons = [], []
+        for config, node in items:
+            node.candidates = self._getCandidates(config, node)
+            remainingSlots = self.slotCount - len(config.cards) - len(node.chosen)
+            rows = node.addons + self._getAllocatedGains(node.candidates, remainingSlots)
+            configProperties.append(np.repeat(config.properties[None], len(rows), axis=0))
+            addons.append(rows)
+            gains, losses = self._getReachableAddons(self.statAddons[node.candidates], remainingSlots)
+            corners = self._getTimeCorners(node.addons[None], gains[None], losses[None])[0]
+            cornerProperties.append(np.repeat(config.properties[None], len(corners), axis=0))
+            cornerAddons.append(corners)
+            layouts.append((len(rows), len(corners)))
+        damages = self._evaluate(np.concatenate(configProperties), np.concatenate(addons))
+        cornerFactors = self._getTimeFactor(np.concatenate(cornerProperties), np.concatenate(cornerAddons))
+        offset, cornerOffset = 0, 0
+        for (config, node), (rowCount, cornerCount) in zip(items, layouts):
+            maxTimeFactor = np.nan_to_num(cornerFactors[cornerOffset:cornerOffset + cornerCount], nan=np.inf).max()
+            with np.errstate(invalid='ignore'):
+                node.bound = np.nan_to_num(damages[offset:offset + rowCount].max() * maxTimeFactor, nan=np.inf)
+            offset += rowCount
+            cornerOffset += cornerCount
+
+    def _expandNodes(self, items: list[tuple[_ConfigBuild, _SearchNode]]):
+        '''
+        批量展开已计算上界的搜索节点，计算节点本身和追加每张候选执行卡后的指标值，以及每个子节点上界的粗略估计
+        子节点只能继续追加序号更靠后的候选执行卡，其上界按这些执行卡的宽松上界状态估计，
+        即每一项影响伤害的属性同时取剩余卡槽能达到的最大加成，比按分配计算宽松但不需要枚举
+        '''
+        configProperties, addons, layouts = [], [], []
+        cornerProperties, cornerAddons = [], []
+        for config, node in items:
+            candidateCount = len(node.candidates)
+            candidateAddons = self.statAddons[node.candidates]
+            remainingSlots = self.slotCount - len(config.cards) - len(node.chosen)
+            laterMask = np.arange(candidateCount)[None, :] > np.arange(candidateCount)[:, None]
+            childGains, childLosses = self._getReachableAddons(np.where(laterMask[:, :, None], candidateAddons[None], 0), remainingSlots - 1)
+            childAddons = node.addons + candidateAddons
+            relaxedAddons = childAddons + np.where(self.damageMask, childGains, 0)
+            rows = np.concatenate([node.addons[None], childAddons, relaxedAddons])
+            configProperties.append(np.repeat(config.properties[None], len(rows), axis=0))
+            addons.append(rows)
+            corners = self._getTimeCorners(childAddons, childGains, childLosses).reshape(-1, len(WeaponPropertyType))
+            cornerProperties.append(np.repeat(config.properties[None], len(corners), axis=0))
+            cornerAddons.append(corners)
+            layouts.append((len(rows), len(corners)))
+        configProperties = np.concatenate(configProperties)
+        addons = np.concatenate(addons)
+        damages = self._evaluate(configProperties, addons)
+        timeFactors = self._getTimeFactor(configProperties, addons)
+        cornerFactors = self._getTimeFactor(np.concatenate(cornerProperties), np.concatenate(cornerAddons))
+        offset, cornerOffset = 0, 0
+        for (config, node), (rowCount, cornerCount) in zip(items, layouts):
+            nodeDamages = damages[offset:offset + rowCount]
+            nodeTimeFactors = timeFactors[offset:offset + rowCount]
+            candidateCount = len(node.candidates)
+            # 每个子节点的时间系数范围的顶点数量相同
+            maxTimeFactors = np.nan_to_num(cornerFactors[cornerOffset:cornerOffset + cornerCount], nan=np.inf).reshape(candidateCount, 2 ** len(self.timeProperties)).max(axis=1)
+            offset += rowCount
+            cornerOffset += cornerCount
+            node.value = nodeDamages[0] * nodeTimeFactors[0]
+            node.childValues = nodeDamages[1:candidateCount + 1] * nodeTimeFactors[1:candidateCount + 1]
+            with np.errstate(invalid='ignore'):
+                node.childBounds = np.nan_to_num(nodeDamages[candidateCount + 1:] * maxTimeFactors, nan=np.inf)
+            self._updateBest(node.value, config, node.chosen)
+            for i, index in enumerate(node.candidates):
+                self._updateBest(node.childValues[i], config, node.chosen + (index,))
+
+    def _canImprove(self, bound: float) -> bool:
+        '''
+        判断上界是否可能超过当前最优值
+        '''
+        return bound > self._bestValue * (1 + BOUND_TOLERANCE)
+
+    def _updateBest(self, value: float, config: _ConfigBuild, chosen: tuple):
+        '''
+        更新当前最优配卡
+        '''
+        if value > self._bestValue:
+            self._bestValue = value
+            self._bestBuild = (config, chosen)
+
+    def _search(self, config: _ConfigBuild, node: _SearchNode):
+        '''
+        深度优先搜索已展开的节点，子节点先用展开父节点时的粗略估计剪枝，再计算上界剪枝，都通过时才展开
+        '''
+        remainingSlots = self.slotCount - len(config.cards) - len(node.chosen)
+        if remainingSlots <= 1:
+            return
+        # 子节点的上界批量计算，搜索前面的子节点时当前最优值可能提高，展开前重新判断
+        children = [_SearchNode(index + 1, node.chosen + (index,), node.addons + self.statAddons[index])
+                    for i, index in enumerate(node.candidates[:-1]) if self._canImprove(node.childBounds[i])]
+        if children:
+            self._boundNodes([(config, child) for child in children])
+        for child in children:
+            if self._canImprove(child.bound):
+                self._expandNodes([(config, child)])
+                self._search(config, child)
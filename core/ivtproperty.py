@@ -1,6 +1,5 @@
 from .ivtenum import WeaponPropertyType
 import numpy as np
-import copy
 
 class PropertyData:
     '''
@@ -166,246 +165,366 @@ class WeaponProperty(PropertyData):
     def setFinalValue(self, finalValue):
         return super().setFinalValue(self.propertyType, finalValue)
         
+# 打包属性数组的列序号，每行为一个属性条目
+PACKED_TYPE = 0     # 属性类型
+PACKED_VALUE = 1    # 基础值
+PACKED_ADDON = 2    # 加成值
+
+# 空中属性对应的非空中属性，其余属性对应其本身
+_NOT_AIR_PROPERTY_TYPE = np.arange(len(WeaponPropertyType))
+_NOT_AIR_PROPERTY_TYPE[WeaponPropertyType.CriticalChanceInAir.value] = WeaponPropertyType.CriticalChance.value
+_NOT_AIR_PROPERTY_TYPE[WeaponPropertyType.ColdInAir.value] = WeaponPropertyType.Cold.value
+_NOT_AIR_PROPERTY_TYPE[WeaponPropertyType.ElectricInAir.value] = WeaponPropertyType.Electric.value
+_NOT_AIR_PROPERTY_TYPE[WeaponPropertyType.FireInAir.value] = WeaponPropertyType.Fire.value
+_NOT_AIR_PROPERTY_TYPE[WeaponPropertyType.PoisonInAir.value] = WeaponPropertyType.Poison.value
+_IS_AIR_PROPERTY_TYPE = _NOT_AIR_PROPERTY_TYPE != np.arange(len(WeaponPropertyType))
+
+# 元素复合规则
+# 裂化 = 热波 + 冰冻
+# 辐射 = 赛能 + 创生
+# 以太 = 热波 + 赛能
+# 病毒 = 冰冻 + 创生
+# 磁暴 = 赛能 + 冰冻
+# 毒气 = 创生 + 热波
+# 每种基础元素依次尝试加入的已有复合元素
+_COMPOSED_SEARCH_ORDER = {
+    WeaponPropertyType.Fire: (WeaponPropertyType.Cracking, WeaponPropertyType.Gas, WeaponPropertyType.Ether),
+    WeaponPropertyType.Cold: (WeaponPropertyType.Cracking, WeaponPropertyType.Magnetic, WeaponPropertyType.Virus),
+    WeaponPropertyType.Electric: (WeaponPropertyType.Radiation, WeaponPropertyType.Magnetic, WeaponPropertyType.Ether),
+    WeaponPropertyType.Poison: (WeaponPropertyType.Virus, WeaponPropertyType.Gas, WeaponPropertyType.Radiation),
+}
+# 每种基础元素依次尝试与之复合的已有基础元素，以及复合的结果
+_COMBINE_ORDER = {
+    WeaponPropertyType.Fire: ((WeaponPropertyType.Cold, WeaponPropertyType.Cracking), (WeaponPropertyType.Electric, WeaponPropertyType.Ether), (WeaponPropertyType.Poison, WeaponPropertyType.Gas)),
+    WeaponPropertyType.Cold: ((WeaponPropertyType.Fire, WeaponPropertyType.Cracking), (WeaponPropertyType.Electric, WeaponPropertyType.Magnetic), (WeaponPropertyType.Poison, WeaponPropertyType.Virus)),
+    WeaponPropertyType.Electric: ((WeaponPropertyType.Fire, WeaponPropertyType.Ether), (WeaponPropertyType.Cold, WeaponPropertyType.Magnetic), (WeaponPropertyType.Poison, WeaponPropertyType.Radiation)),
+    WeaponPropertyType.Poison: ((WeaponPropertyType.Fire, WeaponPropertyType.Gas), (WeaponPropertyType.Cold, WeaponPropertyType.Virus), (WeaponPropertyType.Electric, WeaponPropertyType.Radiation)),
+}
+DAMAGE_TYPE_COUNT = WeaponPropertyType.Virus.value + 1
+
+def _createElementTransitionTables() -> tuple:
+    '''
+    预先计算元素复合的状态转移表
+    状态为已经出现的伤害类型的位掩码，每种伤害类型最多只会出现一次
+    对每种新加入的伤害类型和每个状态，依次判断：
+    1. 已有同类型的伤害，直接加入
+    2. 已有该元素参与的复合元素伤害，加入该复合元素
+    3. 已有可复合的基础元素伤害，两者复合为新的复合元素，原有伤害改为复合元素
+    4. 都没有，作为新的伤害类型出现
+    :return: 加入的伤害类型、被复合的原有伤害类型（没有时为-1）和新的状态，形状均为(DAMAGE_TYPE_COUNT, 2 ** DAMAGE_TYPE_COUNT)
+    '''
+    states = np.arange(1 << DAMAGE_TYPE_COUNT, dtype=np.int64)
+    def _exists(propertyType: WeaponPropertyType) -> np.ndarray:
+        return (states >> propertyType.value & 1).astype(bool)
+    targetTable = np.zeros((DAMAGE_TYPE_COUNT, len(states)), dtype=np.int64)
+    sourceTable = np.full((DAMAGE_TYPE_COUNT, len(states)), -1, dtype=np.int64)
+    for damageType in list(WeaponPropertyType)[:DAMAGE_TYPE_COUNT]:
+        target = np.full(len(states), damageType.value, dtype=np.int64)
+        source = np.full(len(states), -1, dtype=np.int64)
+        # 按优先级从低到高覆盖，最终保留优先级最高的结果
+        for otherType, composedType in reversed(_COMBINE_ORDER.get(damageType, ())):
+            found = _exists(otherType)
+            target[found] = composedType.value
+            source[found] = otherType.value
+        for composedType in reversed(_COMPOSED_SEARCH_ORDER.get(damageType, ())):
+            found = _exists(composedType)
+            target[found] = composedType.value
+            source[found] = -1
+        exists = _exists(damageType)
+        target[exists] = damageType.value
+        source[exists] = -1
+        targetTable[damageType.value] = target
+        sourceTable[damageType.value] = source
+    nextStateTable = states | (1 << targetTable)
+    nextStateTable = np.where(sourceTable >= 0, nextStateTable & ~(1 << np.maximum(sourceTable, 0)), nextStateTable)
+    return targetTable, sourceTable, nextStateTable
+
+_ELEMENT_TRANSITION_TARGET, _ELEMENT_TRANSITION_SOURCE, _ELEMENT_TRANSITION_NEXT_STATE = _createElementTransitionTables()
+
+def combineElementDamages(damageTypes: np.ndarray, damageDatas: np.ndarray) -> np.ndarray:
+    '''
+    按顺序批量复合多套配卡的元素伤害
+    :param damageTypes: 形状为(N, K)的伤害类型序列，-1表示空位
+    :param damageDatas: 形状为(N, K, 2)的伤害基础值和加成值
+    :return: 形状为(N, DAMAGE_TYPE_COUNT, 2)的复合结果，复合时原有伤害与加入伤害的基础值相加，加成值清零
+    '''
+    buildCount = len(damageTypes)
+    combined = np.zeros((buildCount, DAMAGE_TYPE_COUNT, 2), dtype=np.float64)
+    states = np.zeros(buildCount, dtype=np.int64)
+    builds = np.arange(buildCount)
+    for k in range(damageTypes.shape[1]):
+        active = damageTypes[:, k] >= 0
+        if not active.any():
+            continue
+        rows = builds[active]
+        types = damageTypes[active, k]
+        activeStates = states[active]
+        targets = _ELEMENT_TRANSITION_TARGET[types, activeStates]
+        sources = _ELEMENT_TRANSITION_SOURCE[types, activeStates]
+        datas = damageDatas[active, k]
+        isCombined = sources >= 0
+        if isCombined.any():
+            combinedRows = rows[isCombined]
+            combinedSources = sources[isCombined]
+            combined[combinedRows, targets[isCombined], 0] = combined[combinedRows, combinedSources, 0]
+            combined[combinedRows, combinedSources] = 0.0
+        combined[rows, targets, 0] += datas[:, 0]
+        combined[rows[~isCombined], targets[~isCombined], 1] += datas[~isCombined, 1]
+        states[active] = _ELEMENT_TRANSITION_NEXT_STATE[types, activeStates]
+    return combined
+
+def _getDamageArrays(datas: np.ndarray) -> np.ndarray:
+    return datas[..., :DAMAGE_TYPE_COUNT, 0] * (1 + datas[..., :DAMAGE_TYPE_COUNT, 1] / 100)
+
+def createFinalPropertyArrays(baseDatas: np.ndarray, packedPropertiesList: list[np.ndarray]) -> np.ndarray:
+    '''
+    批量计算多套配卡的最终属性
+    :param baseDatas: 武器基础属性，形状为(len(WeaponPropertyType), 2)或(N, len(WeaponPropertyType), 2)
+    :param packedPropertiesList: 每套配卡打包好的执行卡属性，见packProperties
+    :return: 形状为(N, len(WeaponPropertyType), 2)的最终属性
+    '''
+    buildCount = len(packedPropertiesList)
+    baseDatas = np.broadcast_to(baseDatas, (buildCount, len(WeaponPropertyType), 2))
+    finalDatas = baseDatas.copy()
+    baseDamage = np.sum(_getDamageArrays(baseDatas), axis=1)
+    packed = np.concatenate(packedPropertiesList) if buildCount else np.zeros((0, 3))
+    packedBuilds = np.repeat(np.arange(buildCount), [len(properties) for properties in packedPropertiesList])
+    propertyTypes = packed[:, PACKED_TYPE].astype(np.int64)
+    isElementDamage = (propertyTypes > 0) & (propertyTypes < DAMAGE_TYPE_COUNT)
+    # 先计算非元素伤害的属性
+    np.add.at(finalDatas, (packedBuilds[~isElementDamage], propertyTypes[~isElementDamage]), packed[~isElementDamage, PACKED_VALUE:])
+    return resolveElementDamages(finalDatas, baseDamage, packedBuilds[isElementDamage], propertyTypes[isElementDamage], packed[isElementDamage, PACKED_ADDON])
+
+def resolveElementDamages(finalDatas: np.ndarray, baseDamage: np.ndarray, elementBuilds: np.ndarray, elementTypes: np.ndarray, elementAddons: np.ndarray) -> np.ndarray:
+    '''
+    在已经计入非元素伤害属性的最终属性上，批量完成元素复合、动能伤害和武器伤害加成的计算
+    :param finalDatas: 形状为(N, len(WeaponPropertyType), 2)的最终属性，会被直接修改
+    :param baseDamage: 形状为(N,)的武器基础总伤害
+    :param elementBuilds: 执行卡元素伤害属性所属的配卡序号，需要按配卡序号升序排列，同一配卡的属性按卡槽顺序排列
+    :param elementTypes: 执行卡元素伤害属性的类型
+    :param elementAddons: 执行卡元素伤害属性的加成值
+    :return: 计算完成的最终属性，即finalDatas本身
+    '''
+    buildCount = len(finalDatas)
+    # 将元素伤害类词条从百分比转化为实际的伤害数值，基础元素参与复合，复合元素直接计入
+    elementValues = elementAddons * baseDamage[elementBuilds] / 100.0
+    isVariable = elementTypes <= WeaponPropertyType.Poison.value
+    variableBuilds = elementBuilds[isVariable]
+    variableCounts = np.bincount(variableBuilds, minlength=buildCount)
+    variableSlots = np.arange(len(variableBuilds)) - np.repeat(np.cumsum(variableCounts) - variableCounts, variableCounts)
+    maxVariableCount = int(variableCounts.max()) if buildCount else 0
+    # 复合顺序为执行卡的基础元素在前，武器本身的伤害按类型顺序在后，武器本身的伤害随后从快照中清空
+    damageTypes = np.full((buildCount, maxVariableCount + DAMAGE_TYPE_COUNT), -1, dtype=np.int64)
+    damageDatas = np.zeros((buildCount, maxVariableCount + DAMAGE_TYPE_COUNT, 2), dtype=np.float64)
+    damageTypes[variableBuilds, variableSlots] = elementTypes[isVariable]
+    damageDatas[variableBuilds, variableSlots, 0] = elementValues[isVariable]
+    hasWeaponDamage = _getDamageArrays(finalDatas) != 0
+    damageTypes[:, maxVariableCount:] = np.where(hasWeaponDamage, np.arange(DAMAGE_TYPE_COUNT), -1)
+    damageDatas[:, maxVariableCount:] = finalDatas[:, :DAMAGE_TYPE_COUNT]
+    finalDatas[:, :DAMAGE_TYPE_COUNT][hasWeaponDamage] = 0.0
+    combined = combineElementDamages(damageTypes, damageDatas)
+    # 计算动能伤害
+    physicalAddon = finalDatas[:, WeaponPropertyType.Physics.value, 1]
+    hasPhysicalAddon = physicalAddon != 0.0
+    finalDatas[hasPhysicalAddon, WeaponPropertyType.Physics.value, 0] = baseDamage[hasPhysicalAddon] * physicalAddon[hasPhysicalAddon] / 100.0
+    finalDatas[hasPhysicalAddon, WeaponPropertyType.Physics.value, 1] = 0.0
+    # 将最终的元素伤害加入快照
+    finalDatas[:, :DAMAGE_TYPE_COUNT] += combined
+    np.add.at(finalDatas[:, :, 0], (elementBuilds[~isVariable], elementTypes[~isVariable]), elementValues[~isVariable])
+    # 最后将对所有伤害进行AllDamage的加成
+    allDamageAddon = finalDatas[:, WeaponPropertyType.AllDamage.value, 1]
+    damageDatas = finalDatas[:, :DAMAGE_TYPE_COUNT]
+    hasDamage = damageDatas[:, :, 0] != 0.0
+    damageDatas[:, :, 0] = np.where(hasDamage, damageDatas[:, :, 0] * (1 + allDamageAddon[:, None] / 100.0), damageDatas[:, :, 0])
+    damageDatas[:, :, 1] = np.where(hasDamage, 0.0, damageDatas[:, :, 1])
+    return finalDatas
+
+def applyGhostCardConversion(finalDatas: np.ndarray, ghostCardCounts: np.ndarray):
+    '''
+    批量应用鬼卡的动能转换效果，直接修改传入的最终属性
+    :param finalDatas: 形状为(N, len(WeaponPropertyType), 2)的最终属性
+    :param ghostCardCounts: 形状为(N,)的鬼卡数量，为0时不转换
+    '''
+    ghostCardCounts = np.asarray(ghostCardCounts)
+    converted = ghostCardCounts > 0
+    if not converted.any():
+        return
+    damageArrays = _getDamageArrays(finalDatas[converted])
+    totalDamage = np.sum(damageArrays, axis=1)
+    physicalDamage = damageArrays[:, WeaponPropertyType.Physics.value]
+    convertedPhysicalDamage = (totalDamage - physicalDamage) * ghostCardCounts[converted] + physicalDamage
+    # 清空非动能伤害属性，设置新的动能伤害属性
+    finalDatas[converted, :DAMAGE_TYPE_COUNT] = 0.0
+    finalDatas[converted, WeaponPropertyType.Physics.value, 0] = convertedPhysicalDamage
+
+def packProperties(properties: list[WeaponProperty]) -> np.ndarray:
+    '''
+    将属性条目打包为形状为(N, 3)的数组，三列分别为属性类型、基础值和加成值
+    '''
+    packed = np.empty((len(properties), 3), dtype=np.float64)
+    for i, prop in enumerate(properties):
+        packed[i] = (prop.propertyType.value, prop.getValue(), prop.getAddon())
+    return packed
+
+def unpackProperties(packed: np.ndarray, fromMod: bool = True) -> list[WeaponProperty]:
+    '''
+    将packProperties打包的数组还原为属性条目
+    '''
+    return [WeaponProperty(WeaponPropertyType(int(row[PACKED_TYPE])), row[PACKED_VALUE], row[PACKED_ADDON], from_mod=fromMod) for row in packed]
+
+def convertPackedAirProperties(packed: np.ndarray, isInAir: bool) -> np.ndarray:
+    '''
+    处理打包属性中的空中属性，与WeaponProperty.convertToNotAirProperty一致
+    在空中时转换为对应的非空中属性，否则剔除
+    '''
+    propertyTypes = packed[:, PACKED_TYPE].astype(np.int64)
+    isAirProperty = _IS_AIR_PROPERTY_TYPE[propertyTypes]
+    if not isAirProperty.any():
+        return packed
+    if not isInAir:
+        return packed[~isAirProperty]
+    converted = packed.copy()
+    converted[:, PACKED_TYPE] = _NOT_AIR_PROPERTY_TYPE[propertyTypes]
+    return converted
+
 class WeaponPropertySnapshot:
     '''
     武器属性条目集合
+    基础属性和最终属性各为一个形状为(len(WeaponPropertyType), 2)的数组，两列分别为基础值和加成值
     '''
     def __init__(self, weaponProperties : list[WeaponProperty], cardProperties : list[WeaponProperty] = []):
-        self.__basePropertyData = PropertyData()
+        baseDatas = np.zeros((len(WeaponPropertyType), 2), dtype=np.float64)
         for prop in weaponProperties:
-            self.__basePropertyData += prop
-        self.__finalPropertyData = None
+            baseDatas[prop.propertyType.value, 0] += prop.getValue()
+            baseDatas[prop.propertyType.value, 1] += prop.getAddon()
+        self.__baseDatas = baseDatas
+        self.__finalDatas = None
         self.update(cardProperties)
 
+    @classmethod
+    def fromPackedProperties(cls, baseDatas: np.ndarray, packedCardProperties: np.ndarray) -> 'WeaponPropertySnapshot':
+        '''
+        由基础属性数组和打包好的执行卡属性直接创建属性快照，不创建任何属性条目对象
+        :param baseDatas: 形状为(len(WeaponPropertyType), 2)的基础属性数组，不会被修改
+        :param packedCardProperties: 形状为(N, 3)的打包执行卡属性，见packProperties
+        '''
+        snapshot = cls.__new__(cls)
+        snapshot.__baseDatas = baseDatas
+        snapshot.__finalDatas = None
+        snapshot.updatePacked(packedCardProperties)
+        return snapshot
+
+    @classmethod
+    def fromPropertyArrays(cls, baseDatas: np.ndarray, finalDatas: np.ndarray) -> 'WeaponPropertySnapshot':
+        '''
+        由已经计算好的基础属性和最终属性数组直接创建属性快照，用于载入预编译的数据，快照直接引用这两个数组
+        '''
+        snapshot = cls.__new__(cls)
+        snapshot.__baseDatas = baseDatas
+        snapshot.__finalDatas = finalDatas
+        return snapshot
+
+    def getBasePropertyArray(self) -> np.ndarray:
+        '''
+        获取基础属性的数组形式，形状为(len(WeaponPropertyType), 2)，两列分别为基础值和加成值
+        '''
+        return self.__baseDatas.copy()
+
     def getBaseTotalDamageArray(self) -> np.ndarray:
         '''
         获取来自武器本身的伤害属性数组
         '''
-        return self.__basePropertyData.getDamageArray()
+        return _getDamageArrays(self.__baseDatas)
     
     def getTotalDamageArray(self) -> np.ndarray:
         '''
         获取最终的伤害属性数组
         '''
-        if self.__finalPropertyData is None:
-            return self.__basePropertyData.getDamageArray()
-        return self.__finalPropertyData.getDamageArray()
+        if self.__finalDatas is None:
+            return _getDamageArrays(self.__baseDatas)
+        return _getDamageArrays(self.__finalDatas)
+
+    def getPropertyArray(self) -> np.ndarray:
+        '''
+        获取最终属性的数组形式，形状为(len(WeaponPropertyType), 2)，两列分别为基础值和加成值
+        '''
+        if self.__finalDatas is None:
+            return self.__baseDatas.copy()
+        return self.__finalDatas.copy()
 
     def getPropertyValue(self, propertyType : WeaponPropertyType) -> float:
         '''
         获取指定类型的属性值
         '''
-        if self.__finalPropertyData is None:
-            return self.__basePropertyData.getValue(propertyType)
-        return self.__finalPropertyData.get(propertyType)
-        
+        if self.__finalDatas is None:
+            return self.__baseDatas[propertyType.value, 0]
+        datas = self.__finalDatas[propertyType.value]
+        return datas[0] * (1 + datas[1] / 100)
+
     def update(self, propertyArray : list[WeaponProperty]):
         '''
         更新属性快照
         '''
-        self.__finalPropertyData = copy.deepcopy(self.__basePropertyData)
-        baseDamageArray = self.getBaseTotalDamageArray()
-        baseDamage = np.sum(baseDamageArray)
-        # 先计算非元素伤害的属性        
+        self.updatePacked(packProperties(propertyArray))
+
+    def updatePacked(self, packedProperties : np.ndarray):
+        '''
+        使用打包好的执行卡属性更新属性快照，见packProperties
+        与createFinalPropertyArrays的计算完全一致，单套配卡时逐个元素查表比批量计算更快
+        '''
+        finalDatas = self.__baseDatas.copy()
+        baseDamage = np.sum(self.getBaseTotalDamageArray())
+        propertyTypes = packedProperties[:, PACKED_TYPE].astype(np.int64)
+        isElementDamage = (propertyTypes > 0) & (propertyTypes < DAMAGE_TYPE_COUNT)
+        # 先计算非元素伤害的属性
+        np.add.at(finalDatas, propertyTypes[~isElementDamage], packedProperties[~isElementDamage, PACKED_VALUE:])
+        # 将元素伤害类词条从百分比转化为实际的伤害数值，基础元素参与复合，复合元素直接计入
         variableElementDamageArray = []
         constantElementDamageArray = []
-        for weaponProperty in propertyArray:
-            if weaponProperty.propertyType.isElementDamage():
-                if weaponProperty.propertyType.isBaseElementDamage():
-                    variableElementDamageArray.append(weaponProperty)
-                else:
-                    constantElementDamageArray.append(weaponProperty)
+        for propertyTypeValue, addon in zip(propertyTypes[isElementDamage].tolist(), packedProperties[isElementDamage, PACKED_ADDON].tolist()):
+            if propertyTypeValue <= WeaponPropertyType.Poison.value:
+                variableElementDamageArray.append((propertyTypeValue, addon * baseDamage / 100.0, 0.0))
             else:
-                self.__finalPropertyData += weaponProperty
-        # 将元素伤害类词条从百分比转化为实际的伤害数值
-        for weaponProperty in variableElementDamageArray:
-            finalValue = weaponProperty.getAddon() * baseDamage / 100.0
-            weaponProperty.setFinalValue(finalValue)
-        for weaponProperty in constantElementDamageArray:
-            finalValue = weaponProperty.getAddon() * baseDamage / 100.0
-            weaponProperty.setFinalValue(finalValue)
-        # 将枪械本身的元素伤害属性添加到variableElementDamageArray末尾，然后清空快照中所有元素伤害属性
-        for propertyTypeValue in range(11):
-            propertyType = WeaponPropertyType(propertyTypeValue)
-            if self.__finalPropertyData.get(propertyType) != 0:
-                value = self.__finalPropertyData.getValue(propertyType)
-                addon = self.__finalPropertyData.getAddon(propertyType)
-                weaponBaseDamageProperty = WeaponProperty(propertyType, value, addon)
-                variableElementDamageArray.append(weaponBaseDamageProperty)
-                self.__finalPropertyData.setFinalValue(propertyType, 0.0)
-        # 按照顺序开始复合元素伤害
-        # 裂化 = 热波 + 冰冻
-        # 辐射 = 赛能 + 创生
-        # 以太 = 热波 + 赛能
-        # 病毒 = 冰冻 + 创生
-        # 磁暴 = 赛能 + 冰冻
-        # 毒气 = 创生 + 热波
-        # 如果一种基本元素加成多次出现，且之前出现的已经参与了伤害复合，那么后出现的加成会自动加入到前面的复合伤害当中
-        FinalDamageArray = []
-        def _findElementDamage(propertyType: WeaponPropertyType) -> WeaponProperty | None:
-            for weaponProperty in FinalDamageArray:
-                if weaponProperty.propertyType == propertyType:
-                    return True, weaponProperty
-            return False, None
-        
-        def _findElementDamageComposed(propertyType: WeaponPropertyType):
-            property = None
-            find = False
-            if propertyType == WeaponPropertyType.Fire:
-                find, property = _findElementDamage(WeaponPropertyType.Cracking)
-                if not find:
-                    find, property = _findElementDamage(WeaponPropertyType.Gas)
-                    if not find:
-                        find, property = _findElementDamage(WeaponPropertyType.Ether)
-            elif propertyType == WeaponPropertyType.Cold:
-                find, property = _findElementDamage(WeaponPropertyType.Cracking)
-                if not find:
-                    find, property = _findElementDamage(WeaponPropertyType.Magnetic)
-                    if not find:
-                        find, property = _findElementDamage(WeaponPropertyType.Virus)
-            elif propertyType == WeaponPropertyType.Electric:
-                find, property = _findElementDamage(WeaponPropertyType.Radiation)
-                if not find:
-                    find, property = _findElementDamage(WeaponPropertyType.Magnetic)
-                    if not find:
-                        find, property = _findElementDamage(WeaponPropertyType.Ether)
-            elif propertyType == WeaponPropertyType.Poison:
-                find, property = _findElementDamage(WeaponPropertyType.Virus)
-                if not find:
-                    find, property = _findElementDamage(WeaponPropertyType.Gas)
-                    if not find:
-                        find, property = _findElementDamage(WeaponPropertyType.Radiation)
-            return find, property
-        
-        for weaponProperty in variableElementDamageArray:
-            damageType = weaponProperty.propertyType
-            damageValue = weaponProperty.getValue()
-            # 先检查是否有同类型的元素伤害已经存在
-            find, existingProperty = _findElementDamage(damageType)
-            if find:
-                # 如果有，直接添加到已有的元素伤害上
-                existingProperty += weaponProperty
-                continue
-            # 如果没有，检查是否有该元素参与的复合元素伤害已经存在
-            find, existingProperty = _findElementDamageComposed(damageType)
-            if find:
-                # 如果有，将当前元素伤害加到已有的复合元素伤害上
-                existingProperty += weaponProperty
-                continue
-            # 如果都没有，则检查是否有可复合的元素伤害存在
-            if damageType == WeaponPropertyType.Fire:
-                find, property = _findElementDamage(WeaponPropertyType.Cold)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Cracking)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Electric)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Ether)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Poison)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Gas)
-                    continue
-            elif damageType == WeaponPropertyType.Cold:
-                find, property = _findElementDamage(WeaponPropertyType.Fire)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Cracking)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Electric)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Magnetic)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Poison)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Virus)
-                    continue
-            elif damageType == WeaponPropertyType.Electric:
-                find, property = _findElementDamage(WeaponPropertyType.Fire)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Ether)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Cold)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Magnetic)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Poison)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Radiation)
-                    continue
-            elif damageType == WeaponPropertyType.Poison:
-                find, property = _findElementDamage(WeaponPropertyType.Fire)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Gas)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Cold)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Virus)
-                    continue
-                find, property = _findElementDamage(WeaponPropertyType.Electric)
-                if find:
-                    currentValue = property.getValue()
-                    property.setFinalValue(currentValue + damageValue)
-                    property.switchPropertyType(WeaponPropertyType.Radiation)
-                    continue
-            # 如果都没有，则作为新的元素伤害加入最终伤害数组
-            FinalDamageArray.append(weaponProperty)
-
-        # 那些不参与复合的元素伤害直接加入最终伤害数组
-        for weaponProperty in constantElementDamageArray:
-            FinalDamageArray.append(weaponProperty)
-
+                constantElementDamageArray.append((propertyTypeValue, addon * baseDamage / 100.0))
+        # 将枪械本身的伤害属性添加到复合顺序的末尾，然后从快照中清空
+        for propertyTypeValue in np.flatnonzero(_getDamageArrays(finalDatas) != 0).tolist():
+            value, addon = finalDatas[propertyTypeValue].tolist()
+            variableElementDamageArray.append((propertyTypeValue, value, addon))
+            finalDatas[propertyTypeValue] = 0.0
+        # 按照顺序查表复合元素伤害，见_createElementTransitionTables
+        combinedDamages = {}
+        state = 0
+        for damageType, damageValue, damageAddon in variableElementDamageArray:
+            target = _ELEMENT_TRANSITION_TARGET[damageType, state]
+            source = _ELEMENT_TRANSITION_SOURCE[damageType, state]
+            if source >= 0:
+                combinedDamages[target] = [combinedDamages.pop(source)[0] + damageValue, 0.0]
+            elif target in combinedDamages:
+                combinedDamages[target][0] += damageValue
+                combinedDamages[target][1] += damageAddon
+            else:
+                combinedDamages[target] = [damageValue, damageAddon]
+            state = _ELEMENT_TRANSITION_NEXT_STATE[damageType, state]
         # 计算动能伤害
-        physicalAddon = self.__finalPropertyData.getAddon(WeaponPropertyType.Physics)
+        physicalAddon = finalDatas[WeaponPropertyType.Physics.value, 1]
         if physicalAddon != 0.0:
-            finalPhysicalDamage = baseDamage * physicalAddon / 100.0
-            self.__finalPropertyData.setFinalValue(WeaponPropertyType.Physics, finalPhysicalDamage)
-
+            finalDatas[WeaponPropertyType.Physics.value] = (baseDamage * physicalAddon / 100.0, 0.0)
         # 将最终的元素伤害加入快照
-        for weaponProperty in FinalDamageArray:
-            self.__finalPropertyData += weaponProperty
-
+        for damageType, (value, addon) in combinedDamages.items():
+            finalDatas[damageType, 0] += value
+            finalDatas[damageType, 1] += addon
+        for damageType, value in constantElementDamageArray:
+            finalDatas[damageType, 0] += value
         # 最后将对所有伤害进行AllDamage的加成
-        allDamageAddon = self.__finalPropertyData.getAddon(WeaponPropertyType.AllDamage)
-        for propertyTypeValue in range(11):
-            propertyType = WeaponPropertyType(propertyTypeValue)
-            baseValue = self.__finalPropertyData.getValue(propertyType)
-            if baseValue != 0.0:
-                finalValue = baseValue * (1 + allDamageAddon / 100.0)
-                self.__finalPropertyData.setFinalValue(propertyType, finalValue)
-
+        allDamageAddon = finalDatas[WeaponPropertyType.AllDamage.value, 1]
+        damageDatas = finalDatas[:DAMAGE_TYPE_COUNT]
+        hasDamage = damageDatas[:, 0] != 0.0
+        damageDatas[hasDamage, 0] *= (1 + allDamageAddon / 100.0)
+        damageDatas[hasDamage, 1] = 0.0
+        self.__finalDatas = finalDatas
 
     def applyGhostCardConversion(self, ghostCardCount: int):
         '''
         应用鬼卡的动能转换效果
         '''
-        totalDamage = self.getTotalDamageArray().sum()
-        physicalDamage = self.getTotalDamageArray()[WeaponPropertyType.Physics.value]
-        convertedPhysicalDamage = (totalDamage - physicalDamage) * ghostCardCount + physicalDamage
-        # 清空非动能伤害属性
-        for propertyTypeValue in range(11):
-            propertyType = WeaponPropertyType(propertyTypeValue)
-            self.__finalPropertyData.setFinalValue(propertyType, 0.0)
-        # 设置新的动能伤害属性
-        self.__finalPropertyData.setFinalValue(WeaponPropertyType.Physics, convertedPhysicalDamage)
\ No newline at end of file
+        applyGhostCardConversion(self.__finalDatas[None], np.array([ghostCardCount]))
@@ -0,0 +1,42 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from pynput import keyboard
+
+from .ivtdps import DPSRequest
+from .ivtweapon import Weapon
+from .ivtcard import WeaponCardRiven, WeaponCardBase
+
+class UISignals(QObject):
+    '''
+    全局UI使用的信号类
+    '''
+    weaponChanged = pyqtSignal(Weapon)
+    rivenCardChanged = pyqtSignal(WeaponCardRiven)
+    addRivenCard = pyqtSignal(WeaponCardRiven)
+    miniCardSelected = pyqtSignal(WeaponCardBase)
+    cardSlotSelected = pyqtSignal(int)
+    weaponBuildRequestChanged = pyqtSignal()
+    dpsResultCompleted = pyqtSignal(DPSRequest)
+    dpsMethodChanged = pyqtSignal(int)
+
+class HotkeyListener(QObject):
+    '''
+    全局热键监听类
+    '''
+    homePressed = pyqtSignal()
+    endPressed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.listener = keyboard.Listener(on_press=self.on_press)
+
+    def on_press(self, key):
+        if key == keyboard.Key.home:
+            self.homePressed.emit()
+        elif key == keyboard.Key.end:
+            self.endPressed.emit()
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
@@ -0,0 +1,426 @@
+from .ivtdps import DPSRequest, DeterministicHits, DamageTakenByMaterial, GetDoTMultiplier, GetExternalDamageMultiplier, ACCUMULATOR_EPSILON
+from .ivtdps import GetCriticalMultiplier, WeakArmor, ArmorDamageReduction, VulnerableVirusMultiplier
+from .ivtdebuff import ElementDebuffState
+from .ivtenum import WeaponPropertyType, DamageType, CardSet, SkillDebuff, CharacterPropertyType
+import numpy as np
+import bisect
+import heapq
+import math
+import random
+
+# 默认的模拟战斗时长，单位为秒
+DEFAULT_FIGHT_DURATION = 60.0
+# 元素异常的基础持续时间，单位为秒，实际持续时间再乘以异常持续时间属性
+BASE_DEBUFF_DURATION = 6.0
+# 持续伤害的结算间隔，单位为秒，基础持续时间内的结算总量与DPSRequest中一次计入的持续伤害一致
+DOT_TICK_INTERVAL = 1.0
+
+# 蒙特卡洛模拟默认的试验次数
+DEFAULT_TRIAL_COUNT = 10000
+# 蒙特卡洛模拟分批生成随机数，每批判定数组的元素数量上限
+MONTE_CARLO_BATCH_SIZE = 1 << 20
+# 蒙特卡洛模拟输出的分位数
+MONTE_CARLO_PERCENTILES = (5, 50, 95)
+
+# 同一时刻的事件按以下顺序处理：先移除到期的元素异常，再结算持续伤害，最后才是同一时刻的攻击
+_EVENT_DEBUFF_EXPIRE = 0
+_EVENT_DOT_TICK = 1
+
+class CombatResult:
+    '''
+    一次战斗模拟的结果
+    伤害按发生的时间记录，同一次攻击的所有伤害合并为一条记录
+    '''
+    def __init__(self, fightDuration: float):
+        self.fightDuration = fightDuration
+        self.directDamage = 0.0     # 子弹直接造成的伤害
+        self.dotDamage = 0.0        # 元素异常造成的持续伤害
+        self.attacks = 0            # 攻击次数
+        self.hits = 0               # 造成直接伤害的次数，包括多重射击
+        self.triggers = 0           # 触发元素异常的次数
+        self.reloads = 0            # 换弹次数
+        self.damageTimes = np.zeros(0)      # 每条伤害记录的时间
+        self.damages = np.zeros(0)          # 每条伤害记录的伤害量
+
+    @property
+    def totalDamage(self) -> float:
+        return self.directDamage + self.dotDamage
+
+    @property
+    def sustainedDps(self) -> float:
+        '''
+        整场战斗的平均每秒伤害，计入换弹、元素异常到期和战斗结束时未结算的持续伤害
+        '''
+        return self.totalDamage / self.fightDuration if self.fightDuration > 0 else 0.0
+
+    def getDamageUntil(self, time: float) -> float:
+        '''
+        获取到某一时刻为止（含该时刻）造成的总伤害
+        '''
+        return float(self.damages[:np.searchsorted(self.damageTimes, time, side='right')].sum())
+
+    def getTimeToKill(self, health: float) -> float:
+        '''
+        获取累计伤害达到敌人生命值的时间，战斗结束前无法击杀时返回inf
+        '''
+        cumulative = np.cumsum(self.damages)
+        index = np.searchsorted(cumulative, health - ACCUMULATOR_EPSILON, side='left')
+        if index >= len(cumulative):
+            return math.inf
+        return float(self.damageTimes[index])
+
+class CombatSimulator:
+    '''
+    按时间推进的战斗模拟
+    按攻击速度射击，打空弹匣后换弹，持续多个弹匣直到战斗结束；
+    元素异常按异常持续时间到期，持续伤害按结算间隔逐跳造成，伤害倍率取结算时敌人的状态。
+    攻击时刻可以预先求出，元素异常到期和持续伤害结算放在以时间排序的堆中，与攻击按时间顺序交替处理。
+    暴击、触发和弱点命中的判定规则与DPSRequest的逐发计算一致，判定累加器在整场战斗中连续累加
+    '''
+    def __init__(self, request: DPSRequest, fightDuration: float = DEFAULT_FIGHT_DURATION,
+                 dotTickInterval: float = DOT_TICK_INTERVAL):
+        '''
+        :param request: DPS请求，只读取其中的武器、执行卡、角色和靶标设置，不会修改
+        :param fightDuration: 战斗时长，单位为秒
+        :param dotTickInterval: 持续伤害的结算间隔，单位为秒
+        '''
+        if fightDuration <= 0:
+            raise ValueError(f"战斗时长必须大于0: {fightDuration}")
+        if dotTickInterval <= 0:
+            raise ValueError(f"持续伤害结算间隔必须大于0: {dotTickInterval}")
+        self.request = request
+        self.fightDuration = fightDuration
+        self.dotTickInterval = dotTickInterval
+
+        finalSnapshot = request.createFinalSnapshot()
+        self.weaponDamage = finalSnapshot.getTotalDamageArray()
+        magazine = math.floor(finalSnapshot.getPropertyValue(WeaponPropertyType.MagazineSize))
+        if magazine < 0:
+            magazine = request.getEquivalentMagazine()
+        self.magazine = max(magazine, 1)
+        multiStrike = finalSnapshot.getPropertyValue(WeaponPropertyType.MultiStrike)
+        self.multiStrike = multiStrike if multiStrike > 0 else 1.0
+        self.attackSpeed = finalSnapshot.getPropertyValue(WeaponPropertyType.AttackSpeed)
+        if self.attackSpeed <= 0:
+            raise ValueError(f"武器 '{request.weapon.name}' 的攻击速度必须大于0: {self.attackSpeed}")
+        self.reloadTime = max(finalSnapshot.getPropertyValue(WeaponPropertyType.ReloadTime), 0.0)
+        debuffDuration = finalSnapshot.getPropertyValue(WeaponPropertyType.DebuffDuration)
+        self.debuffDuration = BASE_DEBUFF_DURATION * (debuffDuration / 100.0 if debuffDuration > 0 else 1.0)
+        self.criticalChance = finalSnapshot.getPropertyValue(WeaponPropertyType.CriticalChance) / 100.0
+        self.criticalDamage = finalSnapshot.getPropertyValue(WeaponPropertyType.CriticalDamage) / 100.0
+        self.triggerChance = finalSnapshot.getPropertyValue(WeaponPropertyType.TriggerChance) / 100.0
+        self.headShot = finalSnapshot.getPropertyValue(WeaponPropertyType.Headshot) / 100.0
+        self.externalDamageMultiplier = GetExternalDamageMultiplier(
+            invasionAuraNum=request.cardSetInfo.getCardSetCount(CardSet.Invasion),
+            reverseSetNum=request.cardSetInfo.getCardSetCount(CardSet.Reverse),
+            isMoving=request.moveState.isMoving
+        )
+        # 元素异常的抽取概率，与DPSRequest的解析计算一致
+        elementDamage = self.weaponDamage[WeaponPropertyType.Cold.value:WeaponPropertyType.Virus.value + 1]
+        totalElementDamage = elementDamage.sum()
+        self.cumulativeProbs = np.cumsum(elementDamage / totalElementDamage).tolist() if totalElementDamage != 0 else []
+
+    def getAttackSchedule(self) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        求出战斗中每次攻击的时刻和造成伤害的次数
+        每个弹匣内的攻击间隔为攻击速度的倒数，打空弹匣后经过一个攻击间隔和换弹时间开始下一个弹匣，
+        与DPSRequest中平均DPS的换弹周期一致；多重射击的小数部分在弹匣内累加，每个弹匣的总次数与逐发计算一致
+        :return: (攻击时刻, 每次攻击造成伤害的次数)
+        '''
+        cycleTime = self.magazine / self.attackSpeed + self.reloadTime
+        magazineCount = max(math.ceil(self.fightDuration / cycleTime), 1)
+        magazineTimes = np.arange(self.magazine) / self.attackSpeed
+        magazinePellets = np.diff(np.floor(np.arange(self.magazine + 1) * self.multiStrike)).astype(np.int64)
+        attackTimes = (np.arange(magazineCount)[:, np.newaxis] * cycleTime + magazineTimes).ravel()
+        attackPellets = np.tile(magazinePellets, magazineCount)
+        inFight = attackTimes < self.fightDuration
+        return attackTimes[inFight], attackPellets[inFight]
+
+    def _createRolls(self, pelletCount: int) -> tuple[list, list, list, random.Random]:
+        '''
+        生成每次伤害的暴击、弱点命中和触发判定，以及抽取元素异常使用的随机数生成器
+        '''
+        criticalFlags = DeterministicHits(self.criticalChance, pelletCount).tolist()
+        headShotFlags = DeterministicHits(self.request.targetInfo.headShotRate, pelletCount).tolist()
+        triggerFlags = DeterministicHits(self.triggerChance, pelletCount).tolist()
+        return criticalFlags, headShotFlags, triggerFlags, random.Random(0)
+
+    def run(self) -> CombatResult:
+        '''
+        模拟整场战斗
+        '''
+        request = self.request
+        result = CombatResult(self.fightDuration)
+        attackTimes, attackPellets = self.getAttackSchedule()
+        criticalFlags, headShotFlags, triggerFlags, rng = self._createRolls(int(attackPellets.sum()))
+        # 与DPSRequest.calculate一致，战斗开始时清除非常驻的元素异常
+        elementDebuffState: ElementDebuffState = request.targetInfo.elementDebuffState.copy()
+        elementDebuffState.clearDebuff()
+        elementDebuffState.time = 0.0
+        materialDamage = DamageTakenByMaterial(self.weaponDamage, request.targetInfo.material).sum() * self.externalDamageMultiplier
+        # 每跳持续伤害的基础值，基础持续时间内的总量与DPSRequest中一次计入的持续伤害一致
+        dotTickBaseDamage = self.weaponDamage.sum() * self.externalDamageMultiplier * self.dotTickInterval / BASE_DEBUFF_DURATION
+        dotTickCount = max(math.floor(self.debuffDuration / self.dotTickInterval + ACCUMULATOR_EPSILON), 1)
+        headShotMultiplier = 1 + self.headShot
+        cumulativeProbs = self.cumulativeProbs
+        elementCount = len(cumulativeProbs)
+
+        # 抽取的元素异常序号对应的伤害类型和持续伤害倍率
+        elementTypes = [DamageType(index + WeaponPropertyType.Cold.value) for index in range(elementCount)]
+        dotMultipliers = [GetDoTMultiplier(damageType) for damageType in elementTypes]
+
+        # 单发伤害倍率只取决于冰冻、热波、辐射和病毒的层数，按层数缓存，其他元素异常的变化不需要重新计算
+        modifierTypes = {DamageType.Cold.value, DamageType.Fire.value, DamageType.Radiation.value, DamageType.Virus.value}
+        modifierCache = {}
+
+        def _getModifiers() -> tuple:
+            return request._getShotModifiers(criticalChance=self.criticalChance, criticalDamage=self.criticalDamage,
+                                             elementDebuffState=elementDebuffState, cache=modifierCache)
+
+        uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier = _getModifiers()
+        # 事件为(时间, 事件类型, 序号, 数值, 剩余跳数)，到期事件的数值为伤害类型，持续伤害事件的数值为每跳伤害
+        events = []
+        sequence = 0
+        damageTimes, damages = [], []
+        lastCycle = -1
+        cycleTime = self.magazine / self.attackSpeed + self.reloadTime
+
+        def _processEvents(untilTime: float, inclusive: bool):
+            nonlocal uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier, sequence
+            while events and (events[0][0] <= untilTime if inclusive else events[0][0] < untilTime):
+                time, eventType, _, value, remainingTicks = heapq.heappop(events)
+                if eventType == _EVENT_DEBUFF_EXPIRE:
+                    # 到期时刻与元素异常状态中保存的到期时刻由相同的加法得到，不会有浮点误差
+                    elementDebuffState.time = time
+                    elementDebuffState.expireDebuffByDamageType(value)
+                    if value.value in modifierTypes:
+                        uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier = _getModifiers()
+                else:
+                    damage = value * armorReduction * vulnerableVirusMultiplier
+                    result.dotDamage += damage
+                    damageTimes.append(time)
+                    damages.append(damage)
+                    if remainingTicks > 1:
+                        sequence += 1
+                        heapq.heappush(events, (time + self.dotTickInterval, _EVENT_DOT_TICK, sequence, value, remainingTicks - 1))
+
+        pellet = 0
+        for attackTime, pelletCount in zip(attackTimes.tolist(), attackPellets.tolist()):
+            _processEvents(attackTime, inclusive=True)
+            cycle = int(attackTime / cycleTime + ACCUMULATOR_EPSILON)
+            if cycle != lastCycle:
+                result.reloads += 1 if lastCycle >= 0 else 0
+                lastCycle = cycle
+            attackDamage = 0.0
+            for _ in range(pelletCount):
+                damage = materialDamage * armorReduction * vulnerableVirusMultiplier
+                damage *= criticalMultiplier if criticalFlags[pellet] else uncriticalMultiplier
+                if headShotFlags[pellet]:
+                    damage *= headShotMultiplier
+                attackDamage += damage
+                if triggerFlags[pellet] and elementCount:
+                    index = min(bisect.bisect_right(cumulativeProbs, rng.random()), elementCount - 1)
+                    damageType = elementTypes[index]
+                    result.triggers += 1
+                    if dotMultipliers[index] > 0:
+                        sequence += 1
+                        heapq.heappush(events, (attackTime + self.dotTickInterval, _EVENT_DOT_TICK, sequence,
+                                                dotTickBaseDamage * dotMultipliers[index], dotTickCount))
+                    # 所有元素异常的持续时间相同，按触发顺序到期，到期事件只需移除对应元素异常最早的一个
+                    elementDebuffState.time = attackTime
+                    elementDebuffState.addDebuffByDamageType(damageType, self.debuffDuration)
+                    sequence += 1
+                    heapq.heappush(events, (attackTime + self.debuffDuration, _EVENT_DEBUFF_EXPIRE, sequence, damageType, 0))
+                    if damageType.value in modifierTypes:
+                        uncriticalMultiplier, criticalMultiplier, armorReduction, vulnerableVirusMultiplier = _getModifiers()
+                pellet += 1
+            result.attacks += 1
+            result.hits += pelletCount
+            result.directDamage += attackDamage
+            damageTimes.append(attackTime)
+            damages.append(attackDamage)
+        # 最后一次攻击之后，战斗结束之前的持续伤害
+        _processEvents(self.fightDuration, inclusive=False)
+
+        order = np.argsort(damageTimes, kind='stable')
+        result.damageTimes = np.asarray(damageTimes, dtype=np.float64)[order]
+        result.damages = np.asarray(damages, dtype=np.float64)[order]
+        return result
+
+def _describe(values: np.ndarray) -> dict:
+    '''
+    样本的均值、标准差和分位数
+    '''
+    result = {'mean': float(values.mean()), 'std': float(values.std())}
+    for percentile, value in zip(MONTE_CARLO_PERCENTILES, np.percentile(values, MONTE_CARLO_PERCENTILES)):
+        result[f'p{percentile}'] = float(value)
+    return result
+
+class MonteCarloResult:
+    '''
+    蒙特卡洛模拟的结果，每次试验为一个独立的弹匣
+    '''
+    def __init__(self, cumulativeDamages: np.ndarray, shotTimes: np.ndarray, cycleTime: float):
+        '''
+        :param cumulativeDamages: 形状为(试验次数, 弹匣伤害次数)的数组，每次试验到每一发为止的累计伤害
+        :param shotTimes: 每一发伤害在弹匣内的时刻
+        :param cycleTime: 一个弹匣加上换弹的时长
+        '''
+        self.cumulativeDamages = cumulativeDamages
+        self.shotTimes = shotTimes
+        self.cycleTime = cycleTime
+        self.magazineDamages = cumulativeDamages[:, -1] if cumulativeDamages.shape[1] > 0 else np.zeros(len(cumulativeDamages))
+
+    @property
+    def trialCount(self) -> int:
+        return len(self.magazineDamages)
+
+    def getTimeToKill(self, health: float) -> np.ndarray:
+        '''
+        求出每次试验累计伤害达到敌人生命值的时间
+        一个弹匣无法击杀时继续换弹射击，第k次试验的第m个弹匣使用第(k + m) % 试验次数个样本，
+        每次试验用到的弹匣仍然相互独立
+        :return: 形状为(试验次数,)的数组，弹匣伤害全部为0时为inf
+        '''
+        trialCount = self.trialCount
+        if health <= 0:
+            return np.zeros(trialCount)
+        total = self.magazineDamages.sum()
+        if trialCount == 0 or total <= 0:
+            return np.full(trialCount, math.inf)
+        # 任意连续trialCount个样本的伤害之和都是total，按此确定需要重复的轮数
+        rounds = math.ceil(health / total) + 2
+        prefix = np.concatenate(([0.0], np.cumsum(np.tile(self.magazineDamages, rounds))))
+        starts = np.arange(trialCount)
+        ends = np.searchsorted(prefix, prefix[starts] + health - ACCUMULATOR_EPSILON, side='left')
+        # 造成致命伤害的弹匣及其之前打空的弹匣数量
+        lastMagazine = ends - 1
+        fullMagazines = lastMagazine - starts
+        remaining = health - (prefix[lastMagazine] - prefix[starts])
+        samples = lastMagazine % trialCount
+        shots = (self.cumulativeDamages[samples] < (remaining - ACCUMULATOR_EPSILON)[:, np.newaxis]).sum(axis=1)
+        shots = np.minimum(shots, len(self.shotTimes) - 1)
+        return fullMagazines * self.cycleTime + self.shotTimes[shots]
+
+    def getSummary(self, health: float = None) -> dict:
+        '''
+        汇总弹匣伤害的均值、标准差和P5/P50/P95分位数，指定生命值时另外汇总击杀时间
+        '''
+        summary = {'trials': self.trialCount, 'magazineDamage': _describe(self.magazineDamages)}
+        if health is not None:
+            summary['timeToKill'] = dict(health=health, **_describe(self.getTimeToKill(health)))
+        return summary
+
+class MonteCarloSimulator(CombatSimulator):
+    '''
+    以随机判定模拟大量独立的弹匣，得到弹匣伤害的分布
+    暴击、触发、弱点命中和元素异常的抽取都按几率随机判定，而不是使用确定性累加器；
+    其余规则与DPSRequest的逐发计算一致：弹匣内的元素异常不会到期，持续伤害在触发时按触发前的敌人状态一次计入。
+    每批试验的所有判定一次生成，敌人状态由之前触发的次数累加得到，整个弹匣按数组批量计算
+    '''
+    def __init__(self, request: DPSRequest, trialCount: int = DEFAULT_TRIAL_COUNT, seed: int = 0):
+        '''
+        :param request: DPS请求，只读取其中的武器、执行卡、角色和靶标设置，不会修改
+        :param trialCount: 模拟的弹匣数量
+        :param seed: 随机数种子，相同种子的结果相同，比较不同配卡时使用同一种子可以减小误差
+        '''
+        super().__init__(request)
+        if trialCount <= 0:
+            raise ValueError(f"试验次数必须大于0: {trialCount}")
+        self.trialCount = trialCount
+        self.seed = seed
+        # 只模拟一个弹匣
+        self.fightDuration = self.magazine / self.attackSpeed
+
+    def _createStateTables(self) -> tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        单发倍率只取决于冰冻、热波、辐射和病毒的层数，层数有上限，预先求出每种层数组合下的倍率
+        :return: (各元素异常的(抽取序号, 常驻层数, 层数上限)，层数不会变化时为None, 未暴击倍率表, 暴击倍率表, 敌人状态倍率表)
+        '''
+        request = self.request
+        constantCounts, maxCounts = request.targetInfo.elementDebuffState.getCountLimits()
+        probabilities = np.diff(np.concatenate(([0.0], self.cumulativeProbs)))
+        debuffs, grids = [], []
+        for damageType in (DamageType.Cold, DamageType.Fire, DamageType.Radiation, DamageType.Virus):
+            index = damageType.value - WeaponPropertyType.Cold.value
+            constantCount = min(constantCounts[damageType.value], maxCounts[damageType.value])
+            if index < len(probabilities) and probabilities[index] > 0 and constantCount < maxCounts[damageType.value]:
+                debuffs.append((index, constantCount, maxCounts[damageType.value]))
+                grids.append(np.arange(maxCounts[damageType.value] + 1))
+            else:
+                debuffs.append(None)
+                grids.append(np.array([constantCount]))
+        coldCounts, fireCounts, radiationCounts, virusCounts = (grid.ravel() for grid in np.meshgrid(*grids, indexing='ij'))
+        uncriticalMultiplier, criticalMultiplier = GetCriticalMultiplier(
+            criticalChance=self.criticalChance,
+            criticalDamage=self.criticalDamage,
+            coldDebuff=coldCounts
+        )
+        realArmor = WeakArmor(
+            armor=request.targetInfo.armor,
+            radiationCount=radiationCounts,
+            fireCount=fireCounts,
+            useNianSkill=request.targetInfo.getSkillDebuff(SkillDebuff.Qianyinfeidan) > 0,
+            NianSkillStrength=request.characterInfo.getCharacterProperty(CharacterPropertyType.SkillStrength)
+        )
+        stateMultiplier = ArmorDamageReduction(realArmor) * VulnerableVirusMultiplier(virusCounts)
+        shape = len(coldCounts)
+        return (debuffs, np.broadcast_to(uncriticalMultiplier, shape), np.broadcast_to(criticalMultiplier, shape),
+                np.broadcast_to(stateMultiplier, shape))
+
+    def _simulateBatch(self, rng: np.random.Generator, trialCount: int, shotCount: int, tables: tuple) -> np.ndarray:
+        '''
+        模拟一批弹匣
+        :return: 形状为(trialCount, shotCount)的数组，每一发造成的伤害，包括触发的持续伤害
+        '''
+        debuffs, uncriticalTable, criticalTable, stateTable = tables
+        shape = (trialCount, shotCount)
+        # 暴击几率超过100%时，未暴击和暴击分别对应相邻的两级暴击，按小数部分判定是否为高一级
+        criticalChance = self.criticalChance
+        criticalRate = criticalChance - math.floor(criticalChance) if criticalChance > 1.0 else criticalChance
+        criticalFlags = rng.random(shape, dtype=np.float32) < criticalRate
+        headShotFlags = rng.random(shape, dtype=np.float32) < self.request.targetInfo.headShotRate
+        elementCount = len(self.cumulativeProbs)
+        if elementCount:
+            triggerFlags = rng.random(shape, dtype=np.float32) < self.triggerChance
+            elementIndex = np.minimum(np.searchsorted(self.cumulativeProbs, rng.random(shape, dtype=np.float32), side='right'), elementCount - 1)
+        else:
+            triggerFlags = np.zeros(shape, dtype=bool)
+            elementIndex = np.zeros(shape, dtype=np.int64)
+
+        # 由每一发之前的触发次数求出敌人状态在倍率表中的序号
+        stateIndex = np.zeros(shape, dtype=np.int64)
+        for debuff in debuffs:
+            if debuff is None:
+                continue
+            index, constantCount, maxCount = debuff
+            drawn = triggerFlags & (elementIndex == index)
+            stateIndex *= maxCount + 1
+            stateIndex += np.minimum(np.cumsum(drawn, axis=1, dtype=np.int32) - drawn + constantCount, maxCount)
+        stateMultiplier = stateTable[stateIndex]
+
+        materialDamage = DamageTakenByMaterial(self.weaponDamage, self.request.targetInfo.material).sum() * self.externalDamageMultiplier
+        shotDamage = materialDamage * stateMultiplier * np.where(criticalFlags, criticalTable[stateIndex], uncriticalTable[stateIndex])
+        shotDamage *= np.where(headShotFlags, 1 + self.headShot, 1.0)
+        # 持续伤害与DPSRequest一致，在触发时按触发前的敌人状态一次计入
+        if elementCount:
+            dotMultipliers = np.array([GetDoTMultiplier(DamageType(index + WeaponPropertyType.Cold.value)) for index in range(elementCount)])
+            dotDamage = self.weaponDamage.sum() * self.externalDamageMultiplier * dotMultipliers[elementIndex] * stateMultiplier
+            shotDamage += np.where(triggerFlags, dotDamage, 0.0)
+        return shotDamage
+
+    def run(self) -> MonteCarloResult:
+        '''
+        模拟所有试验
+        '''
+        attackTimes, attackPellets = self.getAttackSchedule()
+        shotTimes = np.repeat(attackTimes, attackPellets)
+        shotCount = len(shotTimes)
+        rng = np.random.default_rng(self.seed)
+        tables = self._createStateTables()
+        cumulativeDamages = np.empty((self.trialCount, shotCount))
+        batchSize = max(MONTE_CARLO_BATCH_SIZE // max(shotCount, 1), 1)
+        for start in range(0, self.trialCount, batchSize):
+            end = min(start + batchSize, self.trialCount)
+            np.cumsum(self._simulateBatch(rng, end - start, shotCount, tables), axis=1, out=cumulativeDamages[start:end])
+        return MonteCarloResult(cumulativeDamages, shotTimes, self.magazine / self.attackSpeed + self.reloadTime)
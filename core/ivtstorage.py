@@ -0,0 +1,143 @@
+import atexit
+import json
+import os
+import threading
+
+# 修改数据后延迟写回文件的时间，单位为秒，期间的连续修改合并为一次写入
+WRITE_BEHIND_DELAY = 0.5
+
+# 所有数据文件，进程退出时写回其中未保存的修改
+_ALL_STORES: list['JsonListStore'] = []
+
+class JsonListStore:
+    '''
+    以JSON数组保存的数据文件
+    第一次修改时读取整个文件，之后所有条目保存在内存中，修改只改动内存中的条目并标记为待写入，
+    在WRITE_BEHIND_DELAY秒后由后台线程合并写回，也可以调用flush立即写回，进程退出时会写回所有未保存的修改
+    写回时先写入同目录下的临时文件再替换原文件，写入中断不会破坏原文件
+    '''
+    def __init__(self, path: str, delay: float = WRITE_BEHIND_DELAY):
+        '''
+        :param path: 数据文件路径
+        :param delay: 延迟写回的时间，为0时每次修改后立即写回
+        '''
+        self.path = path
+        self.delay = delay
+        self._items: list[dict] | None = None
+        self._dirty = False
+        self._timer: threading.Timer | None = None
+        self._lock = threading.RLock()
+        _ALL_STORES.append(self)
+
+    def _loadItems(self) -> list[dict]:
+        '''
+        读取数据文件，文件不存在时视为空数组，内容不是数组时抛出ValueError
+        '''
+        if self._items is None:
+            # 之后的写回都使用第一次读取时的位置，不受工作目录变化的影响
+            self.path = os.path.abspath(self.path)
+            items = []
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    content = file.read()
+                if content:
+                    items = json.loads(content)
+                if not isinstance(items, list):
+                    raise ValueError(f"数据文件的内容不是数组: {self.path}")
+            self._items = items
+        return self._items
+
+    def getItems(self) -> list[dict]:
+        '''
+        获取所有条目的副本
+        '''
+        with self._lock:
+            return list(self._loadItems())
+
+    def append(self, item: dict):
+        '''
+        添加一个条目
+        '''
+        with self._lock:
+            self._loadItems().append(item)
+            self._markDirty()
+
+    def replace(self, predicate, item: dict):
+        '''
+        用item替换第一个满足条件的条目，位置不变，其余满足条件的条目被删除；没有满足条件的条目时添加到末尾
+        :param predicate: 参数为条目、返回是否替换的函数
+        '''
+        with self._lock:
+            items = self._loadItems()
+            index = next((i for i, otherItem in enumerate(items) if predicate(otherItem)), None)
+            if index is None:
+                items.append(item)
+            else:
+                self._items = items[:index] + [item] + [otherItem for otherItem in items[index + 1:] if not predicate(otherItem)]
+            self._markDirty()
+
+    def remove(self, predicate) -> int:
+        '''
+        删除所有满足条件的条目
+        :param predicate: 参数为条目、返回是否删除的函数
+        :return: 删除的条目数量
+        '''
+        with self._lock:
+            items = self._loadItems()
+            remaining = [item for item in items if not predicate(item)]
+            removedCount = len(items) - len(remaining)
+            if removedCount:
+                self._items = remaining
+                self._markDirty()
+            return removedCount
+
+    def _markDirty(self):
+        self._dirty = True
+        if self.delay <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.delay, self._onTimer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _onTimer(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self) -> bool:
+        '''
+        立即写回未保存的修改
+        :return: 是否写回成功，没有未保存的修改时返回True
+        '''
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            tempPath = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tempPath, 'w', encoding='utf-8') as file:
+                    json.dump(self._items, file, ensure_ascii=False, indent=4)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tempPath, self.path)
+            except OSError as e:
+                print(f"保存数据文件失败: {self.path}: {e}")
+                if os.path.exists(tempPath):
+                    os.remove(tempPath)
+                return False
+            self._dirty = False
+            return True
+
+def flushAllStores() -> bool:
+    '''
+    立即写回所有数据文件中未保存的修改
+    '''
+    succeeded = True
+    for store in _ALL_STORES:
+        succeeded = store.flush() and succeeded
+    return succeeded
+
+atexit.register(flushAllStores)
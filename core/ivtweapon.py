@@ -1,5 +1,6 @@
 from .ivtenum import *
 from .ivtproperty import WeaponPropertySnapshot
+import numpy as np
 import copy
 
 class Weapon:
@@ -12,9 +13,48 @@ class Weapon:
         self.weaponType = weaponType
         self.subWeaponType = subWeaponType
         self.snapshot = snapshot
+        self._basePropertyArray = None
 
     def getBaseSnapshot(self) -> WeaponPropertySnapshot:
         '''
         获取武器的基础属性快照
         '''
-        return copy.deepcopy(self.snapshot)
\ No newline at end of file
+        return copy.deepcopy(self.snapshot)
+
+    def getBasePropertyArray(self) -> np.ndarray:
+        '''
+        获取计算配卡时使用的武器基础属性数组，形状为(len(WeaponPropertyType), 2)
+        基础值为基础属性快照中各属性的最终值，加成值为0，结果会被缓存，调用者不能修改
+        '''
+        if self._basePropertyArray is None:
+            baseArray = np.zeros((len(WeaponPropertyType), 2), dtype=np.float64)
+            for weaponProperty in WeaponPropertyType:
+                baseArray[weaponProperty.value, 0] = self.snapshot.getPropertyValue(weaponProperty)
+            self._basePropertyArray = baseArray
+        return self._basePropertyArray
+
+    def validate(self) -> list[str]:
+        '''
+        检查武器基础属性是否能够用于DPS计算，只检查数值本身，不执行计算
+        :return: 发现的问题，没有问题时为空列表
+        '''
+        baseValues = self.getBasePropertyArray()[:, 0]
+        problems = []
+        if not np.all(np.isfinite(baseValues)):
+            problems.append("存在非有限的属性值")
+        if baseValues[:WeaponPropertyType.Virus.value + 1].sum() <= 0:
+            problems.append("没有伤害属性")
+        if np.any(baseValues[:WeaponPropertyType.Virus.value + 1] < 0):
+            problems.append("伤害属性为负数")
+        if baseValues[WeaponPropertyType.AttackSpeed.value] <= 0:
+            problems.append("攻击速度不是正数")
+        # 弹匣容量为-1表示无弹药限制，会按子武器类型等效
+        magazine = baseValues[WeaponPropertyType.MagazineSize.value]
+        if magazine != -1 and magazine < 1:
+            problems.append("弹匣容量小于1")
+        if baseValues[WeaponPropertyType.ReloadTime.value] < 0:
+            problems.append("装填时间为负数")
+        for propertyType in (WeaponPropertyType.CriticalChance, WeaponPropertyType.CriticalDamage, WeaponPropertyType.TriggerChance):
+            if baseValues[propertyType.value] < 0:
+                problems.append(f"{propertyType}为负数")
+        return problems
@@ -0,0 +1,169 @@
+from .ivtcard import WeaponCardBase
+from .ivtdps import DPSRequest, DPSBatch, MoveState, CardSetInfo, CharacterInfo, TargetInfo
+from .ivtenum import DPSMetric, SubWeaponType, SubWeaponTypeToMagazine
+from .ivtoptimizer import LoadoutSolver, LoadoutResult
+from .ivtweapon import Weapon
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import copy
+import os
+
+# 每个批量计算任务包含的配卡数量，任务过小时进程间通信的开销会超过计算本身
+EVALUATE_CHUNK_SIZE = 2000
+
+# 工作进程中的只读执行卡和武器表，由进程初始化函数设置，每个工作进程只接收一次
+_WORKER_CARDS: list[WeaponCardBase] = None
+_WORKER_WEAPONS: list[Weapon] = None
+
+class WorkerSettings:
+    '''
+    发送给工作进程的计算设置，包括行动状态、套装、角色、靶标和无弹药限制武器的等效弹匣容量
+    工作进程中没有全局上下文，等效弹匣容量由该对象代为提供
+    '''
+    def __init__(self):
+        self.moveState = MoveState()
+        self.cardSetInfo = CardSetInfo()
+        self.characterInfo = CharacterInfo()
+        self.targetInfo = TargetInfo()
+        self.subWeaponTypeMagazine = dict(SubWeaponTypeToMagazine)
+
+    @classmethod
+    def fromRequest(cls, request: DPSRequest) -> 'WorkerSettings':
+        '''
+        从DPS请求中复制计算设置，请求中的武器和执行卡会被忽略
+        '''
+        settings = cls()
+        settings.moveState = copy.deepcopy(request.moveState)
+        settings.cardSetInfo = copy.deepcopy(request.cardSetInfo)
+        settings.characterInfo = copy.deepcopy(request.characterInfo)
+        settings.targetInfo = request.targetInfo.copy()
+        if request.context is not None:
+            settings.subWeaponTypeMagazine = {subWeaponType: request.context.getSubWeaponTypeMagazine(subWeaponType) for subWeaponType in SubWeaponType}
+        return settings
+
+    def getSubWeaponTypeMagazine(self, subWeaponType: SubWeaponType) -> int:
+        '''
+        获取子武器类型的弹匣容量等效值，与IVTContext的同名方法一致
+        '''
+        return self.subWeaponTypeMagazine.get(subWeaponType, 30)
+
+    def createRequest(self, weapon: Weapon, cards: list[WeaponCardBase]) -> DPSRequest:
+        '''
+        使用该设置创建DPS请求
+        '''
+        request = DPSRequest(weapon, list(cards) + [None] * (9 - len(cards)), context=self)
+        request.moveState = self.moveState
+        request.cardSetInfo = self.cardSetInfo
+        request.characterInfo = self.characterInfo
+        request.targetInfo = self.targetInfo.copy()
+        return request
+
+def _initWorker(cards: list[WeaponCardBase], weapons: list[Weapon]):
+    '''
+    工作进程的初始化函数，保存只读的执行卡和武器表
+    '''
+    global _WORKER_CARDS, _WORKER_WEAPONS
+    _WORKER_CARDS = cards
+    _WORKER_WEAPONS = weapons
+
+def _evaluateBuilds(weaponIndex: int, builds: list[tuple], settings: WorkerSettings) -> np.ndarray:
+    '''
+    在工作进程中批量计算一组配卡，配卡以执行卡表中的序号表示
+    :return: 形状为(N, len(DPSMetric))的指标值
+    '''
+    weapon = _WORKER_WEAPONS[weaponIndex]
+    requests = [settings.createRequest(weapon, [_WORKER_CARDS[index] for index in build]) for build in builds]
+    batch = DPSBatch.fromRequests(requests)
+    batch.calculate()
+    return np.stack([batch.getMetricValue(metric) for metric in DPSMetric], axis=1)
+
+def _solveLoadout(weaponIndex: int, cardIndices: list[int] | None, metric: DPSMetric, settings: WorkerSettings, slotCount: int) -> tuple:
+    '''
+    在工作进程中为一把武器求解最优配卡
+    :return: 最优配卡在执行卡表中的序号、计算过的配卡数量和求解耗时
+    '''
+    weapon = _WORKER_WEAPONS[weaponIndex]
+    cards = _WORKER_CARDS if cardIndices is None else [_WORKER_CARDS[index] for index in cardIndices]
+    result = LoadoutSolver(settings.createRequest(weapon, []), cards, metric, slotCount).solve()
+    cardIndex = {id(card): index for index, card in enumerate(_WORKER_CARDS)}
+    return [cardIndex[id(card)] for card in result.cards], result.evaluatedCount, result.elapsed
+
+class BuildSearchPool:
+    '''
+    多进程配卡计算池
+    执行卡和武器表在创建时通过进程初始化函数发送给每个工作进程，之后的任务只传递序号和计算设置
+    创建之后新增或删除的执行卡不会同步到工作进程，需要重新创建计算池
+    '''
+    def __init__(self, cards: list[WeaponCardBase], weapons: list[Weapon], maxWorkers: int = None):
+        '''
+        :param cards: 执行卡表
+        :param weapons: 武器表
+        :param maxWorkers: 工作进程数量，默认为CPU核心数
+        '''
+        self.cards = list(cards)
+        self.weapons = list(weapons)
+        self._cardIndex = {id(card): index for index, card in enumerate(self.cards)}
+        self._weaponIndex = {id(weapon): index for index, weapon in enumerate(self.weapons)}
+        # 界面进程中已经有Qt和热键监听线程，使用spawn启动工作进程，避免fork复制这些状态
+        self._executor = ProcessPoolExecutor(max_workers=maxWorkers or os.cpu_count(),
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_initWorker, initargs=(self.cards, self.weapons))
+
+    def __enter__(self) -> 'BuildSearchPool':
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True):
+        '''
+        关闭计算池
+        '''
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _getWeaponIndex(self, weapon: Weapon) -> int:
+        if id(weapon) not in self._weaponIndex:
+            raise ValueError(f"武器不在计算池中: {weapon.name}")
+        return self._weaponIndex[id(weapon)]
+
+    def _getCardIndices(self, cards: list[WeaponCardBase]) -> tuple:
+        indices = []
+        for card in cards:
+            if id(card) not in self._cardIndex:
+                raise ValueError(f"执行卡不在计算池中: {card.name}")
+            indices.append(self._cardIndex[id(card)])
+        return tuple(indices)
+
+    def evaluateBuilds(self, weapon: Weapon, builds: list[list[WeaponCardBase]], settings: WorkerSettings,
+                       chunkSize: int = EVALUATE_CHUNK_SIZE) -> np.ndarray:
+        '''
+        分块并行计算一把武器的多套配卡
+        :param builds: 每套配卡按卡槽顺序排列的执行卡
+        :return: 形状为(N, len(DPSMetric))的指标值，列顺序与DPSMetric一致
+        '''
+        weaponIndex = self._getWeaponIndex(weapon)
+        builds = [self._getCardIndices(build) for build in builds]
+        futures = [self._executor.submit(_evaluateBuilds, weaponIndex, builds[begin:begin + chunkSize], settings)
+                   for begin in range(0, len(builds), chunkSize)]
+        if not futures:
+            return np.zeros((0, len(DPSMetric)))
+        return np.concatenate([future.result() for future in futures])
+
+    def solveLoadouts(self, weapons: list[Weapon], settings: WorkerSettings, metric: DPSMetric = DPSMetric.AverageDps,
+                      cards: list[WeaponCardBase] = None, slotCount: int = 8) -> list[LoadoutResult]:
+        '''
+        并行为多把武器求解最优配卡，每把武器一个任务
+        :param cards: 候选执行卡，默认为计算池中的所有执行卡
+        :return: 与weapons顺序一致的求解结果，结果中的执行卡和武器均为本进程中的对象
+        '''
+        cardIndices = None if cards is None else list(self._getCardIndices(cards))
+        futures = [self._executor.submit(_solveLoadout, self._getWeaponIndex(weapon), cardIndices, metric, settings, slotCount)
+                   for weapon in weapons]
+        results = []
+        for weapon, future in zip(weapons, futures):
+            indices, evaluatedCount, elapsed = future.result()
+            request = settings.createRequest(weapon, [self.cards[index] for index in indices])
+            request.calculate()
+            results.append(LoadoutResult(request, metric, request.getMetricValue(metric), evaluatedCount, elapsed))
+        return results
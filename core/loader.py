@@ -1,24 +1,189 @@
+import copy
 import json
 import os
-from .ivtcard import WeaponCardCommon, WeaponCardRiven, WeaponCardSpecial
+import hashlib
+import zipfile
+import sqlite3
+import numpy as np
+from .ivtcard import WeaponCardBase, WeaponCardCommon, WeaponCardRiven, WeaponCardSpecial, isCardCompatibleWithWeapon
 from .ivtenum import WeaponPropertyType, WeaponType, SubWeaponType, CardSet, Slot, SubWeaponTypeToMagazine
-from .ivtproperty import WeaponProperty
+from .ivtproperty import WeaponProperty, WeaponPropertySnapshot
 from .ivtweapon import Weapon
+from .ivtstorage import JsonListStore
+from .ivtdatabase import SqliteLibrary, CARD_KIND_COMMON, CARD_KIND_RIVEN, CARD_KIND_SPECIAL
 
 COMMON_CARD_JSON_PATH = 'data/cards.json'
 RIVEN_CARD_JSON_PATH = 'data/rivens.json'
 SPECIAL_CARD_JSON_PATH = 'data/specials.json'
 WEAPON_JSON_PATH = 'data/weapons.json'
 
+# 预编译的数据缓存，由对应的JSON文件生成，源文件变化后自动重新生成
+COMPILED_CARD_CACHE_PATH = 'data/cards.compiled.npz'
+COMPILED_WEAPON_CACHE_PATH = 'data/weapons.compiled.npz'
+# 缓存格式版本，修改缓存内容时递增，旧版本的缓存会被重新生成
+COMPILED_CACHE_VERSION = 1
+USE_COMPILED_CACHE = True
+
 ALL_CARDS = None
 ALL_WEAPONS = None
 
 def load_cards():
     global ALL_CARDS
     if ALL_CARDS is None:
-        ALL_CARDS = _load_common_cards() + _load_riven_cards() + _load_special_cards()
+        if _SQLITE_LIBRARY is not None:
+            ALL_CARDS = _get_sqlite_cards(_SQLITE_LIBRARY.getCards())
+        else:
+            ALL_CARDS = _load_compiled_cards()
     return ALL_CARDS
 
+def _get_source_stats(sourcePaths: list[str]) -> np.ndarray:
+    '''
+    获取源文件的修改时间和大小，形状为(N, 2)，不存在的文件记为-1
+    '''
+    stats = []
+    for path in sourcePaths:
+        try:
+            stat = os.stat(path)
+            stats.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stats.append((-1, -1))
+    return np.array(stats, dtype=np.int64).reshape(len(sourcePaths), 2)
+
+def _get_source_hashes(sourcePaths: list[str]) -> np.ndarray:
+    '''
+    计算源文件内容的哈希值，不存在的文件记为空字符串
+    '''
+    hashes = []
+    for path in sourcePaths:
+        try:
+            with open(path, 'rb') as file:
+                hashes.append(hashlib.sha1(file.read()).hexdigest())
+        except OSError:
+            hashes.append('')
+    return np.array(hashes, dtype=str)
+
+def _read_compiled_cache(cachePath: str, sourcePaths: list[str]) -> dict | None:
+    '''
+    读取预编译的数据缓存，缓存不存在、损坏或与源文件不一致时返回None
+    源文件的修改时间和大小与缓存记录一致时直接使用，否则再比较内容的哈希值
+    '''
+    if not USE_COMPILED_CACHE or not os.path.exists(cachePath):
+        return None
+    try:
+        with np.load(cachePath, allow_pickle=False) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+        if int(arrays['version']) != COMPILED_CACHE_VERSION or arrays['sources'].tolist() != list(sourcePaths):
+            return None
+        if np.array_equal(arrays['sourceStats'], _get_source_stats(sourcePaths)):
+            return arrays
+        if np.array_equal(arrays['sourceHashes'], _get_source_hashes(sourcePaths)):
+            return arrays
+        return None
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        print(f"读取数据缓存失败，将重新生成: {e}")
+        return None
+
+def _write_compiled_cache(cachePath: str, sourcePaths: list[str], arrays: dict):
+    '''
+    写入预编译的数据缓存，先写入临时文件再替换，避免其他进程读到不完整的缓存
+    '''
+    if not USE_COMPILED_CACHE:
+        return
+    arrays = dict(arrays)
+    arrays['version'] = np.array(COMPILED_CACHE_VERSION)
+    arrays['sources'] = np.array(sourcePaths, dtype=str)
+    arrays['sourceStats'] = _get_source_stats(sourcePaths)
+    arrays['sourceHashes'] = _get_source_hashes(sourcePaths)
+    tempPath = f"{cachePath}.{os.getpid()}.tmp"
+    try:
+        with open(tempPath, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(tempPath, cachePath)
+    except OSError as e:
+        print(f"写入数据缓存失败: {e}")
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+# 预编译执行卡数据中各整数信息表的列
+COMMON_CARD_INFO_COLUMNS = ('weaponType', 'subWeaponType', 'cardSet', 'slot', 'cost', 'isPrime')
+EXCLUSIVE_CARD_INFO_COLUMNS = ('slot', 'cost')
+
+def _compile_cards(commonCards: list[WeaponCardCommon], rivenCards: list[WeaponCardRiven], specialCards: list[WeaponCardSpecial]) -> dict:
+    '''
+    将执行卡转换为整数信息表、字符串表和属性表，每个数组读取时都有固定开销，因此同类数据合并保存
+    字符串表依次为普通执行卡名称、混淆执行卡名称和武器名称、专属执行卡名称和武器名称
+    属性表中第i张带属性执行卡的属性为properties[propertyOffsets[i]:propertyOffsets[i + 1]]
+    '''
+    packedList = [card.getPackedProperties() for card in commonCards + rivenCards]
+    propertyOffsets = np.zeros(len(packedList) + 1, dtype=np.int64)
+    propertyOffsets[1:] = np.cumsum([len(packed) for packed in packedList])
+    return {
+        'commonInfo': np.array([(card.weaponType.value, card.subWeaponType.value, card.cardSet.value, card.slot.value, card.cost, card.isPrime)
+                                for card in commonCards], dtype=np.int64).reshape(len(commonCards), len(COMMON_CARD_INFO_COLUMNS)),
+        'rivenInfo': np.array([(card.slot.value, card.cost) for card in rivenCards], dtype=np.int64).reshape(len(rivenCards), len(EXCLUSIVE_CARD_INFO_COLUMNS)),
+        'specialInfo': np.array([(card.slot.value, card.cost) for card in specialCards], dtype=np.int64).reshape(len(specialCards), len(EXCLUSIVE_CARD_INFO_COLUMNS)),
+        'strings': np.array([card.name for card in commonCards] + [card.name for card in rivenCards] + [card.weaponName for card in rivenCards]
+                            + [card.name for card in specialCards] + [card.weaponName for card in specialCards], dtype=str),
+        'properties': np.concatenate(packedList) if packedList else np.zeros((0, 3)),
+        'propertyOffsets': propertyOffsets,
+    }
+
+def _create_cards_from_compiled(arrays: dict) -> list:
+    '''
+    由预编译的数据创建执行卡，属性条目在第一次访问时才创建
+    '''
+    commonInfo, rivenInfo, specialInfo = arrays['commonInfo'].tolist(), arrays['rivenInfo'].tolist(), arrays['specialInfo'].tolist()
+    strings = arrays['strings'].tolist()
+    commonNames = strings[:len(commonInfo)]
+    rivenNames = strings[len(commonInfo):len(commonInfo) + len(rivenInfo)]
+    rivenWeaponNames = strings[len(commonInfo) + len(rivenInfo):len(commonInfo) + 2 * len(rivenInfo)]
+    specialNames = strings[len(commonInfo) + 2 * len(rivenInfo):len(commonInfo) + 2 * len(rivenInfo) + len(specialInfo)]
+    specialWeaponNames = strings[len(commonInfo) + 2 * len(rivenInfo) + len(specialInfo):]
+    properties, propertyOffsets = arrays['properties'], arrays['propertyOffsets'].tolist()
+
+    cards = []
+    for name, (weaponType, subWeaponType, cardSet, slot, cost, isPrime) in zip(commonNames, commonInfo):
+        cards.append(WeaponCardCommon(
+            name=name,
+            properties=None,
+            weaponType=WeaponType(weaponType),
+            subWeaponType=SubWeaponType(subWeaponType),
+            cardSet=CardSet(cardSet),
+            slot=Slot(slot),
+            cost=cost,
+            isPrime=bool(isPrime)
+        ))
+    for name, weaponName, (slot, cost) in zip(rivenNames, rivenWeaponNames, rivenInfo):
+        cards.append(WeaponCardRiven(
+            name=name,
+            properties=None,
+            weaponName=weaponName,
+            slot=Slot(slot),
+            cost=cost
+        ))
+    for i, card in enumerate(cards):
+        card.setPackedProperties(properties[propertyOffsets[i]:propertyOffsets[i + 1]])
+    for name, weaponName, (slot, cost) in zip(specialNames, specialWeaponNames, specialInfo):
+        cards.append(WeaponCardSpecial(
+            name=name,
+            weaponName=weaponName,
+            slot=Slot(slot),
+            cost=cost
+        ))
+    return cards
+
+def _load_compiled_cards():
+    '''
+    载入所有执行卡，优先使用预编译的数据缓存，缓存失效时解析JSON并重新生成缓存
+    '''
+    sourcePaths = [COMMON_CARD_JSON_PATH, RIVEN_CARD_JSON_PATH, SPECIAL_CARD_JSON_PATH]
+    arrays = _read_compiled_cache(COMPILED_CARD_CACHE_PATH, sourcePaths)
+    if arrays is not None:
+        return _create_cards_from_compiled(arrays)
+    commonCards, rivenCards, specialCards = _load_common_cards(), _load_riven_cards(), _load_special_cards()
+    _write_compiled_cache(COMPILED_CARD_CACHE_PATH, sourcePaths, _compile_cards(commonCards, rivenCards, specialCards))
+    return commonCards + rivenCards + specialCards
+
 def _load_common_cards():
     try:
         with open(COMMON_CARD_JSON_PATH, 'r', encoding='utf-8') as file:
@@ -27,49 +192,52 @@ def _load_common_cards():
         print(f"载入普通执行卡失败: {e}")
         return []
 
-    common_cards = []
-    for cardData in data:
-        # 解析属性
-        properties = []
-        for propData in cardData.get('properties', []):
-            try:
-                propertyType = WeaponPropertyType[propData['type']]
-                propertyValue = propData['value']
-                properties.append(WeaponProperty.createModProperty(propertyType, propertyValue))
-            except (KeyError, ValueError) as e:
-                print(f"警告: 在卡牌 '{cardData['name']}' 中遇到未知的属性类型 '{propData.get('type')}'。已跳过。")
-                continue
-
-        # 解析武器类型
-        try:
-            weaponType = WeaponType.fromString(cardData.get('mainWeapon', 'All'))
-        except KeyError as e:
-            weaponType = WeaponType.All
+    return [_create_common_card(cardData) for cardData in data]
+
+def _create_common_card(cardData: dict):
+    '''
+    由数据创建普通执行卡
+    '''
+    # 解析属性
+    properties = []
+    for propData in cardData.get('properties', []):
         try:
-            subWeaponType = SubWeaponType.fromString(cardData.get('subWeapon', 'All'))
-        except KeyError as e:
-            subWeaponType = SubWeaponType.All
-
-        # 解析卡牌套装
-        cardSetStr = cardData.get('cardSet')
-        cardSet = CardSet[cardSetStr] if cardSetStr and cardSetStr in CardSet.__members__ else CardSet.Unset
-
-        # 解析极性
-        slotValue = cardData.get('slot', 0)
-        slot = Slot(slotValue)
-
-        card = WeaponCardCommon(
-            name=cardData['name'],
-            properties=properties,
-            weaponType=weaponType,
-            subWeaponType=subWeaponType,
-            cardSet=cardSet,
-            slot=slot,
-            cost=cardData.get('cost', 0),
-            isPrime=cardData.get('isPrime', False)
-        )
-        common_cards.append(card)
-    return common_cards
+            propertyType = WeaponPropertyType[propData['type']]
+            propertyValue = propData['value']
+            properties.append(WeaponProperty.createModProperty(propertyType, propertyValue))
+        except (KeyError, ValueError) as e:
+            print(f"警告: 在卡牌 '{cardData['name']}' 中遇到未知的属性类型 '{propData.get('type')}'。已跳过。")
+            continue
+
+    # 解析武器类型
+    try:
+        weaponType = WeaponType.fromString(cardData.get('mainWeapon', 'All'))
+    except KeyError as e:
+        weaponType = WeaponType.All
+    try:
+        subWeaponType = SubWeaponType.fromString(cardData.get('subWeapon', 'All'))
+    except KeyError as e:
+        subWeaponType = SubWeaponType.All
+
+    # 解析卡牌套装
+    cardSetStr = cardData.get('cardSet')
+    cardSet = CardSet[cardSetStr] if cardSetStr and cardSetStr in CardSet.__members__ else CardSet.Unset
+
+    # 解析极性
+    slotValue = cardData.get('slot', 0)
+    slot = Slot(slotValue)
+
+    card = WeaponCardCommon(
+        name=cardData['name'],
+        properties=properties,
+        weaponType=weaponType,
+        subWeaponType=subWeaponType,
+        cardSet=cardSet,
+        slot=slot,
+        cost=cardData.get('cost', 0),
+        isPrime=cardData.get('isPrime', False)
+    )
+    return card
 
 def _load_riven_cards():
     try:
@@ -79,38 +247,42 @@ def _load_riven_cards():
         print(f"载入裂隙执行卡失败: {e}")
         return []
 
-    riven_cards = []
-    for cardData in data:
-        # 解析属性
-        properties = []
-        for propData in cardData.get('properties', []):
-            try:
-                propertyType = WeaponPropertyType[propData['type']]
-                propertyValue = propData['value']
-                properties.append(WeaponProperty.createModProperty(propertyType, propertyValue))
-            except (KeyError, ValueError) as e:
-                print(f"警告: 在裂隙卡牌 '{cardData['name']}' 中遇到未知的属性类型 '{propData.get('type')}'。已跳过。")
-                continue
-
-        # 解析极性
-        slotValue = cardData.get('slot', 0)
-        slot = Slot(slotValue)
-
-        # 解析武器名称
-        weaponName = cardData.get('weaponName')
-        if not weaponName:
-            print(f"警告: 裂隙卡牌缺少武器名称。已跳过。")
+    riven_cards = [_create_riven_card(cardData) for cardData in data]
+    return [card for card in riven_cards if card is not None]
+
+def _create_riven_card(cardData: dict):
+    '''
+    由数据创建混淆执行卡，数据无效时返回None
+    '''
+    # 解析属性
+    properties = []
+    for propData in cardData.get('properties', []):
+        try:
+            propertyType = WeaponPropertyType[propData['type']]
+            propertyValue = propData['value']
+            properties.append(WeaponProperty.createModProperty(propertyType, propertyValue))
+        except (KeyError, ValueError) as e:
+            print(f"警告: 在裂隙卡牌 '{cardData['name']}' 中遇到未知的属性类型 '{propData.get('type')}'。已跳过。")
             continue
 
-        card = WeaponCardRiven(
-            name=cardData['name'],
-            properties=properties,
-            weaponName=weaponName,
-            slot=slot,
-            cost=cardData.get('cost', 0)
-        )
-        riven_cards.append(card)
-    return riven_cards
+    # 解析极性
+    slotValue = cardData.get('slot', 0)
+    slot = Slot(slotValue)
+
+    # 解析武器名称
+    weaponName = cardData.get('weaponName')
+    if not weaponName:
+        print(f"警告: 裂隙卡牌缺少武器名称。已跳过。")
+        return None
+
+    card = WeaponCardRiven(
+        name=cardData['name'],
+        properties=properties,
+        weaponName=weaponName,
+        slot=slot,
+        cost=cardData.get('cost', 0)
+    )
+    return card
 
 def _load_special_cards():
     try:
@@ -120,27 +292,64 @@ def _load_special_cards():
         print(f"载入专属执行卡失败: {e}")
         return []
 
-    special_cards = []
-    for cardData in data:
-        # 解析极性
-        slotValue = cardData.get('slot', 0)
-        slot = Slot(slotValue)
-
-        card = WeaponCardSpecial(
-            name=cardData['name'],
-            weaponName=cardData['weaponName'],
-            slot=slot,
-            cost=cardData.get('cost', 0)
-        )
-        special_cards.append(card)
-    return special_cards
+    return [_create_special_card(cardData) for cardData in data]
+
+def _create_special_card(cardData: dict):
+    '''
+    由数据创建专属执行卡
+    '''
+    # 解析极性
+    slotValue = cardData.get('slot', 0)
+    slot = Slot(slotValue)
+
+    card = WeaponCardSpecial(
+        name=cardData['name'],
+        weaponName=cardData['weaponName'],
+        slot=slot,
+        cost=cardData.get('cost', 0)
+    )
+    return card
 
 def load_weapons():
     global ALL_WEAPONS
     if ALL_WEAPONS is None:
-        ALL_WEAPONS = _load_weapon_data()
+        if _SQLITE_LIBRARY is not None:
+            ALL_WEAPONS = _get_sqlite_weapons(_SQLITE_LIBRARY.getWeapons())
+        else:
+            ALL_WEAPONS = _load_compiled_weapons()
     return ALL_WEAPONS
 
+def _load_compiled_weapons():
+    '''
+    载入所有武器，优先使用预编译的数据缓存，缓存失效时解析JSON并重新生成缓存
+    缓存中保存武器的基础属性和最终属性数组，直接用于创建属性快照
+    '''
+    sourcePaths = [WEAPON_JSON_PATH]
+    arrays = _read_compiled_cache(COMPILED_WEAPON_CACHE_PATH, sourcePaths)
+    if arrays is not None:
+        weaponInfo = arrays['weaponInfo'].tolist()
+        strings = arrays['strings'].tolist()
+        baseDatas, finalDatas = arrays['baseDatas'], arrays['finalDatas']
+        weapons = []
+        for i, (weaponType, subWeaponType) in enumerate(weaponInfo):
+            weapons.append(Weapon(
+                name=strings[i],
+                basename=strings[len(weaponInfo) + i],
+                weaponType=WeaponType(weaponType),
+                subWeaponType=SubWeaponType(subWeaponType),
+                snapshot=WeaponPropertySnapshot.fromPropertyArrays(baseDatas[i], finalDatas[i])
+            ))
+        return weapons
+    weapons = _load_weapon_data()
+    propertyShape = (len(weapons), len(WeaponPropertyType), 2)
+    _write_compiled_cache(COMPILED_WEAPON_CACHE_PATH, sourcePaths, {
+        'weaponInfo': np.array([(weapon.weaponType.value, weapon.subWeaponType.value) for weapon in weapons], dtype=np.int64).reshape(len(weapons), 2),
+        'strings': np.array([weapon.name for weapon in weapons] + [weapon.basename for weapon in weapons], dtype=str),
+        'baseDatas': np.array([weapon.snapshot.getBasePropertyArray() for weapon in weapons]).reshape(propertyShape),
+        'finalDatas': np.array([weapon.snapshot.getPropertyArray() for weapon in weapons]).reshape(propertyShape),
+    })
+    return weapons
+
 def _load_weapon_data():
     try:
         with open(WEAPON_JSON_PATH, 'r', encoding='utf-8') as file:
@@ -149,92 +358,203 @@ def _load_weapon_data():
         print(f"载入武器数据失败: {e}")
         return []
 
-    from .ivtweapon import Weapon
-    from .ivtproperty import WeaponPropertySnapshot
+    return [_create_weapon(weaponData) for weaponData in data]
 
-    weapons = []
-    for weaponData in data:
-        try:
-            weaponType = WeaponType.fromString(weaponData.get('weaponType', 'All'))
-        except KeyError as e:
-            weaponType = WeaponType.All
+def _create_weapon(weaponData: dict):
+    '''
+    由数据创建武器
+    '''
+    try:
+        weaponType = WeaponType.fromString(weaponData.get('weaponType', 'All'))
+    except KeyError as e:
+        weaponType = WeaponType.All
+    try:
+        subWeaponType = SubWeaponType.fromString(weaponData.get('subWeaponType', 'All'))
+    except KeyError as e:
+        subWeaponType = SubWeaponType.All
+
+    name = weaponData['name']
+    basename = weaponData['basename']
+
+    # 解析属性
+    # 对于弱点伤害属性需要特殊处理，确保每把武器都有该属性
+    properties = []
+    bSetHeadshot = False
+    for propData in weaponData.get('properties', []):
         try:
-            subWeaponType = SubWeaponType.fromString(weaponData.get('subWeaponType', 'All'))
-        except KeyError as e:
-            subWeaponType = SubWeaponType.All
-
-        name = weaponData['name']
-        basename = weaponData['basename']
-
-        # 解析属性
-        # 对于弱点伤害属性需要特殊处理，确保每把武器都有该属性
-        properties = []
-        bSetHeadshot = False
-        for propData in weaponData.get('properties', []):
-            try:
-                propertyType = WeaponPropertyType[propData['type']]
-                propertyValue = propData['value']
-                if propertyType == WeaponPropertyType.Headshot:
-                    properties.append(WeaponProperty.createBasePropertyWithAddon(propertyType, 100.0, propertyValue))
-                    bSetHeadshot = True
-                else:
-                    properties.append(WeaponProperty.createBaseProperty(propertyType, propertyValue))
-            except (KeyError, ValueError) as e:
-                print(f"警告: 在武器 '{name}' 中遇到未知的属性类型 '{propData.get('type')}'。已跳过。")
-                continue
-        if not bSetHeadshot:
-            properties.append(WeaponProperty.createBasePropertyWithAddon(WeaponPropertyType.Headshot, 100.0, 0.0))
-
-
-        weapon = Weapon(
-            name=name,
-            basename=basename,
-            weaponType=weaponType,
-            subWeaponType=subWeaponType,
-            snapshot=WeaponPropertySnapshot(properties, [])
-        )
-        weapons.append(weapon)
+            propertyType = WeaponPropertyType[propData['type']]
+            propertyValue = propData['value']
+            if propertyType == WeaponPropertyType.Headshot:
+                properties.append(WeaponProperty.createBasePropertyWithAddon(propertyType, 100.0, propertyValue))
+                bSetHeadshot = True
+            else:
+                properties.append(WeaponProperty.createBaseProperty(propertyType, propertyValue))
+        except (KeyError, ValueError) as e:
+            print(f"警告: 在武器 '{name}' 中遇到未知的属性类型 '{propData.get('type')}'。已跳过。")
+            continue
+    if not bSetHeadshot:
+        properties.append(WeaponProperty.createBasePropertyWithAddon(WeaponPropertyType.Headshot, 100.0, 0.0))
+
+
+    weapon = Weapon(
+        name=name,
+        basename=basename,
+        weaponType=weaponType,
+        subWeaponType=subWeaponType,
+        snapshot=WeaponPropertySnapshot(properties, [])
+    )
+    return weapon
+
+# 武器、混淆执行卡和配卡的数据文件，修改时延迟合并写回，见JsonListStore
+BUILD_JSON_PATH = 'data/builds.json'
+# 配卡的卡槽数量，8个普通卡槽和1个专属卡槽
+BUILD_SLOT_COUNT = 9
+_WEAPON_STORE = JsonListStore(WEAPON_JSON_PATH)
+_RIVEN_CARD_STORE = JsonListStore(RIVEN_CARD_JSON_PATH)
+_BUILD_STORE = JsonListStore(BUILD_JSON_PATH)
+
+def flush_storage() -> bool:
+    '''
+    立即写回所有未保存的武器、混淆执行卡和配卡修改
+    '''
+    return _WEAPON_STORE.flush() and _RIVEN_CARD_STORE.flush() and _BUILD_STORE.flush()
+
+#region SQLite数据库
+# 可选的SQLite数据库，启用后所有数据都从数据库中读写，见use_sqlite_backend
+SQLITE_LIBRARY_PATH = 'data/library.db'
+_SQLITE_LIBRARY: SqliteLibrary | None = None
+# 数据库中每一行对应的对象，保证同一行在不同查询中得到同一个对象
+_SQLITE_WEAPONS: dict[int, Weapon] = {}
+_SQLITE_CARDS: dict[int, WeaponCardBase] = {}
+
+def use_sqlite_backend(path: str = SQLITE_LIBRARY_PATH) -> SqliteLibrary:
+    '''
+    改为使用SQLite数据库保存数据，数据库为空时从JSON数据文件导入，已经载入的武器和执行卡表会被清空
+    '''
+    global _SQLITE_LIBRARY
+    if _SQLITE_LIBRARY is not None and _SQLITE_LIBRARY.path == path:
+        return _SQLITE_LIBRARY
+    use_json_backend()
+    library = SqliteLibrary(path)
+    if library.isEmpty():
+        _import_json_into_sqlite(library)
+    _SQLITE_LIBRARY = library
+    return library
+
+def use_json_backend():
+    '''
+    改为使用JSON数据文件保存数据，已经载入的武器和执行卡表会被清空
+    '''
+    global _SQLITE_LIBRARY, ALL_CARDS, ALL_WEAPONS
+    if _SQLITE_LIBRARY is not None:
+        _SQLITE_LIBRARY.close()
+        _SQLITE_LIBRARY = None
+    _SQLITE_WEAPONS.clear()
+    _SQLITE_CARDS.clear()
+    ALL_CARDS = None
+    ALL_WEAPONS = None
+
+def is_sqlite_backend() -> bool:
+    '''
+    是否正在使用SQLite数据库
+    '''
+    return _SQLITE_LIBRARY is not None
+
+def _read_json_list(path: str) -> list[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return data if isinstance(data, list) else []
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"读取数据文件失败: {e}")
+        return []
+
+def _import_json_into_sqlite(library: SqliteLibrary):
+    '''
+    将JSON数据文件中的武器、执行卡和配卡导入数据库，数据库中保存原始数据，无效的数据会被跳过
+    '''
+    weapons = [(_create_weapon(weaponData), weaponData) for weaponData in _read_json_list(WEAPON_JSON_PATH)]
+    cards = [(_create_common_card(cardData), cardData) for cardData in _read_json_list(COMMON_CARD_JSON_PATH)]
+    cards += [(_create_riven_card(cardData), cardData) for cardData in _read_json_list(RIVEN_CARD_JSON_PATH)]
+    cards += [(_create_special_card(cardData), cardData) for cardData in _read_json_list(SPECIAL_CARD_JSON_PATH)]
+    library.addWeapons([(weapon, weaponData) for weapon, weaponData in weapons if weapon is not None])
+    library.addCards([(card, cardData) for card, cardData in cards if card is not None])
+    if os.path.exists(BUILD_JSON_PATH):
+        for buildData in _read_json_list(BUILD_JSON_PATH):
+            library.saveBuild(buildData)
+
+def _get_sqlite_weapons(rows: list[tuple[int, dict]]) -> list[Weapon]:
+    weapons = []
+    for rowId, weaponData in rows:
+        if rowId not in _SQLITE_WEAPONS:
+            _SQLITE_WEAPONS[rowId] = _create_weapon(weaponData)
+        weapons.append(_SQLITE_WEAPONS[rowId])
     return weapons
 
-def save_weapon(weapon : Weapon) -> bool:
-    weaponData = {
+def _get_sqlite_cards(rows: list[tuple[int, int, dict]]) -> list[WeaponCardBase]:
+    createFunctions = {CARD_KIND_COMMON: _create_common_card, CARD_KIND_RIVEN: _create_riven_card, CARD_KIND_SPECIAL: _create_special_card}
+    cards = []
+    for rowId, kind, cardData in rows:
+        if rowId not in _SQLITE_CARDS:
+            _SQLITE_CARDS[rowId] = createFunctions[kind](cardData)
+        if _SQLITE_CARDS[rowId] is not None:
+            cards.append(_SQLITE_CARDS[rowId])
+    return cards
+#endregion
+
+def load_compatible_cards(weapon: Weapon) -> list[WeaponCardBase]:
+    '''
+    获取能够装备在武器普通卡槽上的执行卡，与isCardCompatibleWithWeapon一致，顺序与执行卡表一致
+    使用数据库时只读取符合条件的执行卡
+    '''
+    if _SQLITE_LIBRARY is not None:
+        return _get_sqlite_cards(_SQLITE_LIBRARY.queryCompatibleCards(weapon.weaponType, weapon.subWeaponType, weapon.basename))
+    return [card for card in load_cards() if isCardCompatibleWithWeapon(card, weapon)]
+
+def load_special_cards(weapon: Weapon) -> list[WeaponCardSpecial]:
+    '''
+    获取武器的专属执行卡
+    '''
+    if _SQLITE_LIBRARY is not None:
+        return _get_sqlite_cards(_SQLITE_LIBRARY.querySpecialCards(weapon.basename))
+    return [card for card in load_cards() if isinstance(card, WeaponCardSpecial) and card.weaponName == weapon.basename]
+
+def load_cards_by_card_set(cardSet: CardSet) -> list[WeaponCardCommon]:
+    '''
+    获取属于某个套装的普通执行卡
+    '''
+    if _SQLITE_LIBRARY is not None:
+        return _get_sqlite_cards(_SQLITE_LIBRARY.queryCardsByCardSet(cardSet))
+    return [card for card in load_cards() if isinstance(card, WeaponCardCommon) and card.cardSet == cardSet]
+
+def load_weapons_by_basename(basename: str) -> list[Weapon]:
+    '''
+    获取基础武器名称相同的所有武器
+    '''
+    if _SQLITE_LIBRARY is not None:
+        return _get_sqlite_weapons(_SQLITE_LIBRARY.queryWeapons(basename=basename))
+    return [weapon for weapon in load_weapons() if weapon.basename == basename]
+
+def _weapon_to_data(weapon: Weapon) -> dict:
+    properties = []
+    baseDatas = weapon.snapshot.getBasePropertyArray()
+    for propertyType in WeaponPropertyType:
+        value, addon = baseDatas[propertyType.value]
+        # 载入时弱点伤害的基础值固定为100，文件中保存的是加成值
+        if propertyType == WeaponPropertyType.Headshot:
+            value = addon
+        if value != 0:
+            properties.append({'type': propertyType.name, 'value': float(value)})
+    return {
         'name': weapon.name,
         'basename': weapon.basename,
         'weaponType': weapon.weaponType.name,
         'subWeaponType': weapon.subWeaponType.name,
-        'properties': [{'type': prop.propertyType.name, 'value': prop.baseValue} for prop in weapon.snapshot.getBasePropertiesRef()]
+        'properties': properties
     }
 
-    allWeapons = []
-    # 1. 读取现有数据
-    if os.path.exists(WEAPON_JSON_PATH):
-        try:
-            with open(WEAPON_JSON_PATH, 'r', encoding='utf-8') as file:
-                content = file.read()
-                if content:
-                    allWeapons = json.loads(content)
-                if not isinstance(allWeapons, list):
-                    return False
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"读取现有武器数据失败: {e}")
-            return False
-    # 2. 添加新武器
-    allWeapons.append(weaponData)
-    # 3. 写回文件   
-    try:
-        with open(WEAPON_JSON_PATH, 'w', encoding='utf-8') as file:
-            json.dump(allWeapons, file, ensure_ascii=False, indent=4)
-
-        # 4. 更新全局缓存
-        global ALL_WEAPONS
-        ALL_WEAPONS = allWeapons
-        return True
-    except IOError as e:
-        print(f"保存武器数据失败: {e}")
-        return False
-
-def save_riven_card(card : WeaponCardRiven) -> bool:
-    cardData = {
+def _riven_card_to_data(card: WeaponCardRiven) -> dict:
+    return {
         'name': card.name,
         'properties': [{'type': prop.propertyType.name, 'value': prop.getAddon()} for prop in card.getPropertiesRef()],
         'cost': card.cost,
@@ -242,71 +562,116 @@ def save_riven_card(card : WeaponCardRiven) -> bool:
         'weaponName': card.weaponName
     }
 
-    allRivenCards = []
-    # 1. 读取现有数据
-    if os.path.exists(RIVEN_CARD_JSON_PATH):
-        try:
-            with open(RIVEN_CARD_JSON_PATH, 'r', encoding='utf-8') as file:
-                content = file.read()
-                if content:
-                    allRivenCards = json.loads(content)
-                if not isinstance(allRivenCards, list):
-                    return False
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"读取现有混淆执行卡数据失败: {e}")
-            return False
-    # 2. 添加新卡
-    allRivenCards.append(cardData)
-    # 3. 写回文件   
+def save_weapon(weapon : Weapon) -> bool:
+    '''
+    保存武器，使用JSON数据文件时文件在稍后写回，已经载入的武器表中会加入该武器
+    '''
+    weaponData = _weapon_to_data(weapon)
     try:
-        with open(RIVEN_CARD_JSON_PATH, 'w', encoding='utf-8') as file:
-            json.dump(allRivenCards, file, ensure_ascii=False, indent=4)
+        if _SQLITE_LIBRARY is not None:
+            rowId, = _SQLITE_LIBRARY.addWeapons([(weapon, weaponData)])
+            _SQLITE_WEAPONS[rowId] = weapon
+        else:
+            _WEAPON_STORE.append(weaponData)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"保存武器数据失败: {e}")
+        return False
+    if ALL_WEAPONS is not None and weapon not in ALL_WEAPONS:
+        ALL_WEAPONS.append(weapon)
+    return True
 
-        # 4. 更新全局缓存
-        global ALL_CARDS
-        ALL_CARDS = allRivenCards
-        return True
-    except IOError as e:
+def save_riven_card(card : WeaponCardRiven) -> bool:
+    '''
+    保存混淆执行卡，使用JSON数据文件时文件在稍后写回，已经载入的执行卡表中会加入该执行卡
+    '''
+    cardData = _riven_card_to_data(card)
+    try:
+        if _SQLITE_LIBRARY is not None:
+            rowId, = _SQLITE_LIBRARY.addCards([(card, cardData)])
+            _SQLITE_CARDS[rowId] = card
+        else:
+            _RIVEN_CARD_STORE.append(cardData)
+    except (OSError, ValueError, sqlite3.Error) as e:
         print(f"保存混淆执行卡数据失败: {e}")
         return False
+    if ALL_CARDS is not None and card not in ALL_CARDS:
+        # 专属执行卡总是排在最后，与重新载入时的顺序一致
+        specialIndex = next((i for i, otherCard in enumerate(ALL_CARDS) if isinstance(otherCard, WeaponCardSpecial)), len(ALL_CARDS))
+        ALL_CARDS.insert(specialIndex, card)
+    return True
     
 def delete_riven_card(card: WeaponCardRiven) -> bool:
     '''
-    删除混淆执行卡
+    删除混淆执行卡，名称和武器都相同的混淆执行卡会一起删除，使用JSON数据文件时文件在稍后写回
     '''
-    allRivenCards = []
-    # 1. 读取现有数据
-    if os.path.exists(RIVEN_CARD_JSON_PATH):
-        try:
-            with open(RIVEN_CARD_JSON_PATH, 'r', encoding='utf-8') as file:
-                content = file.read()
-                if content:
-                    allRivenCards = json.loads(content)
-                if not isinstance(allRivenCards, list):
-                    return False
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"读取现有混淆执行卡数据失败: {e}")
-            return False
-    # 2. 删除指定卡
-    allRivenCards = [cardData for cardData in allRivenCards if cardData.get('name') != card.name or cardData.get('weaponName') != card.weaponName]
-    # 3. 写回文件
+    def isSameCard(name: str, weaponName: str) -> bool:
+        return name == card.name and weaponName == card.weaponName
     try:
-        with open(RIVEN_CARD_JSON_PATH, 'w', encoding='utf-8') as file:
-            json.dump(allRivenCards, file, ensure_ascii=False, indent=4)
-        # 4. 更新全局缓存
-        global ALL_CARDS
-        ALL_CARDS = allRivenCards
-        return True
-    except IOError as e:
-        print(f"保存混淆执行卡数据失败: {e}")
+        if _SQLITE_LIBRARY is not None:
+            for rowId in _SQLITE_LIBRARY.deleteRivenCards(card.name, card.weaponName):
+                _SQLITE_CARDS.pop(rowId, None)
+        else:
+            _RIVEN_CARD_STORE.remove(lambda cardData: isSameCard(cardData.get('name'), cardData.get('weaponName')))
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"删除混淆执行卡数据失败: {e}")
         return False
-    
+    if ALL_CARDS is not None:
+        ALL_CARDS[:] = [otherCard for otherCard in ALL_CARDS
+                        if not (isinstance(otherCard, WeaponCardRiven) and isSameCard(otherCard.name, otherCard.weaponName))]
+    return True
+
+def save_build(name: str, weapon: Weapon, cards: list[WeaponCardBase]) -> bool:
+    '''
+    保存配卡，同名的配卡会被覆盖，保持原来的顺序
+    配卡数据包含配卡名称name、武器名称weaponName和按卡槽顺序排列的BUILD_SLOT_COUNT个执行卡名称cards，
+    空卡槽和不足BUILD_SLOT_COUNT个的卡槽为None
+    '''
+    try:
+        if len(cards) > BUILD_SLOT_COUNT:
+            raise ValueError(f"执行卡数量超过{BUILD_SLOT_COUNT}张: {len(cards)}")
+        cardNames = [card.name if card is not None else None for card in cards]
+        buildData = {'name': name, 'weaponName': weapon.name, 'cards': cardNames + [None] * (BUILD_SLOT_COUNT - len(cardNames))}
+        if _SQLITE_LIBRARY is not None:
+            _SQLITE_LIBRARY.saveBuild(buildData)
+        else:
+            _BUILD_STORE.replace(lambda otherData: otherData.get('name') == name, buildData)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"保存配卡失败: {e}")
+        return False
+    return True
+
+def load_builds(weapon: Weapon = None) -> list[dict]:
+    '''
+    获取保存的配卡数据，见save_build，weapon不为None时只获取该武器的配卡
+    '''
+    try:
+        if _SQLITE_LIBRARY is not None:
+            return _SQLITE_LIBRARY.getBuilds(None if weapon is None else weapon.name)
+        # 返回副本，与数据库一样修改返回的数据不会影响保存的配卡
+        return [copy.deepcopy(buildData) for buildData in _BUILD_STORE.getItems() if weapon is None or buildData.get('weaponName') == weapon.name]
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"读取配卡失败: {e}")
+        return []
+
+def delete_build(name: str) -> bool:
+    '''
+    删除配卡
+    '''
+    try:
+        if _SQLITE_LIBRARY is not None:
+            return _SQLITE_LIBRARY.deleteBuild(name)
+        return _BUILD_STORE.remove(lambda buildData: buildData.get('name') == name) > 0
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"删除配卡失败: {e}")
+        return False
+
 class Config:
     '''
     全局配置类，保存应用配置
     '''
     def __init__(self):
         self.uiScale = 1.0  # 界面缩放比例
+        self.dataBackend = 'json'  # 数据保存方式，json或sqlite，见use_sqlite_backend
         self.subWeaponTypeMagazine = SubWeaponTypeToMagazine.copy()
 
 CONFIG_INI_PATH = 'data/config.ini'
@@ -328,6 +693,8 @@ def load_config():
                 value = kv[1].strip()
                 if key == 'uiScale':
                     CONFIG.uiScale = float(value)
+                elif key == 'dataBackend':
+                    CONFIG.dataBackend = value
                 if key.startswith('subWeaponTypeMagazine_'):
                     subWeaponTypeStr = key[len('subWeaponTypeMagazine_'):]
                     try:
@@ -346,6 +713,7 @@ def save_config(config : Config):
     try:
         with open(CONFIG_INI_PATH, 'w', encoding='utf-8') as file:
             file.write(f"uiScale={config.uiScale}\n")
+            file.write(f"dataBackend={config.dataBackend}\n")
             for subWeaponType, magazine in config.subWeaponTypeMagazine.items():
                 file.write(f"subWeaponTypeMagazine_{subWeaponType.name}={magazine}\n")
         return True
@@ -15,10 +15,17 @@ def main():
     splash.showMessage("正在启动...", Qt.AlignBottom | Qt.AlignCenter, Qt.white)
     splash.show()
 
-    from ui.main_window import MainWindow
-    main_window = MainWindow()
+    from core.ivtcontext import CONTEXT
+    timer = CONTEXT.startupTimer
+    with timer.phase("导入界面模块"):
+        from ui.main_window import MainWindow
+    # 先载入数据，避免数据载入的耗时计入界面页面
+    CONTEXT.getAllWeapons()
+    with timer.phase("主窗口"):
+        main_window = MainWindow()
     splash.finish(main_window)
     main_window.show()
+    print(timer.report())
 
     sys.exit(app.exec())
 
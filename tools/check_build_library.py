@@ -0,0 +1,101 @@
+import sys
+import os
+import time
+import tempfile
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from core import loader
+from core.ivtcard import isCardCompatibleWithWeapon
+from core.ivtenum import CardSet
+from core.ivtstorage import JsonListStore
+
+# 检查时保存的配卡名称
+BUILD_NAME = "检查配卡"
+
+def collect_queries():
+    """按当前的数据保存方式执行所有按条件查询，返回以名称表示的结果"""
+    weapons = loader.load_weapons()
+    results = {}
+    for weapon in weapons:
+        results[('compatible', weapon.name)] = [card.name for card in loader.load_compatible_cards(weapon)]
+        results[('special', weapon.name)] = [card.name for card in loader.load_special_cards(weapon)]
+        results[('basename', weapon.basename)] = [otherWeapon.name for otherWeapon in loader.load_weapons_by_basename(weapon.basename)]
+    for cardSet in CardSet:
+        results[('cardSet', cardSet.name)] = [card.name for card in loader.load_cards_by_card_set(cardSet)]
+    return results
+
+def round_trip_build(reload):
+    """保存、覆盖、重新载入和删除一套配卡，返回发现的问题"""
+    problems = []
+    weapons = loader.load_weapons()
+    weapon = weapons[0]
+    compatibleCards = [card for card in loader.load_cards() if isCardCompatibleWithWeapon(card, weapon)]
+    otherWeapon = next(otherWeapon for otherWeapon in weapons if otherWeapon.name != weapon.name)
+    cards = compatibleCards[:3] + [None] + compatibleCards[3:5]
+    expected = [card.name if card is not None else None for card in cards] + [None] * (loader.BUILD_SLOT_COUNT - len(cards))
+    if not loader.save_build(BUILD_NAME, weapon, compatibleCards[:1]) or not loader.save_build("其他配卡", otherWeapon, []):
+        return ["保存配卡失败"]
+    # 覆盖同名的配卡，位置保持不变
+    if not loader.save_build(BUILD_NAME, weapon, cards):
+        return ["覆盖配卡失败"]
+    reload()
+    builds = loader.load_builds()
+    names = [buildData['name'] for buildData in builds]
+    if names != [BUILD_NAME, "其他配卡"]:
+        problems.append(f"配卡列表不正确: {names}")
+    weaponBuilds = loader.load_builds(weapon)
+    if weaponBuilds != [{'name': BUILD_NAME, 'weaponName': weapon.name, 'cards': expected}]:
+        problems.append(f"按武器读取的配卡不正确: {weaponBuilds}")
+    # 修改读取到的数据不影响保存的配卡
+    weaponBuilds[0]['cards'][0] = None
+    if loader.load_builds(weapon)[0]['cards'] != expected:
+        problems.append("修改读取的配卡影响了保存的配卡")
+    if loader.save_build(BUILD_NAME, weapon, [None] * (loader.BUILD_SLOT_COUNT + 1)):
+        problems.append(f"超过{loader.BUILD_SLOT_COUNT}张执行卡的配卡没有被拒绝")
+    if not loader.delete_build(BUILD_NAME) or loader.delete_build(BUILD_NAME):
+        problems.append("删除配卡的返回值不正确")
+    reload()
+    names = [buildData['name'] for buildData in loader.load_builds()]
+    if names != ["其他配卡"]:
+        problems.append(f"删除后的配卡列表不正确: {names}")
+    return problems
+
+def main():
+    start = time.perf_counter()
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        buildPath = os.path.join(directory, 'builds.json')
+        databasePath = os.path.join(directory, 'library.db')
+        # 配卡写入临时文件，不改动数据目录中的配卡
+        loader._BUILD_STORE = JsonListStore(buildPath, delay=0)
+        def reload_json():
+            loader._BUILD_STORE = JsonListStore(buildPath, delay=0)
+        def reload_sqlite():
+            loader.use_json_backend()
+            loader.use_sqlite_backend(databasePath)
+
+        jsonResults = collect_queries()
+        jsonProblems = round_trip_build(reload_json)
+        loader.use_sqlite_backend(databasePath)
+        sqliteResults = collect_queries()
+        sqliteProblems = round_trip_build(reload_sqlite)
+        loader.use_json_backend()
+
+    for backend, problems in (("JSON", jsonProblems), ("SQLite", sqliteProblems)):
+        for problem in problems:
+            failures += 1
+            print(f"{backend}: {problem}")
+    for key in jsonResults:
+        if jsonResults[key] != sqliteResults.get(key):
+            failures += 1
+            print(f"查询结果不一致: {key} JSON {jsonResults[key]} SQLite {sqliteResults.get(key)}")
+    elapsed = time.perf_counter() - start
+    print(f"共检查 {len(jsonResults)} 项查询和 2 种数据保存方式的配卡，{failures} 项不一致，用时 {elapsed:.2f}s")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import math
+import random
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from core.loader import load_cards, load_weapons
+from core.ivtcard import isCardCompatibleWithWeapon
+from core.ivtdps import DPSRequest
+from core.ivtenum import WeaponPropertyType
+from core.ivtsimulation import CombatSimulator, MonteCarloSimulator, DEFAULT_FIGHT_DURATION, DEFAULT_TRIAL_COUNT
+
+# 造成持续伤害的元素，带有这些元素的配卡不参与单弹匣对照
+DOT_PROPERTY_TYPES = (WeaponPropertyType.Fire, WeaponPropertyType.Electric, WeaponPropertyType.Gas, WeaponPropertyType.Cracking)
+# 每把武器随机生成的配卡数量
+RANDOM_BUILD_COUNT = 4
+# 单弹匣对照允许的相对误差
+RELATIVE_TOLERANCE = 1e-9
+# 模拟一场默认时长战斗的耗时上限，单位为秒
+MAX_SIMULATION_TIME = 0.05
+# 对弹匣最长的配卡进行默认次数蒙特卡洛模拟的耗时上限，单位为秒
+MAX_MONTE_CARLO_TIME = 1.0
+
+def compare_magazine(request):
+    """
+    模拟只持续一个弹匣且元素异常不会到期的战斗，直接伤害应与解析计算的弹匣伤害一致
+    带有持续伤害元素的配卡返回None
+    """
+    simulator = CombatSimulator(request)
+    if any(simulator.weaponDamage[propertyType.value] > 0 for propertyType in DOT_PROPERTY_TYPES):
+        return None
+    simulator.fightDuration = simulator.magazine / simulator.attackSpeed
+    simulator.debuffDuration = simulator.fightDuration * 2
+    result = simulator.run()
+    return abs(result.directDamage - request.magazineDamage) / max(abs(request.magazineDamage), 1.0)
+
+def main():
+    rng = random.Random(20240601)
+    allCards = load_cards()
+    weapons = [weapon for weapon in load_weapons() if not weapon.validate()]
+    failures = 0
+    checked = 0
+    slowest = 0.0
+    longestRequest, longestShots = None, -1
+    start = time.perf_counter()
+    for weapon in weapons:
+        compatibleCards = [card for card in allCards if isCardCompatibleWithWeapon(card, weapon)]
+        builds = [[]]
+        for _ in range(RANDOM_BUILD_COUNT):
+            builds.append(rng.sample(compatibleCards, min(8, len(compatibleCards))))
+        for cards in builds:
+            request = DPSRequest(weapon, cards + [None] * (9 - len(cards)))
+            request.calculate()
+            error = compare_magazine(request)
+            if error is not None:
+                checked += 1
+                if error > RELATIVE_TOLERANCE:
+                    failures += 1
+                    print(f"单弹匣伤害不一致: {weapon.name} {[card.name for card in cards]} 相对误差 {error:.3e}")
+            simulationStart = time.perf_counter()
+            result = request.simulateCombat()
+            slowest = max(slowest, time.perf_counter() - simulationStart)
+            if not result.totalDamage > 0:
+                failures += 1
+                print(f"战斗模拟没有造成伤害: {weapon.name} {[card.name for card in cards]}")
+            simulator = CombatSimulator(request)
+            shots = math.floor(simulator.magazine * simulator.multiStrike)
+            if shots > longestShots:
+                longestRequest, longestShots = request, shots
+    # 弹匣最长的配卡，蒙特卡洛模拟的耗时与弹匣内的伤害次数成正比
+    monteCarloStart = time.perf_counter()
+    MonteCarloSimulator(longestRequest, DEFAULT_TRIAL_COUNT).run()
+    monteCarloTime = time.perf_counter() - monteCarloStart
+    if monteCarloTime > MAX_MONTE_CARLO_TIME:
+        failures += 1
+        print(f"{longestRequest.weapon.name} 蒙特卡洛模拟{DEFAULT_TRIAL_COUNT}个弹匣用时 {monteCarloTime:.2f}s，超过 {MAX_MONTE_CARLO_TIME:.0f}s")
+    elapsed = time.perf_counter() - start
+    if slowest > MAX_SIMULATION_TIME:
+        failures += 1
+        print(f"模拟{DEFAULT_FIGHT_DURATION:.0f}秒战斗最慢用时 {slowest * 1000:.1f}ms，超过 {MAX_SIMULATION_TIME * 1000:.0f}ms")
+    print(f"共检查 {checked} 组单弹匣伤害，{failures} 项不一致，单场战斗最慢 {slowest * 1000:.1f}ms，蒙特卡洛模拟最长弹匣用时 {monteCarloTime:.2f}s，用时 {elapsed:.2f}s")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
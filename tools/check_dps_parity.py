@@ -0,0 +1,152 @@
+import sys
+import os
+import time
+import random
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from core.loader import load_cards, load_weapons
+from core.ivtcard import WeaponCardCommon, WeaponCardRiven
+from core.ivtdps import DPSRequest, DPSBatch
+from core.cli import BuildParser
+from core.ivtenum import WeaponType, SubWeaponType, EnemyMaterial, DamageType, SkillDebuff
+
+# 解析模式与逐发计算允许的相对误差，仅用于吸收浮点运算顺序不同带来的差异
+RELATIVE_TOLERANCE = 1e-9
+# 每把武器额外随机生成的配卡数量
+RANDOM_BUILD_COUNT = 5
+# 批量计算检查使用的靶标和角色设置数量
+BATCH_SETTING_COUNT = 4
+# 检查常驻元素异常时靶标身上的元素异常，病毒直接提高伤害，辐射降低护甲
+CONSTANT_ELEMENT_DEBUFFS = {'Virus': 6, 'Radiation': 6}
+
+RESULT_FIELDS = [
+    'magazineDamage',
+    'magazineDps',
+    'averageDps',
+    'firstCriticalDamage',
+    'firstUncriticalDamage',
+    'firstCriticalDamageHeadshot',
+    'firstUncriticalDamageHeadshot',
+]
+
+def get_compatible_cards(weapon, allCards):
+    """获取可以装备在武器上的属性执行卡"""
+    cards = []
+    for card in allCards:
+        if isinstance(card, WeaponCardCommon):
+            if card.weaponType == WeaponType.All:
+                cards.append(card)
+            elif card.weaponType == weapon.weaponType and card.subWeaponType in (weapon.subWeaponType, SubWeaponType.All):
+                cards.append(card)
+        elif isinstance(card, WeaponCardRiven) and card.weaponName == weapon.basename:
+            cards.append(card)
+    return cards
+
+def create_request(weapon, cards, rng):
+    """创建一个随机设置了靶标和角色状态的DPS计算请求"""
+    request = DPSRequest(weapon, cards + [None] * (9 - len(cards)))
+    request.targetInfo.material = rng.choice(list(EnemyMaterial))
+    request.targetInfo.armor = rng.choice([0.0, 800.0, 3430.0])
+    request.targetInfo.headShotRate = rng.choice([0.0, 0.3, 0.55, 1.0])
+    if rng.random() < 0.3:
+        request.targetInfo.addSkillDebuff(SkillDebuff.Qianyinfeidan, 1)
+    if rng.random() < 0.3:
+        request.targetInfo.elementDebuffState.setConstantDebuffByDamageType(DamageType.Cold, rng.randint(1, 9))
+    request.moveState.isMoving = rng.random() < 0.5
+    request.moveState.isInAir = rng.random() < 0.5
+    return request
+
+def compare(weapon, cards, rng):
+    """分别使用解析模式和逐发计算，返回最大相对误差和对应的字段"""
+    request = create_request(weapon, cards, rng)
+    loopRequest = DPSRequest.createNewOne(request)
+    request.calculate(analytic=True)
+    loopRequest.calculate(analytic=False)
+    worstError, worstField = 0.0, None
+    for field in RESULT_FIELDS:
+        analyticValue = getattr(request, field)
+        loopValue = getattr(loopRequest, field)
+        error = abs(analyticValue - loopValue) / max(abs(loopValue), 1e-12)
+        if error > worstError:
+            worstError, worstField = error, field
+    return worstError, worstField
+
+def compare_batch(weapons, allCards, rng):
+    """使用同一份设置批量计算所有武器的配卡，返回最大相对误差和对应的字段"""
+    template = create_request(weapons[0], [], rng)
+    requests = []
+    for weapon in weapons:
+        compatibleCards = get_compatible_cards(weapon, allCards)
+        for cards in ([], rng.sample(compatibleCards, min(8, len(compatibleCards)))):
+            request = DPSRequest(weapon, cards + [None] * (9 - len(cards)))
+            request.moveState = template.moveState
+            request.cardSetInfo = template.cardSetInfo
+            request.characterInfo = template.characterInfo
+            request.targetInfo = template.targetInfo
+            requests.append(request)
+    batch = DPSBatch.fromRequests(requests)
+    batch.calculate()
+    for request in requests:
+        request.calculate()
+    worstError, worstField = 0.0, None
+    for field in RESULT_FIELDS:
+        batchValues = getattr(batch, field)
+        for i, request in enumerate(requests):
+            requestValue = getattr(request, field)
+            error = abs(batchValues[i] - requestValue) / max(abs(requestValue), 1e-12)
+            if error > worstError:
+                worstError, worstField = error, f"{request.weapon.name} {field}"
+    return worstError, worstField
+
+def check_constant_debuffs(weapons, allCards):
+    """按命令行输入格式为靶标添加常驻元素异常，返回弹匣伤害没有提高的武器名称"""
+    parser = BuildParser(allCards, weapons)
+    unchanged = []
+    for weapon in weapons:
+        plainRequest = parser.parse({'weapon': weapon.name, 'target': {'armor': 800}})
+        debuffedRequest = parser.parse({'weapon': weapon.name, 'target': {'armor': 800, 'elementDebuffs': CONSTANT_ELEMENT_DEBUFFS}})
+        plainRequest.calculate()
+        debuffedRequest.calculate()
+        if plainRequest.magazineDamage > 0 and debuffedRequest.magazineDamage <= plainRequest.magazineDamage:
+            unchanged.append(weapon.name)
+    return unchanged
+
+def main():
+    rng = random.Random(20240601)
+    allCards = load_cards()
+    weapons = load_weapons()
+    failures = 0
+    checked = 0
+    start = time.perf_counter()
+    for weapon in weapons:
+        compatibleCards = get_compatible_cards(weapon, allCards)
+        builds = [[]]
+        for _ in range(RANDOM_BUILD_COUNT):
+            builds.append(rng.sample(compatibleCards, min(8, len(compatibleCards))))
+        for cards in builds:
+            error, field = compare(weapon, cards, rng)
+            checked += 1
+            if error > RELATIVE_TOLERANCE:
+                failures += 1
+                print(f"不一致: {weapon.name} {[card.name for card in cards]} {field} 相对误差 {error:.3e}")
+    for _ in range(BATCH_SETTING_COUNT):
+        error, field = compare_batch(weapons, allCards, rng)
+        checked += 1
+        if error > RELATIVE_TOLERANCE:
+            failures += 1
+            print(f"批量计算不一致: {field} 相对误差 {error:.3e}")
+    unchanged = check_constant_debuffs(weapons, allCards)
+    checked += 1
+    if unchanged:
+        failures += 1
+        print(f"常驻元素异常没有提高弹匣伤害: {unchanged}")
+    elapsed = time.perf_counter() - start
+    print(f"共检查 {checked} 组，{failures} 组不一致，用时 {elapsed:.2f}s")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
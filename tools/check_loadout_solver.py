@@ -0,0 +1,91 @@
+import sys
+import os
+import time
+import random
+import itertools
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from core.loader import load_cards, load_weapons
+from core.ivtcard import isCardCompatibleWithWeapon
+from core.ivtdps import DPSRequest, DPSBatch
+from core.ivtenum import DPSMetric, EnemyMaterial
+from core.ivtoptimizer import LoadoutSolver, getCardFamily
+
+# 穷举对照时使用的候选执行卡数量
+POOL_SIZE = 11
+# 参与检查的武器数量
+WEAPON_COUNT = 32
+# 随机选择的弱点命中率
+HEADSHOT_RATES = [0.0, 0.25, 0.5, 0.75, 1.0]
+# 穷举时允许的相对误差
+RELATIVE_TOLERANCE = 1e-9
+
+def iterate_builds(pool, slotCount):
+    """穷举候选执行卡的所有组合以及元素执行卡的所有排列"""
+    for size in range(slotCount + 1):
+        for combination in itertools.combinations(pool, size):
+            if len({getCardFamily(card) for card in combination}) < size:
+                continue
+            elementCards = [card for card in combination if any(prop.propertyType.isElementDamage() for prop in card.getPropertiesRef())]
+            otherCards = [card for card in combination if card not in elementCards]
+            for permutation in itertools.permutations(elementCards):
+                yield list(permutation) + otherCards
+
+def brute_force(template, pool, metric, slotCount=8):
+    """用DPSBatch穷举所有配卡，返回最优指标值"""
+    bestValue = -float('inf')
+    requests = []
+    def flush():
+        nonlocal bestValue, requests
+        if requests:
+            batch = DPSBatch.fromRequests(requests)
+            batch.calculate()
+            bestValue = max(bestValue, float(batch.getMetricValue(metric).max()))
+            requests = []
+    for cards in iterate_builds(pool, slotCount):
+        request = DPSRequest(template.weapon, cards + [None] * (9 - len(cards)))
+        request.moveState = template.moveState
+        request.cardSetInfo = template.cardSetInfo
+        request.characterInfo = template.characterInfo
+        request.targetInfo = template.targetInfo
+        requests.append(request)
+        if len(requests) >= 2000:
+            flush()
+    flush()
+    return bestValue
+
+def main():
+    rng = random.Random(20240602)
+    allCards = load_cards()
+    weapons = load_weapons()
+    failures = 0
+    checked = 0
+    start = time.perf_counter()
+    for weapon in rng.sample(weapons, WEAPON_COUNT):
+        compatibleCards = [card for card in allCards if isCardCompatibleWithWeapon(card, weapon)]
+        pool = rng.sample(compatibleCards, min(POOL_SIZE, len(compatibleCards)))
+        template = DPSRequest(weapon, [None] * 9)
+        template.targetInfo.material = rng.choice(list(EnemyMaterial))
+        template.targetInfo.armor = rng.choice([0.0, 800.0, 3430.0])
+        template.targetInfo.headShotRate = rng.choice(HEADSHOT_RATES)
+        template.moveState.isInAir = rng.random() < 0.5
+        for metric in DPSMetric:
+            result = LoadoutSolver(template, pool, metric).solve()
+            expected = brute_force(template, pool, metric)
+            checked += 1
+            error = (expected - result.value) / max(abs(expected), 1e-12)
+            status = "通过" if error <= RELATIVE_TOLERANCE else "未找到最优解"
+            if error > RELATIVE_TOLERANCE:
+                failures += 1
+            print(f"{status}: {weapon.name} {metric} 弱点命中率 {template.targetInfo.headShotRate} 求解 {result.value:.2f} 穷举 {expected:.2f} "
+                  f"计算配卡 {result.evaluatedCount} 组，用时 {result.elapsed:.2f}s")
+    elapsed = time.perf_counter() - start
+    print(f"共检查 {checked} 组，{failures} 组未找到最优解，用时 {elapsed:.2f}s")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import sys
+import os
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from core.ivtcontext import CONTEXT
+from core.ivtenum import DPSMetric
+from core.ivtworker import WorkerSettings
+
+def main():
+    parser = argparse.ArgumentParser(description="使用多进程为所有武器求解最优配卡")
+    parser.add_argument('--metric', type=int, default=DPSMetric.AverageDps.value, help="评价指标，0-3依次为单发期望伤害、单次爆发伤害量、单次爆发DPS、平均DPS")
+    parser.add_argument('--workers', type=int, default=None, help="工作进程数量，默认为CPU核心数")
+    parser.add_argument('--limit', type=int, default=None, help="只求解前若干把武器")
+    args = parser.parse_args()
+
+    metric = DPSMetric(args.metric)
+    # 与界面一致，按配置选择的数据后端载入执行卡和武器
+    weapons = CONTEXT.getAllWeapons()[:args.limit]
+    start = time.perf_counter()
+    with CONTEXT.createBuildSearchPool(args.workers) as pool:
+        results = pool.solveLoadouts(weapons, WorkerSettings(), metric)
+    elapsed = time.perf_counter() - start
+    for weapon, result in zip(weapons, results):
+        print(f"{weapon.name} {metric} {result.value:.2f} 用时 {result.elapsed:.2f}s: {[card.name for card in result.cards]}")
+    print(f"共求解 {len(weapons)} 把武器，总用时 {elapsed:.2f}s，单进程累计用时 {sum(result.elapsed for result in results):.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
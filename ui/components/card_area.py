@@ -1,20 +1,23 @@
-from PyQt5.QtCore import pyqtSignal
-from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from qfluentwidgets import ScrollArea, CardWidget, TitleLabel
-from .selectable_mini_card import SelectableMiniCard
-from .flow_layout import FlowLayout
-from .seamless_scroll_area import SeamlessScrollArea
+from PyQt5.QtCore import pyqtSignal, QThreadPool, QTimer
+from PyQt5.QtWidgets import QVBoxLayout
+from qfluentwidgets import CardWidget, TitleLabel
+from .card_list_view import CardListView
+from .card_ranking_task import CardRankingTask
 import copy
 
-from core.ivtcard import WeaponCardCommon, WeaponCardRiven, WeaponCardSpecial
-from core.ivtenum import WeaponType, SubWeaponType, WeaponPropertyType
+from core.ivtcard import WeaponCardBase, WeaponCardCommon, WeaponCardRiven, WeaponCardSpecial
+from core.ivtenum import DPSMetric
 from core.ivtweapon import Weapon
 from core.ivtcontext import CONTEXT
 from core.ivtdps import DPSRequest
 
+# 排序结果陆续返回时，重新排列执行卡的最短间隔，单位为毫秒
+RESORT_INTERVAL = 200
+
 class CardArea(CardWidget):
     '''
     过滤并显示执行卡的区域
+    执行卡由虚拟化的列表视图显示，只绘制可见的执行卡，切换武器和重新排序只更新数据模型
     '''
 
     def __init__(self, parent=None):
@@ -22,13 +25,10 @@ class CardArea(CardWidget):
         self.setObjectName("cardArea")
 
         self.mainLayout = QVBoxLayout(self)
-        self.scrollArea = SeamlessScrollArea(self)
-        self.scrollArea.setWidgetResizable(True)
-        self.scrollAreaWidget = QWidget()
-        self.flowLayout = FlowLayout(self.scrollAreaWidget)
-        self.scrollAreaWidget.setLayout(self.flowLayout)
-        self.scrollArea.setWidget(self.scrollAreaWidget)
-        self.mainLayout.addWidget(self.scrollArea)
+        self.cardView = CardListView(self)
+        self.cardModel = self.cardView.cardModel
+        self.cardView.cardClicked.connect(self._onCardClicked)
+        self.mainLayout.addWidget(self.cardView)
 
         CONTEXT.uiSignals.weaponChanged.connect(self._onWeaponChanged)
         CONTEXT.uiSignals.dpsResultCompleted.connect(self._onDPSResultCompleted)
@@ -38,6 +38,17 @@ class CardArea(CardWidget):
         self.weapon = None
         self.dpsMethod = 0
 
+        # 执行卡排序在后台线程中计算，每次发起新的排序时代数加一，旧任务被取消，旧结果被丢弃
+        self._rankingPool = QThreadPool(self)
+        self._rankingPool.setMaxThreadCount(1)
+        self._rankingGeneration = 0
+        self._rankingTask = None
+        self._rankingCards = []
+        self._resortTimer = QTimer(self)
+        self._resortTimer.setSingleShot(True)
+        self._resortTimer.setInterval(RESORT_INTERVAL)
+        self._resortTimer.timeout.connect(self.cardModel.sortByPriority)
+
     def _onDpsMethodChanged(self, method: int):
         '''
         设置DPS计算方法
@@ -47,87 +58,93 @@ class CardArea(CardWidget):
 
     def _init_cards(self, cards: list[WeaponCardCommon | WeaponCardRiven | WeaponCardSpecial]):
         '''
-        初始化显示的执行卡
+        初始化显示的执行卡，替换之前显示的所有执行卡
+        '''
+        self.cardModel.setCards(cards)
+        self.cardView.scrollToTop()
+
+    def _onCardClicked(self, card: WeaponCardBase):
+        '''
+        选中执行卡
         '''
-        for card in cards:
-            miniCard = SelectableMiniCard(card, self)
-            self.flowLayout.addWidget(miniCard)
+        CONTEXT.uiSignals.miniCardSelected.emit(card)
 
     def _onWeaponChanged(self, weapon : Weapon):
         '''
         处理武器更改事件，更新显示的执行卡
         '''
-        # 清除现有的卡片
-        while self.flowLayout.count():
-            item = self.flowLayout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
+        self._cancelRanking()
         # 根据武器类型过滤执行卡
         self.weapon = weapon
-        weaponType = weapon.weaponType
-        subWeaponType = weapon.subWeaponType
-        allCards = CONTEXT.getAllCards()
-        filteredCards = []
-
-        for card in allCards:
-            if isinstance(card, WeaponCardCommon):
-                if (card.weaponType == WeaponType.All):
-                    filteredCards.append(card)
-                elif (card.weaponType == weaponType and (card.subWeaponType == subWeaponType or card.subWeaponType == SubWeaponType.All)):
-                    filteredCards.append(card)
-            if isinstance(card, WeaponCardRiven):
-                if (card.weaponName == weapon.basename):
-                    filteredCards.append(card)
-
-        # 初始化显示的卡片
-        self._init_cards(filteredCards)
+        self._init_cards(CONTEXT.getCompatibleCards(weapon))
 
     def _onDPSResultCompleted(self, request: DPSRequest):
         '''
-        处理DPS计算结果完成事件，更新显示的执行卡
+        处理DPS计算结果完成事件，在后台计算每张执行卡的提升比例并更新显示的执行卡
         '''
+        # DPS在后台计算，切换武器后才收到的旧武器结果直接丢弃
+        if request is None or request.weapon is not self.weapon:
+            return
+        self._cancelRanking()
         # 查看是否还有执行卡空位
         slotIndex = -1
         for i in range(8):
             if request.cards[i] is None:
                 slotIndex = i
                 break
-        cardWidgets = [self.flowLayout.itemAt(i).widget() for i in range(self.flowLayout.count())]
+        # 没有空位时不需要计算，所有执行卡的提升比例清零
         if slotIndex == -1:
-            for cardWidget in cardWidgets:
-                cardWidget.setPriority(0.0)
-        else:
-            for cardWidget in cardWidgets:
-                card = cardWidget.card
-                # 判断该执行卡是否已经被装备
-                if card in request.cards:
-                    cardWidget.setPriority(0.0)
-                    continue
-                newRequest = DPSRequest.createNewOne(request)
-                newRequest.cards[slotIndex] = card
-                newRequest.calculate()
-                if self.dpsMethod == 0:
-                    lastcriticalChance = request.finalSnapshot.getPropertyValue(WeaponPropertyType.CriticalChance) / 100.0
-                    lastDamage = request.firstCriticalDamage * lastcriticalChance + request.firstUncriticalDamage * (1 - lastcriticalChance)
-                    newcriticalChance = newRequest.finalSnapshot.getPropertyValue(WeaponPropertyType.CriticalChance) / 100.0
-                    newDamage = newRequest.firstCriticalDamage * newcriticalChance + newRequest.firstUncriticalDamage * (1 - newcriticalChance)
-                    priority = (newDamage - lastDamage) / lastDamage
-                elif self.dpsMethod == 1:
-                    priority = (newRequest.magazineDamage - request.magazineDamage) / request.magazineDamage
-                elif self.dpsMethod == 2:
-                    priority = (newRequest.magazineDps - request.magazineDps) / request.magazineDps
-                else:
-                    priority = (newRequest.averageDps - request.averageDps) / request.averageDps
-                cardWidget.setPriority(priority)
-        # 重新排序显示的执行卡
-        sortedCardWidgets = sorted(cardWidgets, key=lambda w: w.priority, reverse=True)
-        for i in range(len(sortedCardWidgets)):
-            self.flowLayout.removeWidget(sortedCardWidgets[i])
-        for i in range(len(sortedCardWidgets)):
-            self.flowLayout.addWidget(sortedCardWidgets[i])
+            self.cardModel.resetPriorities()
+            self.cardModel.sortByPriority()
+            return
+        rankingCards = []
+        for card in self.cardModel.getCards():
+            # 该执行卡已经被装备时不需要计算
+            if card in request.cards:
+                self.cardModel.setPriority(card, 0.0)
+            else:
+                rankingCards.append(card)
+        if not rankingCards:
+            self.cardModel.sortByPriority()
+            return
+        self._rankingCards = rankingCards
+        self._rankingTask = CardRankingTask(self._rankingGeneration, request, slotIndex,
+                                            rankingCards, DPSMetric(self.dpsMethod),
+                                            CONTEXT.getDpsResultCache())
+        self._rankingTask.signals.priorityReady.connect(self._onPriorityReady)
+        self._rankingTask.signals.finished.connect(self._onRankingFinished)
+        self._rankingPool.start(self._rankingTask)
+
+    def _cancelRanking(self):
+        '''
+        取消正在进行的执行卡排序，之后收到的旧结果都会被丢弃
+        '''
+        self._rankingGeneration += 1
+        if self._rankingTask is not None:
+            self._rankingTask.cancel()
+            self._rankingTask = None
+        self._rankingCards = []
+        self._resortTimer.stop()
+
+    def _onPriorityReady(self, generation: int, index: int, priority: float):
+        '''
+        收到一张执行卡的提升比例，稍后统一重新排序
+        '''
+        if generation != self._rankingGeneration:
+            return
+        self.cardModel.setPriority(self._rankingCards[index], priority)
+        if not self._resortTimer.isActive():
+            self._resortTimer.start()
 
+    def _onRankingFinished(self, generation: int):
+        '''
+        所有执行卡的提升比例都已算完
+        '''
+        if generation != self._rankingGeneration:
+            return
+        self._rankingTask = None
+        self._resortTimer.stop()
+        self.cardModel.sortByPriority()
 
     def _onCardSlotSelected(self, slotIndex: int):
         '''
@@ -135,32 +152,13 @@ class CardArea(CardWidget):
         '''
         if self.weapon is None:
             return
-        # 清除现有的卡片
-        while self.flowLayout.count():
-            item = self.flowLayout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        
-        # 根据武器类型过滤执行卡
-        weaponType = self.weapon.weaponType
-        subWeaponType = self.weapon.subWeaponType
-        allCards = CONTEXT.getAllCards()
-        filteredCards = []
-
-        for card in allCards:
-            if slotIndex != 8 and isinstance(card, WeaponCardCommon):
-                if (card.weaponType == WeaponType.All):
-                    filteredCards.append(card)
-                elif (card.weaponType == weaponType and (card.subWeaponType == subWeaponType or card.subWeaponType == SubWeaponType.All)):
-                    filteredCards.append(card)
-            elif slotIndex != 8 and isinstance(card, WeaponCardRiven):
-                if (card.weaponName == self.weapon.basename):
-                    filteredCards.append(card)
-            elif slotIndex == 8 and isinstance(card, WeaponCardSpecial):
-                if (card.weaponName == self.weapon.basename):
-                    filteredCards.append(card)
-                    
+        self._cancelRanking()
+        # 根据武器类型过滤执行卡，第9个卡槽只能装备专属执行卡
+        if slotIndex == 8:
+            filteredCards = CONTEXT.getSpecialCards(self.weapon)
+        else:
+            filteredCards = CONTEXT.getCompatibleCards(self.weapon)
+
         # 初始化显示的卡片
         self._init_cards(filteredCards)
 
@@ -0,0 +1,231 @@
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QStyleOptionViewItem, QMenu, QMessageBox
+from PyQt5.QtGui import QPainter, QFont, QColor
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, pyqtSignal
+
+from core.ivtcard import WeaponCardBase, WeaponCardCommon, WeaponCardRiven, WeaponCardWithProperty, WeaponCardSpecial
+from core.ivtenum import SlotToString
+from core.ivtcontext import CONTEXT
+from .pixmap_cache import getPixmap, getCardFramePixmap, getSlotIconPixmap, COST_PANEL_SIZE
+
+# 模型中执行卡对象和提升比例的数据角色
+CardRole = Qt.UserRole
+PriorityRole = Qt.UserRole + 1
+
+class CardListModel(QAbstractListModel):
+    '''
+    执行卡列表的数据模型，保存显示的执行卡和每张执行卡的提升比例
+    '''
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cards: list[WeaponCardBase] = []
+        self._priorities: list[float] = []
+        self._rowsByCard: dict[int, int] = {}
+        self._toolTips: dict[int, str] = {}
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._cards)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == CardRole:
+            return self._cards[row]
+        if role == PriorityRole:
+            return self._priorities[row]
+        if role == Qt.DisplayRole:
+            return self._cards[row].name
+        if role == Qt.ToolTipRole:
+            return self._getToolTip(self._cards[row])
+        return None
+
+    def _getToolTip(self, card: WeaponCardBase) -> str | None:
+        '''
+        执行卡的提示文本，第一次显示时生成
+        '''
+        if id(card) not in self._toolTips:
+            toolTip = None
+            if isinstance(card, WeaponCardSpecial):
+                toolTip = f'专属执行卡: 仅限武器 "{card.weaponName}" 使用'
+            elif isinstance(card, WeaponCardWithProperty):
+                propText = [str(prop) for prop in card.getPropertiesRef()]
+                toolTip = f'属性执行卡:\n' + '\n'.join(propText)
+            self._toolTips[id(card)] = toolTip
+        return self._toolTips[id(card)]
+
+    def setCards(self, cards: list[WeaponCardBase]):
+        '''
+        设置显示的执行卡，提升比例全部清零
+        '''
+        self.beginResetModel()
+        self._cards = list(cards)
+        self._priorities = [0.0] * len(self._cards)
+        self._toolTips = {}
+        self._updateRows()
+        self.endResetModel()
+
+    def getCards(self) -> list[WeaponCardBase]:
+        '''
+        获取按当前顺序排列的执行卡
+        '''
+        return list(self._cards)
+
+    def card(self, index: QModelIndex) -> WeaponCardBase | None:
+        return self._cards[index.row()] if index.isValid() else None
+
+    def setPriority(self, card: WeaponCardBase, priority: float):
+        '''
+        设置执行卡的提升比例，只刷新该执行卡，不重新排序
+        '''
+        row = self._rowsByCard.get(id(card))
+        if row is None or self._priorities[row] == priority:
+            return
+        self._priorities[row] = priority
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [PriorityRole])
+
+    def resetPriorities(self):
+        '''
+        将所有执行卡的提升比例清零
+        '''
+        if any(self._priorities):
+            self._priorities = [0.0] * len(self._cards)
+            self.dataChanged.emit(self.index(0), self.index(len(self._cards) - 1), [PriorityRole])
+
+    def sortByPriority(self):
+        '''
+        按提升比例从高到低重新排序，提升比例相同的执行卡保持原来的顺序
+        '''
+        order = sorted(range(len(self._cards)), key=lambda row: self._priorities[row], reverse=True)
+        if order == list(range(len(self._cards))):
+            return
+        self.layoutAboutToBeChanged.emit()
+        oldIndexes = self.persistentIndexList()
+        self._cards = [self._cards[row] for row in order]
+        self._priorities = [self._priorities[row] for row in order]
+        self._updateRows()
+        newRows = {oldRow: newRow for newRow, oldRow in enumerate(order)}
+        self.changePersistentIndexList(oldIndexes, [self.index(newRows[index.row()]) for index in oldIndexes])
+        self.layoutChanged.emit()
+
+    def _updateRows(self):
+        self._rowsByCard = {id(card): row for row, card in enumerate(self._cards)}
+
+class CardItemDelegate(QStyledItemDelegate):
+    '''
+    绘制执行卡的代理，外观与MiniCard一致，只绘制可见的执行卡
+    '''
+    @staticmethod
+    def getBackgroundPath(card: WeaponCardBase) -> str:
+        '''
+        执行卡背景图片的路径
+        '''
+        if isinstance(card, WeaponCardCommon) and card.isPrime:
+            return 'assets/ui/frame_prime.png'
+        if isinstance(card, WeaponCardRiven):
+            return 'assets/ui/frame_riven.png'
+        return 'assets/ui/frame_gold.png'
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        uiScale = CONTEXT.getUiScale()
+        return QSize(int(124 * uiScale), int(128 * uiScale))
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        card: WeaponCardBase = index.data(CardRole)
+        if card is None:
+            return
+        uiScale = CONTEXT.getUiScale()
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.drawPixmap(rect, getCardFramePixmap(self.getBackgroundPath(card)))
+
+        # 电量面板位于顶部居中，左侧为卡槽图标，右侧为电量
+        contentRect = rect.adjusted(5, 5, -5, -5)
+        costRect = QRect(0, 0, int(66 * uiScale), int(25 * uiScale))
+        costRect.moveTop(contentRect.top())
+        costRect.moveLeft(contentRect.left() + (contentRect.width() - costRect.width()) // 2)
+        painter.drawPixmap(costRect, getPixmap('assets/ui/costpanel.png', *COST_PANEL_SIZE))
+        slotPixmap = getSlotIconPixmap(f'assets/ui/{SlotToString[card.slot.value]}.png')
+        slotWidth = slotPixmap.width()
+        painter.drawPixmap(costRect.left(), costRect.top() + (costRect.height() - slotPixmap.height()) // 2, slotPixmap)
+        painter.setPen(QColor(255, 255, 255))
+        painter.setFont(option.font)
+        painter.drawText(costRect.adjusted(slotWidth, 0, 0, 0), Qt.AlignCenter, str(card.cost))
+
+        # 名称在电量面板下方的区域中居中显示
+        nameRect = contentRect.adjusted(0, costRect.height(), 0, 0)
+        painter.drawText(nameRect, Qt.AlignCenter | Qt.TextWordWrap, card.name)
+
+        priority = index.data(PriorityRole)
+        if priority:
+            font = QFont(option.font)
+            font.setPointSize(10)
+            painter.setFont(font)
+            painter.setPen(QColor(255, 0, 0) if priority > 0.0 else QColor(0, 255, 0))
+            painter.drawText(rect, Qt.AlignCenter, f"{priority * 100:.1f}%")
+        painter.restore()
+
+class CardListView(QListView):
+    '''
+    以网格显示执行卡的列表，只绘制可见区域内的执行卡
+    切换执行卡和重新排序只需要更新模型，不会创建或销毁组件
+    '''
+    cardClicked = pyqtSignal(WeaponCardBase)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cardModel = CardListModel(self)
+        self.setModel(self.cardModel)
+        self.setItemDelegate(CardItemDelegate(self))
+
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setSpacing(3)
+        self.setSelectionMode(QListView.NoSelection)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setMouseTracking(True)
+        # 与SeamlessScrollArea一致，移除边框和背景色
+        self.setFrameShape(QListView.NoFrame)
+        self.viewport().setAutoFillBackground(False)
+        self.setStyleSheet("QListView { border: none; background: transparent; }")
+
+    def mousePressEvent(self, event):
+        '''
+        选中执行卡
+        '''
+        if event.button() == Qt.LeftButton:
+            card = self.cardModel.card(self.indexAt(event.pos()))
+            if card is not None:
+                self.cardClicked.emit(card)
+                return
+        super().mousePressEvent(event)
+
+    def contextMenuEvent(self, event):
+        '''
+        删除混淆执行卡
+        '''
+        card = self.cardModel.card(self.indexAt(event.pos()))
+        if isinstance(card, WeaponCardRiven):
+            menu = QMenu(self)
+            deleteAction = menu.addAction("删除")
+            action = menu.exec_(self.mapToGlobal(event.pos()))
+
+            if action == deleteAction:
+                self._handleDeleteRivenCard(card)
+
+    def _handleDeleteRivenCard(self, card: WeaponCardRiven):
+        '''
+        删除混淆执行卡
+        '''
+        reply = QMessageBox.question(self, '确认删除',
+                                     f'你确定要删除这张自定义混淆执行卡 "{card.name}" 吗?',
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            CONTEXT.deleteRivenCard(card)
+            CONTEXT.uiSignals.rivenCardChanged.emit(card)
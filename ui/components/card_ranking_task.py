@@ -0,0 +1,70 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+import copy
+
+from core.ivtcard import WeaponCardBase
+from core.ivtdps import DPSRequest, DPSResultCache, SlotDeltaEvaluator
+from core.ivtenum import DPSMetric
+
+# 每批增量计算的执行卡数量，批次越小取消任务和刷新界面越及时
+RANKING_CHUNK_SIZE = 16
+
+class CardRankingSignals(QObject):
+    '''
+    执行卡排序任务的信号，QRunnable本身不能发送信号
+    '''
+    priorityReady = pyqtSignal(int, int, float)     # 任务代数，执行卡序号，提升比例
+    finished = pyqtSignal(int)                      # 任务代数
+
+class CardRankingTask(QRunnable):
+    '''
+    在后台线程中计算执行卡装备到空卡槽后的指标提升比例
+    使用卡槽增量计算器分批计算，每算完一批就逐张发送结果，任务被取消后在下一批之前退出
+    '''
+    def __init__(self, generation: int, request: DPSRequest, slotIndex: int, cards: list[WeaponCardBase], metric: DPSMetric,
+                 cache: DPSResultCache = None):
+        '''
+        :param generation: 任务代数，界面据此丢弃过期任务的结果
+        :param request: 当前配卡的DPS请求，创建任务时会复制一份，之后界面对它的修改不影响任务
+        :param slotIndex: 用于试装执行卡的空卡槽序号
+        :param cards: 需要计算的执行卡，结果中的序号即该列表中的序号
+        :param metric: 评价指标
+        :param cache: DPS计算结果缓存，为None时不使用缓存
+        '''
+        super().__init__()
+        self.generation = generation
+        self.request = DPSRequest.createNewOne(request)
+        self.request.moveState = copy.deepcopy(request.moveState)
+        self.request.cardSetInfo = copy.deepcopy(request.cardSetInfo)
+        self.request.characterInfo = copy.deepcopy(request.characterInfo)
+        self.slotIndex = slotIndex
+        self.cards = list(cards)
+        self.metric = metric
+        self.cache = cache
+        self.signals = CardRankingSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        '''
+        取消任务，已经在计算的一批执行卡算完后退出
+        '''
+        self._cancelled = True
+
+    def _calculate(self, request: DPSRequest):
+        if self.cache is None:
+            request.calculate()
+        else:
+            request.calculateWithCache(self.cache)
+
+    def run(self):
+        self._calculate(self.request)
+        lastValue = self.request.getMetricValue(self.metric)
+        evaluator = SlotDeltaEvaluator(self.request, self.slotIndex)
+        for begin in range(0, len(self.cards), RANKING_CHUNK_SIZE):
+            if self._cancelled:
+                return
+            values = evaluator.evaluate(self.cards[begin:begin + RANKING_CHUNK_SIZE]).getMetricValue(self.metric)
+            for offset, value in enumerate(values):
+                priority = (value - lastValue) / lastValue
+                self.signals.priorityReady.emit(self.generation, begin + offset, float(priority))
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation)
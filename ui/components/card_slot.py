@@ -1,9 +1,10 @@
 from PyQt5.QtWidgets import QWidget, QMenu, QMessageBox
-from PyQt5.QtGui import QPainter, QPixmap
+from PyQt5.QtGui import QPainter
 from PyQt5.QtCore import Qt
 from core.ivtcard import WeaponCardBase
 
 from .mini_card import MiniCard
+from .pixmap_cache import getCardFramePixmap
 
 from core.ivtcontext import CONTEXT
 from core.ivtcard import WeaponCardSpecial, WeaponCardWithProperty
@@ -15,8 +16,8 @@ class CardSlot(MiniCard):
 
         self.slotIndex = slotIndex
         self.card: WeaponCardBase | None = None
-        self.backgroundPixmap = QPixmap('assets/ui/empty_frame.png')
-        self.selectedPixmap = QPixmap('assets/ui/select_frame.png')
+        self.backgroundPixmap = getCardFramePixmap('assets/ui/empty_frame.png')
+        self.selectedPixmap = getCardFramePixmap('assets/ui/select_frame.png')
         self.isSpecial = isSpecial
         self.isSelected = False
 
@@ -26,7 +27,7 @@ class CardSlot(MiniCard):
         '''
         super().setCard(card)
         if card is None:
-            self.backgroundPixmap = QPixmap('assets/ui/empty_frame.png')
+            self.backgroundPixmap = getCardFramePixmap('assets/ui/empty_frame.png')
         self.update()
         CONTEXT.uiSignals.weaponBuildRequestChanged.emit()
 
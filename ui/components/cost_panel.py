@@ -1,6 +1,7 @@
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPixmap, QPainter
+from PyQt5.QtGui import QPainter
 from core.ivtcontext import CONTEXT
+from .pixmap_cache import getPixmap, COST_PANEL_SIZE
 
 class CostPanel(QWidget):
     """
@@ -8,7 +9,7 @@ class CostPanel(QWidget):
     """
     def __init__(self, pixmap_path, parent=None):
         super().__init__(parent)
-        self.pixmap = QPixmap(pixmap_path)
+        self.pixmap = getPixmap(pixmap_path, *COST_PANEL_SIZE)
         uiScale = CONTEXT.getUiScale()
         self.setFixedSize(int(66 * uiScale), int(25 * uiScale))
 
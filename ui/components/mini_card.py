@@ -3,6 +3,7 @@ from PyQt5.QtGui import QPixmap, QPainter, QFont, QColor
 from PyQt5.QtCore import Qt, pyqtSignal, QSize
 
 from .cost_panel import CostPanel
+from .pixmap_cache import getCardFramePixmap, getSlotIconPixmap
 
 from core.ivtcard import WeaponCardBase, WeaponCardCommon, WeaponCardRiven, WeaponCardWithProperty, WeaponCardSpecial
 from core.ivtenum import Slot, SlotToString
@@ -61,16 +62,13 @@ class MiniCard(QWidget):
                 self.backgroundPath = 'assets/ui/frame_riven.png'
             else:
                 self.backgroundPath = 'assets/ui/frame_gold.png'
-            self.backgroundPixmap = QPixmap(self.backgroundPath)
+            self.backgroundPixmap = getCardFramePixmap(self.backgroundPath)
 
             self.costLabel.setText(str(card.cost) if card else "0")
             slotPixmapPath = f'assets/ui/{SlotToString[self.card.slot.value]}.png'
-            slotPixmap = QPixmap(slotPixmapPath)
+            slotPixmap = getSlotIconPixmap(slotPixmapPath)
             self.slotLabel.setPixmap(slotPixmap)
-            slotPixmapSize = self.slotLabel.size()
-            uiScale = CONTEXT.getUiScale()
-            self.slotLabel.setFixedHeight(int(20 * uiScale))
-            self.slotLabel.setFixedWidth(int(20 * uiScale) * slotPixmap.width() // slotPixmap.height())
+            self.slotLabel.setFixedSize(slotPixmap.size())
 
             self.nameLabel.setText(card.name)
             tooltipText = None
@@ -101,12 +99,12 @@ class MiniCard(QWidget):
         self.isActive = active
         if active:
             if self.card is not None:  
-                self.backgroundPixmap = QPixmap(self.backgroundPath)
+                self.backgroundPixmap = getCardFramePixmap(self.backgroundPath)
             self.nameLabel.setStyleSheet("color: white; background-color: transparent;")
             self.costLabel.setStyleSheet("color: white; background-color: transparent;")
         else:
             if self.card is not None:
-                self.backgroundPixmap = QPixmap(self.backgroundPath.replace('.png', '_gray.png'))
+                self.backgroundPixmap = getCardFramePixmap(self.backgroundPath.replace('.png', '_gray.png'))
             self.nameLabel.setStyleSheet("color: gray; background-color: transparent;")
             self.costLabel.setStyleSheet("color: gray; background-color: transparent;")
         self.update()
@@ -0,0 +1,54 @@
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt
+
+from core.ivtcontext import CONTEXT
+
+# 执行卡边框的基础尺寸，实际尺寸再乘以界面缩放比例
+CARD_FRAME_SIZE = (124, 128)
+# 电量面板的基础尺寸
+COST_PANEL_SIZE = (66, 25)
+# 卡槽图标的基础高度，宽度按图片比例计算
+SLOT_ICON_HEIGHT = 20
+
+# 进程内共享的图片缓存，键为(图片路径, 界面缩放比例, 基础宽度, 基础高度)
+_PIXMAP_CACHE: dict[tuple[str, float, int, int], QPixmap] = {}
+
+def getPixmap(path: str, width: int = 0, height: int = 0) -> QPixmap:
+    '''
+    获取按当前界面缩放比例缩放后的图片，每张图片只从磁盘读取和缩放一次
+    :param path: 图片路径
+    :param width: 缩放前的宽度，为0时按高度和图片比例计算
+    :param height: 缩放前的高度，为0时按宽度和图片比例计算，宽高都为0时不缩放
+    '''
+    uiScale = CONTEXT.getUiScale()
+    key = (path, uiScale, width, height)
+    pixmap = _PIXMAP_CACHE.get(key)
+    if pixmap is None:
+        pixmap = QPixmap(path)
+        if not pixmap.isNull() and (width > 0 or height > 0):
+            if width <= 0:
+                pixmap = pixmap.scaledToHeight(int(height * uiScale), Qt.SmoothTransformation)
+            elif height <= 0:
+                pixmap = pixmap.scaledToWidth(int(width * uiScale), Qt.SmoothTransformation)
+            else:
+                pixmap = pixmap.scaled(int(width * uiScale), int(height * uiScale), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        _PIXMAP_CACHE[key] = pixmap
+    return pixmap
+
+def getCardFramePixmap(path: str) -> QPixmap:
+    '''
+    获取缩放到执行卡大小的边框图片
+    '''
+    return getPixmap(path, *CARD_FRAME_SIZE)
+
+def getSlotIconPixmap(path: str) -> QPixmap:
+    '''
+    获取缩放到卡槽图标高度的图片
+    '''
+    return getPixmap(path, 0, SLOT_ICON_HEIGHT)
+
+def clearPixmapCache():
+    '''
+    清空图片缓存
+    '''
+    _PIXMAP_CACHE.clear()
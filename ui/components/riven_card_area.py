@@ -1,8 +1,7 @@
 from .card_area import CardArea
-from .mini_card import MiniCard
 
 from core.ivtcontext import CONTEXT
-from core.ivtcard import WeaponCardRiven, WeaponCardCommon, WeaponCardSpecial
+from core.ivtcard import WeaponCardBase, WeaponCardRiven, WeaponCardCommon, WeaponCardSpecial
 
 class RivenCardArea(CardArea):
     '''
@@ -25,23 +24,17 @@ class RivenCardArea(CardArea):
         '''
         处理混淆执行卡更改事件，更新显示的执行卡
         '''
-        # 清除现有的卡片
-        while self.flowLayout.count():
-            item = self.flowLayout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
         # 重新加载混淆执行卡
-        allCards = CONTEXT.getAllCards()
-        rivenCards = [card for card in allCards]
-        self._init_cards(rivenCards)
+        self._init_cards(CONTEXT.getRivenCards())
 
     def _init_cards(self, cards: list[WeaponCardCommon | WeaponCardRiven | WeaponCardSpecial]):
         '''
         初始化显示的执行卡，仅显示混淆执行卡
         '''
-        for card in cards:
-            if isinstance(card, WeaponCardRiven):
-                miniCard = MiniCard(card, self)
-                self.flowLayout.addWidget(miniCard)
\ No newline at end of file
+        super()._init_cards([card for card in cards if isinstance(card, WeaponCardRiven)])
+
+    def _onCardClicked(self, card: WeaponCardBase):
+        '''
+        混淆执行卡区域只用于预览，不能选中执行卡
+        '''
+        pass
\ No newline at end of file
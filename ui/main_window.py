@@ -8,6 +8,7 @@ from ui.home_page import HomePage
 from ui.weapon_build_page import WeaponBuildPage
 from ui.edit_riven_page import RivenPage
 from ui.settings_page import SettingsPage
+from core.ivtcontext import CONTEXT
 
 class MainWindow(FluentWindow):
     """
@@ -22,10 +23,15 @@ class MainWindow(FluentWindow):
         self.resize(900, 600)
 
         # 在这里可以添加更多的UI组件和逻辑
-        self.home_page = HomePage(self)
-        self.weapon_build_page = WeaponBuildPage(self)
-        self.edit_riven_page = RivenPage(self)
-        self.settings_page = SettingsPage(self)
+        timer = CONTEXT.startupTimer
+        with timer.phase("首页"):
+            self.home_page = HomePage(self)
+        with timer.phase("武器配卡页"):
+            self.weapon_build_page = WeaponBuildPage(self)
+        with timer.phase("混淆执行卡页"):
+            self.edit_riven_page = RivenPage(self)
+        with timer.phase("设置页"):
+            self.settings_page = SettingsPage(self)
 
         self.home_page.setObjectName("homePage")
         self.weapon_build_page.setObjectName("weaponBuildPage")
@@ -10,6 +10,7 @@ from core.ivtenum import SubWeaponType, SubWeaponTypeToString, SubWeaponTypeToMa
 
 from .components.seamless_scroll_area import SeamlessScrollArea
 from .components.foldable_card_widget import FoldableCardWidget
+from .components.pixmap_cache import clearPixmapCache
 
 class UISettingsPage(FoldableCardWidget):
 
@@ -57,6 +58,8 @@ class UISettingsPage(FoldableCardWidget):
             CONTEXT.setUiScale(1.25)
         elif scale == "150%":
             CONTEXT.setUiScale(1.5)
+        # 旧缩放比例下的图片不会再被使用
+        clearPixmapCache()
 
 class DPSSettingsPage(FoldableCardWidget):
 
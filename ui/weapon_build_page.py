@@ -50,7 +50,7 @@ class WeaponSelectCard(CardWidget):
         if weapon:
             CONTEXT.uiSignals.weaponChanged.emit(weapon)
             request = DPSRequest(weapon, [None]*9, context=CONTEXT)
-            CONTEXT.triggerDpsCalculation(request)
+            CONTEXT.scheduleDpsCalculation(request)
 
     def afterInit(self):
         '''
@@ -100,7 +100,18 @@ class WeaponPropertyCard(CardWidget):
         self.contentLayout.addStretch(1)
 
         self.setFixedWidth(400)
+        # 所有属性标签预先创建，收到计算结果时只更新文本和显示状态
         self.propertyLabels = {}
+        self._addPropertyLabel('firstCriticalDamage', '首发暴击伤害', tooltip='若暴击率超过100%则为下一等级暴击伤害')
+        self._addPropertyLabel('firstUncriticalDamage', '首发非暴击伤害', tooltip='若暴击率超过100%则为原等级暴击伤害')
+        self._addPropertyLabel('firstCriticalDamageHeadshot', '首发暴击弱点伤害', tooltip='部位默认弱点倍率为100%')
+        self._addPropertyLabel('firstUncriticalDamageHeadshot', '首发非暴击弱点伤害', tooltip='部位默认弱点倍率为100%')
+        self._addPropertyLabel('magazineDamage', '单次爆发伤害量', tooltip='单个弹匣造成的总伤害')
+        self._addPropertyLabel('magazineDps', '单次爆发DPS', tooltip='单个弹匣造成的每秒伤害')
+        self._addPropertyLabel('averageDps', '平均DPS', tooltip='计入换弹时间后的每秒伤害')
+        self._addPropertyLabel('totalDamage', '面板总伤害', tooltip='武器面板伤害，计入魈鬼系列卡牌的元素转化')
+        for weaponPropType in WeaponPropertyType:
+            self._addPropertyLabel(weaponPropType, str(weaponPropType))
 
         signals = CONTEXT.uiSignals
         signals.dpsResultCompleted.connect(self._updateLabels)
@@ -111,9 +122,9 @@ class WeaponPropertyCard(CardWidget):
         '''
         CONTEXT.uiSignals.dpsMethodChanged.emit(index)
 
-    def _addPropertyLabel(self, name: str, value, tooltip=None):
+    def _addPropertyLabel(self, key, name: str, tooltip=None):
         '''
-        添加一个属性标签
+        添加一个属性标签，标签在收到计算结果前隐藏
         '''
         hLayout = QHBoxLayout()
         nameLabel = QLabel(f"{name}:", self)
@@ -125,49 +136,43 @@ class WeaponPropertyCard(CardWidget):
             infoLabel.setToolTip(tooltip)
             hLayout.addWidget(infoLabel)
 
-        valueLabel = QLabel(str(value), self)
+        valueLabel = QLabel(self)
         hLayout.addWidget(valueLabel)
 
         container = QWidget(self)
         container.setLayout(hLayout)
+        container.hide()
 
         self.propertyLayout.addWidget(container)
-        self.propertyLabels[name] = container
+        self.propertyLabels[key] = (container, valueLabel)
 
-    def _setPropertyValue(self, name: str, value):
+    def _setPropertyValue(self, key, value: str, visible: bool = True):
         '''
-        设置属性标签的值
+        设置属性标签的值和是否显示，值和显示状态都没有变化时不改动标签
         '''
-        if name in self.propertyLabels:
-            self.propertyLabels[name].setText(str(value))
+        container, valueLabel = self.propertyLabels[key]
+        if valueLabel.text() != value:
+            valueLabel.setText(value)
+        if container.isHidden() == visible:
+            container.setVisible(visible)
 
     def _updateLabels(self, request: DPSRequest):
         '''
-        当属性变化时，更新所有属性标签
+        当属性变化时，原地更新所有属性标签，值为0的武器属性隐藏
         '''
-        # 清空现有标签
-        for i in reversed(range(self.propertyLayout.count())):
-            widgetToRemove = self.propertyLayout.itemAt(i).widget()
-            if widgetToRemove is not None:
-                widgetToRemove.setParent(None)
-        self.propertyLabels.clear()
-
-        weapon = request.weapon
-
-        self._addPropertyLabel('首发暴击伤害', f"{request.firstCriticalDamage:.1f}", tooltip='若暴击率超过100%则为下一等级暴击伤害')
-        self._addPropertyLabel('首发非暴击伤害', f"{request.firstUncriticalDamage:.1f}", tooltip='若暴击率超过100%则为原等级暴击伤害')
-        self._addPropertyLabel('首发暴击弱点伤害', f"{request.firstCriticalDamageHeadshot:.1f}", tooltip='部位默认弱点倍率为100%')
-        self._addPropertyLabel('首发非暴击弱点伤害', f"{request.firstUncriticalDamageHeadshot:.1f}", tooltip='部位默认弱点倍率为100%')
-        self._addPropertyLabel('单次爆发伤害量', f"{request.magazineDamage:.1f}", tooltip='单个弹匣造成的总伤害')
-        self._addPropertyLabel('单次爆发DPS', f"{request.magazineDps:.1f}", tooltip='单个弹匣造成的每秒伤害')
-        self._addPropertyLabel('平均DPS', f"{request.averageDps:.1f}", tooltip='计入换弹时间后的每秒伤害')
+        self._setPropertyValue('firstCriticalDamage', f"{request.firstCriticalDamage:.1f}")
+        self._setPropertyValue('firstUncriticalDamage', f"{request.firstUncriticalDamage:.1f}")
+        self._setPropertyValue('firstCriticalDamageHeadshot', f"{request.firstCriticalDamageHeadshot:.1f}")
+        self._setPropertyValue('firstUncriticalDamageHeadshot', f"{request.firstUncriticalDamageHeadshot:.1f}")
+        self._setPropertyValue('magazineDamage', f"{request.magazineDamage:.1f}")
+        self._setPropertyValue('magazineDps', f"{request.magazineDps:.1f}")
+        self._setPropertyValue('averageDps', f"{request.averageDps:.1f}")
         damage = request.finalSnapshot.getTotalDamageArray().sum()
-        self._addPropertyLabel('面板总伤害', f"{damage:.1f}", tooltip='武器面板伤害，计入魈鬼系列卡牌的元素转化')
+        self._setPropertyValue('totalDamage', f"{damage:.1f}")
 
         for weaponPropType in WeaponPropertyType:
             value = request.finalSnapshot.getPropertyValue(weaponPropType)
-            if value != 0:
-                self._addPropertyLabel(str(weaponPropType), f"{value:.1f}")
+            self._setPropertyValue(weaponPropType, f"{value:.1f}", bool(value != 0))
 
 class TargetSettingCard(FoldableCardWidget):
     '''
@@ -269,24 +274,11 @@ class TargetSettingCard(FoldableCardWidget):
         contentLayout.addLayout(self.headShotLayout)
         self.headShotSpinBox.valueChanged.connect(self._onTargetSettingChanged)
 
-        self.applyButton = PushButton(FIF.SAVE,'应用', self)
-        self.applyButton.clicked.connect(self._onApplyClicked)
-
-        contentLayout.addWidget(self.applyButton, alignment=Qt.AlignRight)
-
-    def _onApplyClicked(self):
-        '''
-        应用当前设置到靶标信息中
-        '''
-        # 隐藏应用按钮
-        self.applyButton.setVisible(False)
-        CONTEXT.uiSignals.weaponBuildRequestChanged.emit()
-
     def _onTargetSettingChanged(self):
         '''
-        当靶标设置改变时调用此方法
+        当靶标设置改变时重新计算，连续的修改会合并为一次计算
         '''
-        self.applyButton.setVisible(True)
+        CONTEXT.uiSignals.weaponBuildRequestChanged.emit()
 
     def getElementDebuffInfo(self) -> list[tuple[DamageType, int]]:
         '''
@@ -380,11 +372,6 @@ class CharacterSettingCard(FoldableCardWidget):
         self.cardSetLayout.addWidget(self.addCardSetButton)
         contentLayout.addLayout(self.cardSetLayout)
 
-        # 应用按钮
-        self.applyButton = PushButton(FIF.SAVE,'应用', self)
-        self.applyButton.clicked.connect(self._onApplyClicked)
-        contentLayout.addWidget(self.applyButton, alignment=Qt.AlignRight)
-
     def _addCardSetRow(self):
         '''
         添加一行执行卡套装设置
@@ -411,6 +398,7 @@ class CharacterSettingCard(FoldableCardWidget):
         removeButton.clicked.connect(lambda: self._removeCardSetRow(widgetTubple))
         comboBox.currentIndexChanged.connect(self._onCharacterSettingChanged)
         spinBox.valueChanged.connect(self._onCharacterSettingChanged)
+        self._onCharacterSettingChanged()
         
     def _removeCardSetRow(self, widgetTubple):
         '''
@@ -431,15 +419,8 @@ class CharacterSettingCard(FoldableCardWidget):
 
     def _onCharacterSettingChanged(self):
         '''
-        当角色设置改变时调用此方法
-        '''
-        self.applyButton.setVisible(True)
-
-    def _onApplyClicked(self):
-        '''
-        应用当前设置到角色信息中
+        当角色设置改变时重新计算，连续的修改会合并为一次计算
         '''
-        self.applyButton.setVisible(False)
         CONTEXT.uiSignals.weaponBuildRequestChanged.emit()
 
     def getIsMoving(self) -> bool:
@@ -620,7 +601,7 @@ class WeaponBuildPage(QFrame):
 
     def _onWeaponBuildRequestChanged(self):
         '''
-        当配卡请求发生变化时调用此方法，主要是构建并填充DPSRequest，然后发起计算
+        当配卡请求发生变化时调用此方法，主要是构建并填充DPSRequest，然后提交到后台合并计算
         '''
         weapon = self.weaponSelectCard.getWeapon()
         cards = self.cardSlotCard.getCards()
@@ -651,7 +632,7 @@ class WeaponBuildPage(QFrame):
         # 弱点命中率
         headShotRate = self.targetSettingCard.headShotSpinBox.value() / 100.0
         dpsRequest.targetInfo.headShotRate = headShotRate
-        # 通知计算完成
-        CONTEXT.triggerDpsCalculation(dpsRequest)
+        # 提交计算，完成后通过dpsResultCompleted通知
+        CONTEXT.scheduleDpsCalculation(dpsRequest)
 
 